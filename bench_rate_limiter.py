@@ -0,0 +1,80 @@
+"""
+Benchmark: hourly COUNT over email_logs vs. the per-minute SendRateLimiter.
+
+Runs against BENCH_DATABASE_URL (default: a local SQLite file) - never the app database.
+Usage: python bench_rate_limiter.py [log_rows]
+"""
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///bench_rate_limiter.db")  # database.py needs a URL to import
+
+from sqlmodel import SQLModel, Session, create_engine, select, func
+from database import Company, EmailLog, SendRateBucket
+from modules.rate_limiter import SendRateLimiter
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "sqlite:///bench_rate_limiter.db")
+SENDER = "bench@example.com"
+
+
+def seed(engine, rows):
+    SQLModel.metadata.drop_all(engine, tables=[EmailLog.__table__, SendRateBucket.__table__, Company.__table__])
+    SQLModel.metadata.create_all(engine, tables=[Company.__table__, EmailLog.__table__, SendRateBucket.__table__])
+
+    company_id = uuid.uuid4()
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        session.add(Company(id=company_id, company_name="Bench", website_url="https://bench.example", primary_email="b@example.com"))
+        session.commit()
+
+    print(f"Seeding {rows:,} email_logs rows (spread over the last 90 days)...")
+    batch = 50_000
+    with engine.begin() as conn:
+        for start in range(0, rows, batch):
+            conn.execute(EmailLog.__table__.insert(), [
+                {
+                    "id": uuid.uuid4(),
+                    "company_id": company_id,
+                    "sender_email": SENDER,
+                    "sent_at": now - timedelta(seconds=(i * 7919) % (90 * 86400))
+                }
+                for i in range(start, min(start + batch, rows))
+            ])
+
+
+def timed(label, fn, repeat=200):
+    fn()  # warm up
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    print(f"{label:<34} p50={samples[len(samples) // 2]:.3f}ms  p95={samples[int(len(samples) * 0.95)]:.3f}ms")
+
+
+def run(rows):
+    engine = create_engine(BENCH_DATABASE_URL)
+    seed(engine, rows)
+    limiter = SendRateLimiter(engine)
+    limiter.backfill_from_logs(SENDER)
+
+    def count_query():
+        with Session(engine) as session:
+            one_hour_ago = datetime.utcnow() - timedelta(hours=1)
+            return session.exec(select(func.count(EmailLog.id)).where(
+                EmailLog.sender_email == SENDER,
+                EmailLog.sent_at > one_hour_ago
+            )).one()
+
+    print(f"\nLog rows: {rows:,} | sent in last hour: {count_query()} | limiter says: {limiter.sent_in_window(SENDER)}")
+    timed("COUNT(email_logs) last hour", count_query)
+    timed("SendRateLimiter.remaining()", lambda: limiter.remaining(SENDER, 10**9))
+    timed("SendRateLimiter.reserve()+release()", lambda: limiter.release(limiter.reserve(SENDER, 10**9)))
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
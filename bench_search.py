@@ -0,0 +1,96 @@
+"""
+Benchmark: /search latency over a large CRM (clients, remarks, activity notes, OCR'd cards).
+
+Runs against BENCH_DATABASE_URL (default: a local SQLite file) through its own engines,
+never the app database's.
+Usage: python bench_search.py [rows_per_table]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+from datetime import datetime, timedelta
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "sqlite:///bench_search.db")
+if BENCH_DATABASE_URL.startswith("sqlite:///") and os.path.exists(BENCH_DATABASE_URL[10:]):
+    os.remove(BENCH_DATABASE_URL[10:])
+os.environ["DATABASE_URL"] = BENCH_DATABASE_URL # Only so importing database works without a .env
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import async_database_url, User, ClientProfile, Remark, ActivityLog, Document
+from modules.migrations import migrate
+from modules.search import search_records
+
+engine = create_engine(BENCH_DATABASE_URL)
+async_engine = create_async_engine(async_database_url(BENCH_DATABASE_URL))
+
+WORDS = ("seo audit backlinks plumber dentist roofing bakery lawyer citation schema pagespeed keyword ranking "
+         "outreach proposal invoice renewal meeting callback review google maps listing austin denver boston").split()
+QUERIES = ["plumber austin", "backlinks", "google maps listing", "renewal invoice", "dentist review", "zzzz-nothing"]
+
+
+def sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed(rows):
+    migrate(engine)
+    rng = random.Random(7)
+    start = datetime.utcnow() - timedelta(days=365)
+    batch = 10_000
+    print(f"Seeding {rows:,} clients, remarks, activities and documents ({rows * 4:,} searchable rows)...")
+    with engine.begin() as conn:
+        for offset in range(0, rows, batch):
+            ids = range(offset + 1, min(offset + batch, rows) + 1)
+            conn.execute(User.__table__.insert(), [
+                {"id": i, "email": f"client{i}@example.com", "password": "x", "role": "Client",
+                 "createdAt": start, "updatedAt": start} for i in ids
+            ])
+            conn.execute(ClientProfile.__table__.insert(), [
+                {"id": i, "userId": i, "companyName": f"{rng.choice(WORDS).title()} Co {i}", "status": "Active",
+                 "targetKeywords": [rng.choice(WORDS), rng.choice(WORDS)], "services_offered": sentence(rng, 6),
+                 "outbound_email_sent": False, "inbound_email_sent": False} for i in ids
+            ])
+            conn.execute(Remark.__table__.insert(), [
+                {"content": sentence(rng), "clientId": i, "isInternal": True, "createdAt": start} for i in ids
+            ])
+            conn.execute(ActivityLog.__table__.insert(), [
+                {"clientId": i, "action": "Manual Activity", "method": "Call", "content": sentence(rng),
+                 "createdAt": start} for i in ids
+            ])
+            conn.execute(Document.__table__.insert(), [
+                {"filename": f"card{i}.png", "fileUrl": f"/static/uploads/card{i}.png", "status": "Done",
+                 "clientId": i, "ocrText": sentence(rng, 20), "createdAt": start} for i in ids
+            ])
+        conn.execute(text("ANALYZE"))
+
+
+async def timed(label, q, repeat=50, **filters):
+    async with AsyncSession(async_engine) as session:
+        rows, _ = await search_records(session, q, limit=20, **filters)  # warm up
+        samples = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            await search_records(session, q, limit=20, **filters)
+            samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    print(f"{label:<36} {len(rows):>3} hits  p50={samples[len(samples) // 2]:7.2f}ms  "
+          f"p95={samples[int(len(samples) * 0.95)]:7.2f}ms")
+
+
+async def run():
+    for q in QUERIES:
+        await timed(f"search {q!r}", q)
+    await timed("search 'backlinks' (remarks only)", "backlinks", kinds=["remark"])
+    await timed("search 'backlinks' (client 42)", "backlinks", client_id=42)
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    seed(int(sys.argv[1]) if len(sys.argv) > 1 else 25_000)
+    asyncio.run(run())
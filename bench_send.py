@@ -0,0 +1,128 @@
+"""
+Benchmark: /send and /send-lead throughput against the local mail sink (no real mailbox).
+
+Starts modules/mail_sink.py in-process, points the app at it and fires concurrent
+direct ("queue": false) sends through the ASGI app, once per SMTP transport.
+Uses its own SQLite file (BENCH_DATABASE_URL) - never the app database.
+Service extraction is replaced with a no-op so no LLM calls are made.
+
+Usage: python bench_send.py [requests] [concurrency] [sink_delay_seconds]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+
+from modules.mail_sink import MailSink
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "sqlite:///bench_send.db")
+
+sink = MailSink(delay=float(sys.argv[3]) if len(sys.argv) > 3 else 0.0).start_in_thread()
+
+if BENCH_DATABASE_URL.startswith("sqlite:///") and os.path.exists(BENCH_DATABASE_URL[10:]):
+    os.remove(BENCH_DATABASE_URL[10:])
+os.environ.update({
+    "DATABASE_URL": BENCH_DATABASE_URL,
+    "THROWAWAY_DATABASE_URLS": f"{os.getenv('THROWAWAY_DATABASE_URLS', '')} {BENCH_DATABASE_URL}".strip(),
+    "OUTLOOK_EMAIL": "bench@example.com",
+    "OUTLOOK_PASSWORD": "bench",
+    "SENDER_EMAIL": "bench@example.com",
+    "SMTP_SERVER": "127.0.0.1",
+    "SMTP_PORT": str(sink.smtp_port),
+    "IMAP_SERVER": "127.0.0.1",
+    "IMAP_PORT": str(sink.imap_port),
+    "SENDER_ACCOUNTS": json.dumps([{
+        "email": "bench@example.com", "password": "bench",
+        "smtp_server": "127.0.0.1", "smtp_port": sink.smtp_port,
+        "imap_server": "127.0.0.1", "imap_port": sink.imap_port
+    }]), # Takes precedence over any mailboxes configured in .env
+    "HOURLY_EMAIL_LIMIT": "1000000",
+    "SEND_QUEUE_ENABLED": "false",
+    "MX_CHECK_ENABLED": "false", # example.com publishes a null MX; syntax is still checked
+})
+
+import httpx
+import main
+from database import create_db_and_tables, require_throwaway_database
+import modules.service_extractor as service_extractor
+from modules.email_sender import sent_archiver
+
+# Never send through a real mailbox or write to the app database
+require_throwaway_database()
+for account in main.sender_pool.accounts:
+    if (account['smtp_server'], account['smtp_port']) != ("127.0.0.1", sink.smtp_port):
+        raise RuntimeError(f"Refusing to benchmark: {account['email']} sends via {account['smtp_server']}, not the local sink")
+service_extractor.extract_services = lambda body: "Web Design, SEO"  # keep the LLM out of the numbers
+
+
+def percentile(samples, p):
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+async def run_endpoint(client, label, path, make_payload, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async def one(i):
+        nonlocal failures
+        async with semaphore:
+            t0 = time.perf_counter()
+            response = await client.post(path, json=make_payload(i))
+            latencies.append((time.perf_counter() - t0) * 1000)
+            if response.status_code >= 400 or not response.json().get('success'):
+                failures += 1
+
+    received_before = len(sink.messages)
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    delivered = len(sink.messages) - received_before
+    print(f"{label:<28} {requests / elapsed:8.1f} req/s {delivered / elapsed:8.1f} msg/s  "
+          f"p50={percentile(latencies, 0.50):7.1f}ms p95={percentile(latencies, 0.95):7.1f}ms "
+          f"p99={percentile(latencies, 0.99):7.1f}ms  failed={failures}")
+
+
+async def run(requests, concurrency):
+    create_db_and_tables()
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for smtp_transport in ('thread', 'async'):
+            main.SMTP_TRANSPORT = smtp_transport
+            run_id = f"{smtp_transport}-{time.time_ns()}"
+            await run_endpoint(
+                client, f"/send [{smtp_transport}]", "/send",
+                lambda i: {"queue": False, "email_data": {
+                    "to_email": f"send-{run_id}-{i}@example.com", "subject": "Bench", "body": "<p>Hello</p>"
+                }},
+                requests, concurrency
+            )
+            await run_endpoint(
+                client, f"/send-lead [{smtp_transport}]", "/send-lead",
+                lambda i: {
+                    "queue": False,
+                    "company_name": f"Bench {i}",
+                    "primary_email": f"lead-{run_id}-{i}@example.com",
+                    "website_url": f"https://lead-{run_id}-{i}.example.com",
+                    "outreach": {"subject": "Outbound", "body": "<p>We build websites</p>"},
+                    "inbound": {"subject": "Inbound", "body": "<p>We need SEO</p>"}
+                },
+                requests, concurrency
+            )
+        await main.async_smtp_pool.close_all()
+
+    sent_archiver.flush(30)
+    print(f"\nSink totals: {len(sink.messages)} messages over {sink.smtp_connections} SMTP connections, "
+          f"{len(sink.appended)} Sent copies over {sink.imap_connections} IMAP connections")
+
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    print(f"Requests per endpoint: {requests} | concurrency: {concurrency} | sink delay: {sink.delay}s\n")
+    asyncio.run(run(requests, concurrency))
+    main.smtp_pool.close_all()
+    sink.stop_thread()
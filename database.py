@@ -2,15 +2,17 @@
 Database Models and Engine Setup for Cold Outreach CRM
 """
 import uuid
-from datetime import datetime
+from datetime import datetime, date
 from typing import Optional, List
 from sqlmodel import SQLModel, Field, Relationship, create_engine, Session, JSON
-from sqlalchemy import Column, String, Index, DateTime, select, func, Text
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy import Column, String, Index, DateTime, select, func, Text, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSONB
 import os
-from dotenv import load_dotenv
+from dotenv import load_dotenv, dotenv_values
 
-load_dotenv(override=True)
+load_dotenv() # Variables already set in the environment win, so scripts can point the app at their own database
 
 # Database URL from environment
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -25,11 +27,51 @@ engine = create_engine(
 )
 
 
+def async_database_url(url):
+    """
+    The async-driver form of DATABASE_URL: postgresql+asyncpg:// (sslmode becomes
+    asyncpg's ssl, libpq-only options are dropped) or sqlite+aiosqlite://.
+    """
+    from sqlalchemy.engine import make_url
+
+    parsed = make_url(url)
+    if parsed.get_backend_name() == 'sqlite':
+        return parsed.set(drivername='sqlite+aiosqlite')
+
+    query = dict(parsed.query)
+    if 'sslmode' in query:
+        query['ssl'] = query.pop('sslmode')
+    query.pop('channel_binding', None)
+    return parsed.set(drivername='postgresql+asyncpg', query=query)
+
+
+def async_engine_options(url):
+    if url.startswith('sqlite'):
+        return {}
+    options = {'pool_size': 5, 'max_overflow': 10}
+    if '-pooler' in url:
+        # Neon's pooled endpoint is PgBouncer in transaction mode: no server-side prepared statements
+        options['connect_args'] = {'statement_cache_size': 0, 'prepared_statement_cache_size': 0}
+    return options
+
+
+# Async engine for the FastAPI routes (same database; scripts keep using `engine`)
+async_engine = create_async_engine(
+    async_database_url(DATABASE_URL),
+    echo=False,
+    pool_pre_ping=True,
+    **async_engine_options(DATABASE_URL)
+)
+
+
 class User(SQLModel, table=True):
     """
     User model for authentication and role management
     """
     __tablename__ = "users"
+    __table_args__ = (
+        Index('ix_users_role_created', 'role', 'createdAt', 'id'), # /employees, /interns
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     email: str = Field(unique=True, index=True)
@@ -49,6 +91,9 @@ class Project(SQLModel, table=True):
     Dedicated model for managing client projects, team assignments, and progress.
     """
     __tablename__ = "projects"
+    __table_args__ = (
+        Index('ix_projects_created', 'createdAt', 'id'), # /projects pages
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(index=True)
@@ -56,11 +101,8 @@ class Project(SQLModel, table=True):
     status: str = Field(default="Planning") # Planning, Active, Completed, Hold
     progress: int = Field(default=0) # 0-100
     
-    # Team assignments stored as JSONB list of IDs for flexibility
-    # In a larger app, these would be junction tables
-    employeeIds: Optional[List[int]] = Field(default_factory=list, sa_column=Column(JSON))
-    internIds: Optional[List[int]] = Field(default_factory=list, sa_column=Column(JSON))
-    clientIds: Optional[List[int]] = Field(default_factory=list, sa_column=Column(JSON))
+    # Team and clients live in project_members / project_clients (the API still shows
+    # them as employeeIds, internIds and clientIds lists)
     
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     updatedAt: datetime = Field(default_factory=datetime.utcnow)
@@ -69,11 +111,44 @@ class Project(SQLModel, table=True):
     remarks: List["Remark"] = Relationship(back_populates="project")
 
 
+class ProjectMember(SQLModel, table=True):
+    """
+    Employee or intern assigned to a project
+    """
+    __tablename__ = "project_members"
+    __table_args__ = (
+        Index('ix_project_members_user', 'userId', 'projectId'),
+    )
+    
+    projectId: int = Field(foreign_key="projects.id", primary_key=True, ondelete="CASCADE")
+    userId: int = Field(foreign_key="users.id", primary_key=True, ondelete="CASCADE")
+    role: str = Field(primary_key=True, max_length=20) # Employee, Intern
+
+
+class ProjectClient(SQLModel, table=True):
+    """
+    Client profile attached to a project
+    """
+    __tablename__ = "project_clients"
+    __table_args__ = (
+        Index('ix_project_clients_client', 'clientId', 'projectId'),
+    )
+    
+    projectId: int = Field(foreign_key="projects.id", primary_key=True, ondelete="CASCADE")
+    clientId: int = Field(foreign_key="client_profiles.id", primary_key=True, ondelete="CASCADE")
+
+
 class ClientProfile(SQLModel, table=True):
     """
     Detailed profile for clients
     """
     __tablename__ = "client_profiles"
+    __table_args__ = (
+        Index('ix_client_profiles_status', 'status', 'id'), # /clients?status=, dashboard GROUP BY
+        Index('ix_client_profiles_user', 'userId'),
+        Index('ix_client_profiles_employee', 'assignedEmployeeId', 'id'),
+        Index('ix_client_profiles_project', 'projectId', 'id'),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     userId: Optional[int] = Field(default=None, foreign_key="users.id")
@@ -88,7 +163,7 @@ class ClientProfile(SQLModel, table=True):
     gmbName: Optional[str] = None
     seoStrategy: Optional[str] = None
     tagline: Optional[str] = None
-    targetKeywords: Optional[List[str]] = Field(default_factory=list, sa_column=Column(JSON))
+    targetKeywords: Optional[List[str]] = Field(default_factory=list, sa_column=Column(JSON)) # Copy of client_keywords, written by modules.client_keywords
     websiteUrl: Optional[str] = None
     recommended_services: Optional[str] = Field(default=None, max_length=1000)
     nextMilestone: Optional[str] = None
@@ -106,11 +181,29 @@ class ClientProfile(SQLModel, table=True):
     documents: List["Document"] = Relationship(back_populates="client")
 
 
+class ClientKeyword(SQLModel, table=True):
+    """
+    Target keyword of a client (source of truth for ClientProfile.targetKeywords)
+    """
+    __tablename__ = "client_keywords"
+    __table_args__ = (
+        Index('ix_client_keywords_keyword', 'keyword', 'clientId'), # "which clients target K"
+    )
+    
+    clientId: int = Field(foreign_key="client_profiles.id", primary_key=True, ondelete="CASCADE")
+    keyword: str = Field(primary_key=True, max_length=255)
+    position: int = Field(default=0) # Order the keyword was added in
+
+
 class Remark(SQLModel, table=True):
     """
     Internal or client-facing remarks/comments
     """
     __tablename__ = "remarks"
+    __table_args__ = (
+        Index('ix_remarks_client_created', 'clientId', 'createdAt', 'id'),
+        Index('ix_remarks_project_created', 'projectId', 'createdAt'),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     content: str = Field(sa_column=Column(Text))
@@ -134,8 +227,9 @@ class Document(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     filename: str
     fileUrl: str
-    ocrText: Optional[str] = Field(default=None, sa_column=Column(Text))
-    status: str = Field(default="Pending")
+    ocrText: Optional[str] = Field(default=None, sa_column=Column(Text)) # JSON-encoded OCR result
+    contentHash: Optional[str] = Field(default=None, max_length=64, unique=True, index=True) # SHA-256 of the image bytes (one row per image)
+    status: str = Field(default="Pending") # Pending, Done, Failed
     uploaderId: Optional[int] = Field(default=None, foreign_key="users.id")
     clientId: Optional[int] = Field(default=None, foreign_key="client_profiles.id")
     createdAt: datetime = Field(default_factory=datetime.utcnow)
@@ -149,6 +243,9 @@ class ActivityLog(SQLModel, table=True):
     Logs of user actions and manual client activities
     """
     __tablename__ = "activity_logs"
+    __table_args__ = (
+        Index('ix_activity_logs_client_created', 'clientId', 'createdAt', 'id'),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     userId: Optional[int] = Field(default=None, foreign_key="users.id")
@@ -169,6 +266,10 @@ class Company(SQLModel, table=True):
     Company model - stores prospect information
     """
     __tablename__ = "companies"
+    __table_args__ = (
+        Index('ix_companies_primary_email', 'primary_email'), # /send, /send-lead lookups
+        Index('ix_companies_created', 'created_at', 'id'), # /activities feed
+    )
     
     id: uuid.UUID = Field(
         default_factory=uuid.uuid4,
@@ -213,43 +314,188 @@ class EmailLog(SQLModel, table=True):
     company: Optional[Company] = Relationship(back_populates="email_logs")
 
 
-def create_db_and_tables():
+class OutboundEmail(SQLModel, table=True):
+    """
+    Durable outbound send queue - the dispatcher delivers these spread across the hourly limit
+    """
+    __tablename__ = "outbound_emails"
+    __table_args__ = (
+        Index('ix_outbound_emails_status_priority', 'status', 'priority', 'createdAt'),
+        Index('ix_outbound_emails_sender_sent_at', 'senderEmail', 'sentAt'),
+    )
+    
+    id: uuid.UUID = Field(
+        default_factory=uuid.uuid4,
+        primary_key=True
+    )
+    idempotencyKey: str = Field(
+        max_length=64,
+        sa_column=Column(String(64), unique=True, nullable=False)
+    )
+    toEmail: str = Field(max_length=255)
+    subject: str = Field(sa_column=Column(Text))
+    body: str = Field(sa_column=Column(Text))
+    html: bool = Field(default=True)
+    kind: str = Field(default="adhoc") # adhoc (/send), outbound, inbound (/send-lead)
+    priority: int = Field(default=0) # Higher goes first
+    status: str = Field(default="Queued") # Queued, Sending, Sent, Failed, Interrupted, Cancelled
+    senderEmail: Optional[str] = Field(default=None, max_length=255)
+    clientId: Optional[int] = Field(default=None, foreign_key="client_profiles.id")
+    attempts: int = Field(default=0)
+    lastError: Optional[str] = Field(default=None, sa_column=Column(Text))
+    notBefore: datetime = Field(default_factory=datetime.utcnow)
+    claimedAt: Optional[datetime] = None
+    sentAt: Optional[datetime] = None
+    createdAt: datetime = Field(default_factory=datetime.utcnow)
+
+
+class SendRateBucket(SQLModel, table=True):
+    """
+    Per-minute send counter for one sender - the sliding-window rate limiter sums the last 60
+    """
+    __tablename__ = "send_rate_buckets"
+    
+    senderEmail: str = Field(max_length=255, primary_key=True)
+    windowStart: datetime = Field(primary_key=True) # Minute the sends happened in
+    sent: int = Field(default=0)
+
+
+class GenerateJob(SQLModel, table=True):
+    """
+    Background /generate batch - one row per submitted list of URLs
+    """
+    __tablename__ = "generate_jobs"
+    
+    id: uuid.UUID = Field(
+        default_factory=uuid.uuid4,
+        primary_key=True
+    )
+    status: str = Field(default="Queued") # Queued, Running, Done
+    total: int = Field(default=0)
+    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    updatedAt: datetime = Field(default_factory=datetime.utcnow)
+    finishedAt: Optional[datetime] = None
+    
+    # Relationships
+    items: List["GenerateJobItem"] = Relationship(back_populates="job")
+
+
+class GenerateJobItem(SQLModel, table=True):
     """
-    Create all database tables (drops existing tables first to ensure schema matches)
+    One URL of a GenerateJob, with its result once processed
     """
-    # Create all tables if they don't exist
-    SQLModel.metadata.create_all(engine)
+    __tablename__ = "generate_job_items"
+    __table_args__ = (
+        Index('ix_generate_job_items_status_claimed', 'status', 'claimedAt'),
+    )
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    jobId: uuid.UUID = Field(foreign_key="generate_jobs.id", index=True)
+    url: str = Field(max_length=500)
+    position: int = Field(default=0)
+    status: str = Field(default="Pending") # Pending, Running, Done, Failed
+    attempts: int = Field(default=0)
+    result: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+    error: Optional[str] = Field(default=None, sa_column=Column(Text))
+    claimedAt: Optional[datetime] = None
+    finishedAt: Optional[datetime] = None
     
-    # Run migrations
-    from sqlalchemy import text
-    try:
-        with engine.connect() as conn:
-            conn.execute(text("ALTER TABLE client_profiles ADD COLUMN IF NOT EXISTS \"nextMilestone\" VARCHAR(255)"))
-            conn.execute(text("ALTER TABLE client_profiles ADD COLUMN IF NOT EXISTS \"nextMilestoneDate\" VARCHAR(255)"))
-            
-            # Service Tracking Migrations
-            conn.execute(text("ALTER TABLE client_profiles ADD COLUMN IF NOT EXISTS \"services_offered\" TEXT"))
-            conn.execute(text("ALTER TABLE client_profiles ADD COLUMN IF NOT EXISTS \"services_requested\" TEXT"))
-            conn.execute(text("ALTER TABLE client_profiles ADD COLUMN IF NOT EXISTS \"outbound_email_sent\" BOOLEAN DEFAULT FALSE"))
-            conn.execute(text("ALTER TABLE client_profiles ADD COLUMN IF NOT EXISTS \"inbound_email_sent\" BOOLEAN DEFAULT FALSE"))
-            
-            conn.commit()
-    except Exception as e:
-        print(f"Migration note: {e}")
+    # Relationships
+    job: Optional[GenerateJob] = Relationship(back_populates="items")
 
 
+class ClientMetricsDaily(SQLModel, table=True):
+    """
+    Per-client, per-day rollup of sent/failed emails and logged activities.
+    Incremented alongside the EmailLog/ActivityLog writes, so dashboards never count the logs.
+    """
+    __tablename__ = "client_metrics_daily"
+    
+    clientId: int = Field(foreign_key="client_profiles.id", primary_key=True)
+    day: date = Field(primary_key=True)
+    emailsSent: int = Field(default=0)
+    emailsFailed: int = Field(default=0)
+    activities: int = Field(default=0)
+    lastActivityAt: Optional[datetime] = None
 
 
+class SchemaVersion(SQLModel, table=True):
+    """
+    One row per applied schema migration (see modules/migrations.py)
+    """
+    __tablename__ = "schema_version"
+    
+    version: int = Field(primary_key=True, sa_column_kwargs={'autoincrement': False})
+    description: str = Field(max_length=255)
+    appliedAt: datetime = Field(default_factory=datetime.utcnow)
+
+
+class PipelineCheckpoint(SQLModel, table=True):
+    """
+    Saved output of one outreach pipeline stage for a prospect, so retries resume mid-pipeline
+    """
+    __tablename__ = "pipeline_checkpoints"
+    __table_args__ = (
+        UniqueConstraint('prospectKey', 'stage', name='uq_pipeline_checkpoints_prospect_stage'),
+    )
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    prospectKey: str = Field(max_length=500) # Normalized website URL
+    stage: str = Field(max_length=255) # scrape, analysis, market, services, email:<type>:<contact>
+    fingerprint: str = Field(max_length=64) # SHA-256 of the stage inputs
+    output: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+    updatedAt: datetime = Field(default_factory=datetime.utcnow)
+
+
+def create_db_and_tables():
+    """
+    Brings the schema up to date: applies any pending versioned migrations (modules/migrations.py)
+    """
+    from modules.migrations import migrate
+    return migrate(engine)
+
+
+def require_throwaway_database():
+    """
+    Raises RuntimeError unless `engine` is a database a check script created for itself:
+    one listed in THROWAWAY_DATABASE_URLS (space-separated) that is not the .env DATABASE_URL.
+    """
+    from sqlalchemy.engine import make_url
+
+    throwaway = {make_url(url) for url in os.getenv("THROWAWAY_DATABASE_URLS", "").split()}
+    app_url = dotenv_values().get("DATABASE_URL")
+    if engine.url not in throwaway or (app_url and engine.url == make_url(app_url)):
+        raise RuntimeError(f"Refusing to touch {engine.url!r}: it is not a throwaway check database")
+
+
+def reset_db_and_tables():
+    """
+    Drops every table and migrates from scratch. For the check scripts' throwaway
+    databases only (see require_throwaway_database): pytest builds one engine per run,
+    so checks collected together share the first one's database.
+    """
+    require_throwaway_database()
+    SQLModel.metadata.drop_all(engine)
+    return create_db_and_tables()
+
+
+async def get_session():
+    """
+    Dependency to get an async database session (queries are awaited, never block the event loop)
+    """
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
 
-def get_session():
+def get_sync_session():
     """
-    Dependency to get database session
+    Synchronous session for scripts and worker threads
     """
     with Session(engine) as session:
         yield session
 
 
 if __name__ == "__main__":
-    print("Creating database tables...")
+    print("Migrating database schema...")
     create_db_and_tables()
-    print("Database tables created successfully!")
+    print("Database schema is up to date!")
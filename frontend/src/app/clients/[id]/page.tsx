@@ -56,7 +56,7 @@ export default function ClientDetailPage() {
 
   const fetchEmployees = async () => {
     try {
-      const res = await fetch(`${API_BASE_URL}/employees`);
+      const res = await fetch(`${API_BASE_URL}/employees?limit=500`);
       const data = await res.json();
       setEmployees(data.employees || []);
     } catch (err) {
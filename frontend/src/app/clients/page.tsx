@@ -21,6 +21,9 @@ interface Client {
 
 export default function ClientsPage() {
   const [clients, setClients] = useState<Client[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [totals, setTotals] = useState({ total: 0, active: 0, hold: 0, pending: 0 });
   const [loading, setLoading] = useState(true);
   const [filter, setFilter] = useState('All');
   const [search, setSearch] = useState('');
@@ -39,26 +42,60 @@ export default function ClientsPage() {
 
   useEffect(() => {
     fetchClients();
+    fetchTotals();
   }, [filter]);
 
+  const clientsUrl = (cursor?: string | null) => {
+    const params = new URLSearchParams();
+    if (filter !== 'All') params.set('status', filter);
+    if (cursor) params.set('cursor', cursor);
+    const query = params.toString();
+    return query ? `${API_BASE_URL}/clients?${query}` : `${API_BASE_URL}/clients`;
+  };
+
   const fetchClients = async () => {
     setLoading(true);
     try {
-      const url = filter === 'All' 
-        ? `${API_BASE_URL}/clients`
-        : `${API_BASE_URL}/clients?status=${filter}`;
-      
-      const res = await fetch(url);
+      const res = await fetch(clientsUrl());
       const data = await res.json();
       setClients(data.clients || []);
+      setNextCursor(data.next_cursor || null);
     } catch (error) {
       console.error("Error fetching clients:", error);
       setClients([]);
+      setNextCursor(null);
     } finally {
       setLoading(false);
     }
   };
 
+  // Next page of the list (keyset cursor from the previous response)
+  const loadMoreClients = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const res = await fetch(clientsUrl(nextCursor));
+      const data = await res.json();
+      setClients(prev => [...prev, ...(data.clients || [])]);
+      setNextCursor(data.next_cursor || null);
+    } catch (error) {
+      console.error("Error loading more clients:", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // Counts come from the server: the list only holds the pages loaded so far
+  const fetchTotals = async () => {
+    try {
+      const res = await fetch(`${API_BASE_URL}/dashboard-stats?role=Admin&email=`);
+      const data = await res.json();
+      setTotals({ total: data.total || 0, active: data.active || 0, hold: data.hold || 0, pending: data.pending || 0 });
+    } catch (error) {
+      console.error("Error fetching client totals:", error);
+    }
+  };
+
   const handleAddClient = async (e: React.FormEvent) => {
     e.preventDefault();
     try {
@@ -75,6 +112,7 @@ export default function ClientsPage() {
       if (res.ok) {
         setIsModalOpen(false);
         fetchClients();
+        fetchTotals();
         setFormData({
           companyName: '',
           websiteUrl: '',
@@ -171,19 +209,19 @@ export default function ClientsPage() {
       <div className="grid grid-cols-1 md:grid-cols-4 gap-4">
         <div className="bg-white p-4 rounded-xl border shadow-sm">
           <p className="text-sm text-gray-500">Total Clients</p>
-          <p className="text-2xl font-bold">{clients.length}</p>
+          <p className="text-2xl font-bold">{totals.total}</p>
         </div>
         <div className="bg-white p-4 rounded-xl border shadow-sm border-l-4 border-l-green-500">
           <p className="text-sm text-gray-500">Active</p>
-          <p className="text-2xl font-bold">{clients.filter(c => c.status === 'Active').length}</p>
+          <p className="text-2xl font-bold">{totals.active}</p>
         </div>
         <div className="bg-white p-4 rounded-xl border shadow-sm border-l-4 border-l-orange-500">
           <p className="text-sm text-gray-500">On Hold</p>
-          <p className="text-2xl font-bold">{clients.filter(c => c.status === 'Hold').length}</p>
+          <p className="text-2xl font-bold">{totals.hold}</p>
         </div>
         <div className="bg-white p-4 rounded-xl border shadow-sm border-l-4 border-l-blue-500">
           <p className="text-sm text-gray-500">Pending</p>
-          <p className="text-2xl font-bold">{clients.filter(c => c.status === 'Pending').length}</p>
+          <p className="text-2xl font-bold">{totals.pending}</p>
         </div>
       </div>
 
@@ -264,6 +302,17 @@ export default function ClientsPage() {
             </tbody>
           </table>
         </div>
+        {!loading && nextCursor && (
+          <div className="p-4 border-t flex justify-center">
+            <button
+              onClick={loadMoreClients}
+              disabled={loadingMore}
+              className="px-6 py-2 border rounded-lg text-sm font-bold text-gray-600 hover:bg-gray-50 disabled:opacity-50"
+            >
+              {loadingMore ? 'Loading...' : 'Load more clients'}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
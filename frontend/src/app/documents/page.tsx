@@ -182,7 +182,8 @@ export default function DocumentsPage() {
           websiteUrl: formData.website || '',
           email: formData.email,
           projectName: `OCR Lead - ${formData.name}`,
-          tagline: `Extracted from business card for ${formData.name}`
+          tagline: `Extracted from business card for ${formData.name}`,
+          documentId: result?.documentId
         }),
       });
 
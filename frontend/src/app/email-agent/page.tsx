@@ -111,7 +111,9 @@ export default function EmailAgentPage() {
       if (res.data.success) {
         setSuccess(isManual ?
           `Lead recorded! ${res.data.outbound_sent ? 'Outbound' : ''} ${res.data.inbound_sent ? 'Inbound' : ''}` :
-          `Emails sent successfully to ${draft.company_name}!`
+          res.data.queued ?
+            `Emails queued for ${draft.company_name} (estimated send: ${new Date(res.data.queued.outbound.estimated_send_at).toLocaleTimeString()})` :
+            `Emails sent successfully to ${draft.company_name}!`
         );
         setDraft(null);
         setFormData({ company_name: '', website_url: '', primary_email: '' });
@@ -19,7 +19,7 @@ export default function EmployeesPage() {
 
   const fetchEmployees = async () => {
     try {
-      const res = await fetch(`${API_BASE_URL}/employees`);
+      const res = await fetch(`${API_BASE_URL}/employees?limit=500`);
       const data = await res.json();
       setEmployees(data.employees || []);
     } catch (error) {
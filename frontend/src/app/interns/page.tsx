@@ -18,7 +18,7 @@ export default function InternsPage() {
 
   const fetchInterns = async () => {
     try {
-      const res = await fetch(`${API_BASE_URL}/interns`);
+      const res = await fetch(`${API_BASE_URL}/interns?limit=500`);
       const data = await res.json();
       setInterns(data.interns || []);
     } catch (error) {
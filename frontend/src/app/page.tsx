@@ -146,7 +146,7 @@ export default function Dashboard() {
                 <MetricCard title="Total Prospects" value={stats?.total || 0} subValue="+12.5% vs LW" icon={Users} color="bg-blue-50 text-blue-600" />
                 <MetricCard title="Active Campaigns" value={stats?.active || 0} subValue="Running Now" icon={Zap} color="bg-orange-50 text-orange-600" />
                 <MetricCard title="Drafts Ready" value={stats?.pending || 0} subValue="Awaiting Review" icon={Clock} color="bg-indigo-50 text-indigo-600" />
-                <MetricCard title="Total Sent" value={stats?.completedActivities || 523} subValue="+5% Growth" icon={Send} color="bg-green-50 text-green-600" />
+                <MetricCard title="Total Sent" value={stats?.completedActivities || 0} subValue="+5% Growth" icon={Send} color="bg-green-50 text-green-600" />
                </>
              ) : (
                <>
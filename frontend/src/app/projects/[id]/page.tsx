@@ -37,8 +37,8 @@ export default function ProjectDetailPage() {
       
       // Fetch users for assignment
       const [empRes, intRes] = await Promise.all([
-        fetch(`${API_BASE_URL}/employees`),
-        fetch(`${API_BASE_URL}/interns`)
+        fetch(`${API_BASE_URL}/employees?limit=500`),
+        fetch(`${API_BASE_URL}/interns?limit=500`)
       ]);
       const empData = await empRes.json();
       const intData = await intRes.json();
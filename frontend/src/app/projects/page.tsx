@@ -21,7 +21,7 @@ export default function ProjectsPage() {
 
   const fetchProjects = async () => {
     try {
-      const res = await fetch(`${API_BASE_URL}/projects`);
+      const res = await fetch(`${API_BASE_URL}/projects?limit=500`);
       const data = await res.json();
       setProjects(data.projects || []);
     } catch (error) {
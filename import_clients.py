@@ -1,5 +1,6 @@
 from database import engine, User, ClientProfile
 from sqlmodel import Session, select
+from modules.client_keywords import clean_keywords, set_client_keywords
 
 clients_data = [
     {
@@ -326,6 +327,8 @@ def import_clients():
     
     for idx, client_data in enumerate(clients_data, 1):
         try:
+            keywords = clean_keywords(client_data.get("targetKeywords", [])) # A too-long keyword skips the client before anything is written
+
             # Check if user exists, create if not
             email = client_data.get("email", "")
             if not email:
@@ -353,10 +356,11 @@ def import_clients():
                 projectName=client_data.get("projectName", ""),
                 gmbName=client_data.get("gmbName", ""),
                 seoStrategy=client_data.get("seoStrategy", ""),
-                targetKeywords=client_data.get("targetKeywords", []),
                 status="Active"
             )
             session.add(profile)
+            session.flush()
+            set_client_keywords(session, profile.id, keywords)
             session.commit()
             
             print(f"DONE {idx}. {client_data['companyName']}")
@@ -7,26 +7,31 @@ if sys.platform == 'win32':
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
 import os
+import json
 import uuid
 import warnings
 
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Optional, List, Dict, Any
 from contextlib import asynccontextmanager
 import traceback
 
 from fastapi import FastAPI, Request, Form, Depends, HTTPException, BackgroundTasks, Body, File, UploadFile
 from pydantic import BaseModel
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.concurrency import run_in_threadpool
-from sqlmodel import Session, select, func, text
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import update as sql_update
+from sqlalchemy.orm import selectinload
 from dotenv import load_dotenv
 
 # Database & Models
 from database import (
     engine, 
+    async_engine,
     Company, 
     EmailLog,
     User,
@@ -35,31 +40,96 @@ from database import (
     Remark,
     Document,
     ActivityLog,
-    create_db_and_tables, 
+    GenerateJob,
+    GenerateJobItem,
+    OutboundEmail,
     get_session
 )
 
 # AI & Scraping Modules
-from modules.scraper import scrape_website
 from modules.llm_engine import analyze_content, generate_email, analyze_document
 from modules.market_analyzer import analyze_market, match_services
 from modules.serp_hawk_email import generate_serp_hawk_email
 from modules.fallback_analyzer import analyze_company_name_fallback
 from modules.image_generator import generate_email_image
-from modules.email_sender import send_email_outlook
-
-# Load environment variables
-load_dotenv(override=True)
+from modules.email_sender import send_email_outlook, send_email_async, smtp_pool, async_smtp_pool, sent_archiver
+from modules.job_queue import GenerateJobQueue
+from modules.pipeline_checkpoints import StageCheckpointer
+from modules.rate_limiter import SendRateLimiter
+from modules.sender_pool import SenderPool, load_sender_accounts
+from modules.deliverability import DeliverabilityChecker
+from modules import crm_queries
+from modules.client_keywords import clean_keywords, InvalidKeywordError, add_client_keywords, remove_client_keywords, set_client_keywords
+from modules.project_members import MEMBERSHIP_FIELDS, UnknownMemberError, set_project_membership, remove_user_memberships
+from modules.dashboard_stats import StatsCache, record_client_metrics, overview, client_metrics
+from modules.entity_cache import EntityCache, make_backend
+from modules.migrations import migrate, current_version, LATEST_VERSION
+from modules.search import KINDS as SEARCH_KINDS, SearchUnavailableError, search_records
+from modules.send_queue import SendQueueDispatcher
+from modules.prospect_import import iter_prospects, domain_key, url_variants, UNREADABLE_FILE_ERRORS
+from modules.document_ocr import expand_upload, ocr_image, ocr_images, get_document_by_hash, document_result
+
+# Load environment variables (ones already set in the environment win)
+load_dotenv()
 
 # Configuration
 SENDER_EMAIL = os.getenv("SENDER_EMAIL", "padilla@dapros.com") # Default sender for UI
 HOURLY_EMAIL_LIMIT = int(os.getenv("HOURLY_EMAIL_LIMIT", 50))
+DAILY_EMAIL_LIMIT = int(os.getenv("DAILY_EMAIL_LIMIT", 0)) or None # Optional per-account daily cap (0 = none)
 OUTLOOK_EMAIL = os.getenv('OUTLOOK_EMAIL')
 OUTLOOK_PASSWORD = os.getenv('OUTLOOK_PASSWORD')
 SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
 
 SMTP_PORT = int(os.getenv('SMTP_PORT', '587'))
 IMAP_SERVER = os.getenv('IMAP_SERVER') # Optional: For saving to Sent folder if auto-detect fails
+IMAP_PORT = int(os.getenv('IMAP_PORT', '993'))
+SMTP_TRANSPORT = os.getenv('SMTP_TRANSPORT', 'thread').lower() # 'thread' (smtplib in a worker thread) or 'async' (aiosmtplib)
+MX_CHECK_ENABLED = os.getenv('MX_CHECK_ENABLED', 'true').lower() == 'true' # DNS MX lookup before sending (syntax is always checked)
+MX_CACHE_TTL_SECONDS = int(os.getenv('MX_CACHE_TTL_SECONDS', 3600))
+SEND_QUEUE_ENABLED = os.getenv('SEND_QUEUE_ENABLED', 'true').lower() == 'true' # /send and /send-lead queue by default
+OCR_BATCH_CONCURRENCY = int(os.getenv('OCR_BATCH_CONCURRENCY', 4)) # Parallel vision calls per batch upload
+GENERATE_WORKERS = int(os.getenv('GENERATE_WORKERS', 3)) # Background /generate URLs processed at once
+GENERATE_CONCURRENCY = int(os.getenv('GENERATE_CONCURRENCY', 4)) # Max parallel URLs for streamed /generate
+IMPORT_DRAFT_CONCURRENCY = int(os.getenv('IMPORT_DRAFT_CONCURRENCY', 4)) # Max parallel drafts for /prospects/import
+PIPELINE_CHECKPOINT_MAX_AGE_HOURS = int(os.getenv('PIPELINE_CHECKPOINT_MAX_AGE_HOURS', 72)) # Reuse stage outputs this long
+LIST_PAGE_SIZE = int(os.getenv('LIST_PAGE_SIZE', 50)) # Default page size of the list endpoints
+LIST_MAX_PAGE_SIZE = int(os.getenv('LIST_MAX_PAGE_SIZE', 500)) # Largest ?limit= a list endpoint accepts
+KEYWORD_LOOKUP_MAX = int(os.getenv('KEYWORD_LOOKUP_MAX', 200)) # Most keywords one /clients/keywords/lookup takes
+DASHBOARD_CACHE_TTL_SECONDS = int(os.getenv('DASHBOARD_CACHE_TTL_SECONDS', 30)) # Admin dashboard counts are reused this long
+ENTITY_CACHE_TTL_SECONDS = int(os.getenv('ENTITY_CACHE_TTL_SECONDS', 60)) # Users-by-role, client and project detail reads (0 = off)
+ENTITY_CACHE_MAX_ENTRIES = int(os.getenv('ENTITY_CACHE_MAX_ENTRIES', 2000)) # In-process cache size bound (LRU)
+ENTITY_CACHE_REDIS_URL = os.getenv('ENTITY_CACHE_REDIS_URL', '') # Optional: share the entity cache between workers
+MIGRATE_ON_STARTUP = os.getenv('MIGRATE_ON_STARTUP', 'true').lower() == 'true' # Set false when `python migrate.py` runs at deploy
+
+# Sliding-window send limiter shared by all workers (per-minute counters in send_rate_buckets)
+rate_limiter = SendRateLimiter(engine)
+
+# Mailboxes outreach is sent from: SENDER_ACCOUNTS / SENDER_ACCOUNTS_FILE, or just OUTLOOK_EMAIL
+sender_pool = SenderPool(load_sender_accounts({
+    'email': OUTLOOK_EMAIL,
+    'password': OUTLOOK_PASSWORD,
+    'smtp_server': SMTP_SERVER,
+    'smtp_port': SMTP_PORT,
+    'imap_server': IMAP_SERVER,
+    'imap_port': IMAP_PORT,
+    'hourly_limit': HOURLY_EMAIL_LIMIT,
+    'daily_limit': DAILY_EMAIL_LIMIT
+}), rate_limiter)
+
+# Recipient pre-check (syntax + cached MX lookup) so bad addresses never take a send slot
+deliverability = DeliverabilityChecker(
+    resolver=None if MX_CHECK_ENABLED else (lambda domain: [domain]),
+    ttl_seconds=MX_CACHE_TTL_SECONDS
+)
+
+# Admin dashboard aggregates (dropped whenever a client is created or updated)
+dashboard_cache = StatsCache(ttl_seconds=DASHBOARD_CACHE_TTL_SECONDS)
+
+# Hot entity reads (staff lists, client and project detail), invalidated by the routes that change them
+entity_cache = EntityCache(
+    ttl_seconds=ENTITY_CACHE_TTL_SECONDS,
+    backend=make_backend(ENTITY_CACHE_REDIS_URL, ENTITY_CACHE_MAX_ENTRIES)
+)
 
 # Create output directories
 os.makedirs('static/generated_images', exist_ok=True)
@@ -95,7 +165,7 @@ def sync_scrape_website_wrapper(url):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
-    Application lifespan - creates tables on startup
+    Application lifespan - checks the schema version and starts the background workers
     """
     print("Starting Cold Outreach CRM...")
     
@@ -108,34 +178,41 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"DEBUG: Could not check loop type: {e}")
 
-    print("Creating database tables...")
-    create_db_and_tables()
-    
-    # Simple migrations for client_profiles and companies
-    try:
-        with engine.connect() as conn:
-            # Companies migration
-            conn.execute(text("ALTER TABLE companies ADD COLUMN IF NOT EXISTS recommended_services VARCHAR(1000)"))
-            
-            # ClientProfile migrations
-            conn.execute(text("ALTER TABLE client_profiles ADD COLUMN IF NOT EXISTS \"nextMilestone\" VARCHAR(255)"))
-            conn.execute(text("ALTER TABLE client_profiles ADD COLUMN IF NOT EXISTS \"nextMilestoneDate\" VARCHAR(255)"))
-            conn.execute(text("ALTER TABLE client_profiles ADD COLUMN IF NOT EXISTS recommended_services VARCHAR(1000)"))
-            conn.execute(text("ALTER TABLE client_profiles ADD COLUMN IF NOT EXISTS \"projectId\" INTEGER"))
-            conn.execute(text("ALTER TABLE remarks ADD COLUMN IF NOT EXISTS \"projectId\" INTEGER"))
-            
-            conn.commit()
-            print("Database schema updated (milestones, recommended_services, projects)")
-    except Exception as e:
-        print(f"Schema update note: {e}")
+    # Schema: one version query; pending migrations normally run at deploy (python migrate.py)
+    schema_version = current_version(engine)
+    if schema_version < LATEST_VERSION:
+        if MIGRATE_ON_STARTUP:
+            print(f"Schema version {schema_version} < {LATEST_VERSION}, migrating...")
+            migrate(engine)
+        else:
+            print(f"⚠️ Schema version {schema_version} is behind {LATEST_VERSION}: run `python migrate.py`")
 
+    if sender_pool:
+        sender_pool.backfill_from_logs()
+    else:
+        rate_limiter.backfill_from_logs(SENDER_EMAIL)
     print("Database ready!")
     
+    # Background /generate jobs (resumes anything left unfinished by a previous run)
+    await generate_queue.start()
+    
+    # Outbound send queue dispatcher
+    if sender_pool:
+        await send_queue.start()
+    else:
+        print("Send queue dispatcher not started: email credentials not configured")
+    
     # Try to install playwright browsers if needed (optional check)
     # print("Checking Playwright browsers...")
     # os.system("playwright install chromium") 
     
     yield
+    await generate_queue.stop()
+    await send_queue.stop()
+    smtp_pool.close_all()
+    await async_smtp_pool.close_all()
+    await asyncio.to_thread(sent_archiver.flush, 10) # Let pending Sent-folder copies finish
+    await async_engine.dispose()
     print("Shutting down Cold Outreach CRM...")
 
 
@@ -194,6 +271,11 @@ class ClientCreate(BaseModel):
     tagline: Optional[str] = None
     targetKeywords: Optional[List[str]] = None
     recommended_services: Optional[str] = None
+    documentId: Optional[int] = None # Business card the client was created from
+
+class KeywordLookup(BaseModel):
+    keywords: List[str]
+    limit: Optional[int] = 100 # Clients listed per keyword
 
 class ActivityAdd(BaseModel):
     method: str
@@ -258,7 +340,17 @@ class UserUpdate(BaseModel):
 # BUSINESS LOGIC - The "Gatekeeper" Middleware
 # ============================================================================
 
-def check_outreach_eligibility(session: Session, website_url: str) -> dict:
+def normalize_website_url(website_url: str) -> str:
+    """
+    Normalize a website URL for comparison and storage (lowercase, https:// by default).
+    """
+    normalized_url = website_url.strip().lower()
+    if not normalized_url.startswith(('http://', 'https://')):
+        normalized_url = 'https://' + normalized_url
+    return normalized_url
+
+
+async def check_outreach_eligibility(session: AsyncSession, website_url: str) -> dict:
     """
     Gatekeeper function that checks if we can send an outreach email.
     """
@@ -269,13 +361,11 @@ def check_outreach_eligibility(session: Session, website_url: str) -> dict:
     }
     
     # Normalize URL for comparison
-    normalized_url = website_url.strip().lower()
-    if not normalized_url.startswith(('http://', 'https://')):
-        normalized_url = 'https://' + normalized_url
+    normalized_url = normalize_website_url(website_url)
     
     # Rule A: Duplicate Check
     statement = select(Company).where(Company.website_url == normalized_url)
-    existing_company = session.exec(statement).first()
+    existing_company = (await session.exec(statement)).first()
     
     if existing_company:
         result["existing_company"] = existing_company
@@ -286,18 +376,13 @@ def check_outreach_eligibility(session: Session, website_url: str) -> dict:
             )
     
     # Rule B: Rate Limiter
-    one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-    
-    rate_limit_statement = select(func.count(EmailLog.id)).where(
-        EmailLog.sender_email == SENDER_EMAIL,
-        EmailLog.sent_at > one_hour_ago
-    )
-    emails_sent_count = session.exec(rate_limit_statement).one()
+    capacity = await run_in_threadpool(send_capacity)
+    emails_sent_count = capacity['sent_last_hour']
     result["emails_sent_last_hour"] = emails_sent_count
     
-    if emails_sent_count >= HOURLY_EMAIL_LIMIT:
+    if capacity['remaining'] <= 0:
         raise RateLimitExceededError(
-            f"⏳ Hourly email limit ({HOURLY_EMAIL_LIMIT}) reached. "
+            f"⏳ Hourly email limit ({capacity['hourly_limit']}) reached. "
             f"You've sent {emails_sent_count} emails in the last hour. "
             f"Please wait before sending more."
         )
@@ -305,6 +390,252 @@ def check_outreach_eligibility(session: Session, website_url: str) -> dict:
     return result
 
 
+async def find_contacted_domains(session: AsyncSession, domains) -> dict:
+    """
+    Set-based duplicate check for many prospects at once.
+    Returns {domain: Company} for every domain we have already emailed.
+    """
+    contacted = {}
+    domains = list(domains)
+    # One query per 2,000 domains keeps the bind-parameter count under driver limits
+    for i in range(0, len(domains), 2000):
+        variants = [v for domain in domains[i:i + 2000] for v in url_variants(domain)]
+        statement = select(Company).where(
+            Company.website_url.in_(variants),
+            Company.email_sent_status == True
+        )
+        for company in (await session.exec(statement)).all():
+            contacted[domain_key(company.website_url)] = company
+    return contacted
+
+
+def send_capacity() -> dict:
+    """
+    Hourly send capacity summed over every sender account (from the rate limiter's
+    per-minute counters). Falls back to SENDER_EMAIL's limit when no account is configured.
+    """
+    if not sender_pool:
+        sent_count = rate_limiter.sent_in_window(SENDER_EMAIL)
+        return {'hourly_limit': HOURLY_EMAIL_LIMIT, 'sent_last_hour': sent_count, 'remaining': max(0, HOURLY_EMAIL_LIMIT - sent_count)}
+    usage = sender_pool.usage()
+    return {
+        'hourly_limit': sender_pool.hourly_limit,
+        'sent_last_hour': sum(entry['sent_last_hour'] for entry in usage),
+        'remaining': sum(entry['remaining'] for entry in usage)
+    }
+
+
+async def check_bulk_outreach_eligibility(session: AsyncSession, website_urls: List[str]) -> dict:
+    """
+    Gatekeeper for a whole prospect list at once.
+    Duplicates are resolved with one set-based lookup and send capacity is computed once,
+    so the number of queries does not grow with the list.
+    Each URL gets a verdict: eligible, duplicate (with the date we contacted it),
+    duplicate_in_list, rate_limited or invalid.
+    """
+    capacity = await run_in_threadpool(send_capacity)
+    remaining = capacity['remaining']
+
+    domains = [domain_key(url) if url else '' for url in website_urls]
+    contacted = await find_contacted_domains(session, {d for d in domains if d})
+
+    results = []
+    seen = set()
+    for url, domain in zip(website_urls, domains):
+        verdict = {'url': url, 'normalized_url': normalize_website_url(url) if domain else None, 'verdict': 'eligible'}
+        company = contacted.get(domain)
+        if not domain:
+            verdict['verdict'] = 'invalid'
+        elif company:
+            verdict.update(
+                verdict='duplicate',
+                company_name=company.company_name,
+                contacted_at=company.created_at.isoformat()
+            )
+        elif domain in seen:
+            verdict['verdict'] = 'duplicate_in_list'
+        elif remaining <= 0:
+            verdict['verdict'] = 'rate_limited'
+        else:
+            remaining -= 1
+        seen.add(domain)
+        results.append(verdict)
+
+    summary = {}
+    for verdict in results:
+        summary[verdict['verdict']] = summary.get(verdict['verdict'], 0) + 1
+
+    return {
+        'capacity': capacity,
+        'summary': summary,
+        'results': results
+    }
+
+
+async def run_bounded(items, worker, concurrency: int):
+    """
+    Run `worker(item)` for every item, at most `concurrency` at a time,
+    yielding results in completion order. Unfinished work is cancelled if the consumer stops early.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(item):
+        async with semaphore:
+            return await worker(item)
+
+    tasks = [asyncio.create_task(run(item)) for item in items]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def record_sent_email(session: Session, to_email: str, kind: str = "adhoc", client_id: Optional[int] = None,
+                      sender_email: Optional[str] = None):
+    """
+    Bookkeeping after an email actually went out: mark the Company contacted (by
+    `sender_email`), write the EmailLog row, flag the client profile and count the
+    send in the client's metrics rollup. Does not commit.
+    """
+    sender_email = sender_email or SENDER_EMAIL
+    # Try to find company by email
+    company = session.exec(select(Company).where(Company.primary_email == to_email)).first()
+    
+    if not company:
+        # Create a shell company entry for logging purposes
+        company = Company(
+            company_name="AI Outreach Contact",
+            website_url=f"ai-generated-{uuid.uuid4()}@example.com", # Placeholder
+            primary_email=to_email,
+            email_sender=sender_email,
+            email_sent_status=kind != "inbound"
+        )
+        session.add(company)
+        session.flush()
+    elif kind != "inbound":
+        company.email_sent_status = True
+        company.email_sender = sender_email
+        session.add(company)
+
+    session.add(EmailLog(
+        company_id=company.id,
+        sender_email=sender_email,
+        sent_at=datetime.utcnow()
+    ))
+
+    if client_id:
+        profile = session.get(ClientProfile, client_id)
+        if profile:
+            if kind == "inbound":
+                profile.inbound_email_sent = True
+            else:
+                profile.outbound_email_sent = True
+            session.add(profile)
+    else:
+        # Ad-hoc sends to a client's login address still count for that client
+        client_id = session.exec(
+            select(ClientProfile.id).join(User, User.id == ClientProfile.userId).where(User.email == to_email)
+        ).first()
+    record_client_metrics(session, client_id, sent=1)
+
+
+def undeliverable_response(verdict: dict) -> JSONResponse:
+    """422 for a recipient that failed the deliverability pre-check"""
+    return JSONResponse({
+        'success': False,
+        'error': f"Recipient {verdict['email'] or '(empty)'} is not deliverable ({verdict['reason']})",
+        'deliverability': verdict
+    }, status_code=422)
+
+
+def request_priority(data: dict) -> int:
+    """data['priority'] as an int (default 0); anything non-integer is a 400"""
+    priority = data.get('priority') or 0
+    if isinstance(priority, str) and priority.strip().lstrip('-').isdigit():
+        priority = int(priority)
+    if not isinstance(priority, int) or isinstance(priority, bool):
+        raise HTTPException(status_code=400, detail="'priority' must be an integer")
+    return priority
+
+
+def sender_credentials(account: dict) -> dict:
+    """send_email_outlook/send_email_async keyword arguments for a sender account"""
+    return {
+        'sender_email': account['email'],
+        'sender_password': account['password'],
+        'smtp_server': account.get('smtp_server') or SMTP_SERVER,
+        'smtp_port': account.get('smtp_port') or SMTP_PORT,
+        'imap_server': account.get('imap_server'),
+        'imap_port': account.get('imap_port') or IMAP_PORT
+    }
+
+
+def send_queued_email(message: OutboundEmail, account: dict):
+    """Deliver one queued message from the sender account the dispatcher picked"""
+    send_email_outlook(
+        to_email=message.toEmail,
+        subject=message.subject,
+        body=message.body,
+        html=message.html,
+        message_id=f"<{message.id}@crm.serphawk>",
+        **sender_credentials(account)
+    )
+
+
+# Durable outbound send queue (dispatcher started in lifespan when sender accounts are configured)
+send_queue = SendQueueDispatcher(
+    engine,
+    send_queued_email,
+    sender_pool,
+    on_sent=lambda session, message: record_sent_email(
+        session, message.toEmail, message.kind, message.clientId, message.senderEmail
+    ),
+    on_failed=lambda session, message: record_client_metrics(session, message.clientId, failed=1)
+)
+
+
+def serialize_outbound_email(session: Session, message: OutboundEmail, position: Optional[int] = None) -> dict:
+    """Status record for a queued message (pass `position` to skip the queue-position query)"""
+    if position is None:
+        position = send_queue.queue_position(session, message)
+    estimated = send_queue.estimated_send_at(session, message, position)
+    return {
+        'message_id': str(message.id),
+        'to_email': message.toEmail,
+        'kind': message.kind,
+        'priority': message.priority,
+        'status': message.status,
+        'sender_email': message.senderEmail,
+        'attempts': message.attempts,
+        'error': message.lastError,
+        'queue_position': position,
+        'estimated_send_at': estimated.isoformat() if estimated else None,
+        'sent_at': message.sentAt.isoformat() if message.sentAt else None,
+        'status_url': f'/send-queue/{message.id}'
+    }
+
+
+async def fetch_page(query, session: AsyncSession, limit: int, **filters):
+    """
+    Runs a crm_queries list query with ?limit= clamped to LIST_MAX_PAGE_SIZE.
+    Returns (rows, next_cursor); a cursor we did not issue is a 400.
+    """
+    try:
+        return await query(session, limit=max(1, min(limit, LIST_MAX_PAGE_SIZE)), **filters)
+    except crm_queries.InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def request_keywords(keywords) -> List[str]:
+    """clean_keywords() for request input; a keyword too long for client_keywords is a 400"""
+    try:
+        return clean_keywords(keywords)
+    except InvalidKeywordError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # ============================================================================
 # ROUTES - API
 # ============================================================================
@@ -328,10 +659,10 @@ async def root():
 # ============================================================================
 
 @app.post("/login")
-async def login(data: LoginRequest, session: Session = Depends(get_session)):
+async def login(data: LoginRequest, session: AsyncSession = Depends(get_session)):
     """Simple database login for CRM"""
     statement = select(User).where(User.email == data.email)
-    user = session.exec(statement).first()
+    user = (await session.exec(statement)).first()
     
     if user and user.password == data.password:
         return {
@@ -346,84 +677,91 @@ async def login(data: LoginRequest, session: Session = Depends(get_session)):
     else:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
+async def build_lead_draft(company_name: str, normalized_url: str, primary_email: str) -> dict:
+    """
+    Scrape, analyze and draft the outreach email for one prospect (no eligibility check, no sending)
+    """
+    print(f"🧐 Analyzing {normalized_url} for personalization...")
+    
+    # Scrape & Analyze (each stage reuses its checkpoint from earlier drafts/generate runs)
+    checkpoints = StageCheckpointer(engine, normalized_url, PIPELINE_CHECKPOINT_MAX_AGE_HOURS)
+    scraped_text = await checkpoints.run('scrape', normalized_url, sync_scrape_website_wrapper, normalized_url)
+    
+    subject = f"Partnership Opportunity with {company_name}"
+    body_html = f"<p>Hi {company_name} Team,</p><p>We'd love to partner.</p>" 
+    
+    if scraped_text and not scraped_text.startswith("ERROR SCRAPING"):
+        company_info = await checkpoints.run('analysis', scraped_text, analyze_content, scraped_text)
+        market_analysis = await checkpoints.run('market', [scraped_text, company_name], analyze_market, scraped_text, company_name)
+        service_matches = await checkpoints.run('services', [market_analysis, company_info], match_services, market_analysis, company_info)
+    else:
+        print(f"⚠️ Scraping failed/empty: {scraped_text[:100] if scraped_text else 'None'}. Generating intelligent fallback draft.")
+        # Enhanced fallback: Use AI to analyze company name for industry hints
+        company_info = await checkpoints.run('fallback_analysis', company_name, analyze_company_name_fallback, company_name)
+        market_analysis = {
+            'industry': company_info.get('likely_industry', 'Unknown'), 
+            'sub_category': company_info.get('sub_category', ''),
+            'business_model': company_info.get('business_model', 'B2B'),
+            'pain_points': company_info.get('common_pain_points', ['Lead Generation', 'Online Visibility']), 
+            'growth_potential': 'High',
+            'online_presence': {'seo_status': 'Needs improvement'}
+        }
+        service_matches = {
+            'recommended_services': [
+                {'service_name': 'Organic SEO', 'why_relevant': 'Improve online visibility and search rankings', 'expected_impact': 'More qualified leads from search'},
+                {'service_name': 'Local SEO', 'why_relevant': 'Dominate local search results', 'expected_impact': 'Increased local customer acquisition'}
+            ], 
+            'email_hook': f'Growth opportunities for {company_info.get("likely_industry", "your business")}',
+            'package_suggestion': 'Growth'
+        }
+
+    contact = {'name': company_name, 'email': primary_email, 'role': 'Decision Maker'}
+    email_draft = await draft_email_with_checkpoint(
+        checkpoints, company_info, market_analysis, service_matches, contact, "outreach"
+    )
+    
+    if email_draft:
+        subject = email_draft.get('subject', subject)
+        body_html = email_draft.get('body_html', body_html)
+
+    # Get services string
+    services = service_matches.get('recommended_services', [])
+    service_names = [s.get('service_name') for s in services]
+    recommended_services_str = ", ".join(service_names) if service_names else None
+
+    return {
+        'subject': subject,
+        'body': body_html,
+        'company_name': company_name,
+        'website_url': normalized_url,
+        'primary_email': primary_email,
+        'recommended_services': recommended_services_str
+    }
+
+
 @app.post("/draft-lead")
 async def draft_lead(
     company_name: str = Form(...),
     website_url: str = Form(...),
     primary_email: str = Form(...),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """
     Step 1: Check eligibility, analyze URL, and return Draft (NO SENDING)
     """
     try:
         # Normalize URL
-        normalized_url = website_url.strip().lower()
-        if not normalized_url.startswith(('http://', 'https://')):
-            normalized_url = 'https://' + normalized_url
+        normalized_url = normalize_website_url(website_url)
         
         # Check eligibility (just for info, but don't block drafting yet? Or do block?)
         # Let's BLOCK if already sent, to warn user.
-        eligibility = check_outreach_eligibility(session, normalized_url)
-        
-        print(f"🧐 Analyzing {normalized_url} for personalization...")
-        
-        # Scrape & Analyze
-        scraped_text = await run_in_threadpool(scrape_website, normalized_url)
-        
-        subject = f"Partnership Opportunity with {company_name}"
-        body_html = f"<p>Hi {company_name} Team,</p><p>We'd love to partner.</p>" 
-        
-        if scraped_text and not scraped_text.startswith("ERROR SCRAPING"):
-            company_info = await run_in_threadpool(analyze_content, scraped_text)
-            market_analysis = await run_in_threadpool(analyze_market, scraped_text, company_name)
-            service_matches = await run_in_threadpool(match_services, market_analysis, company_info)
-        else:
-            print(f"⚠️ Scraping failed/empty: {scraped_text[:100] if scraped_text else 'None'}. Generating intelligent fallback draft.")
-            # Enhanced fallback: Use AI to analyze company name for industry hints
-            company_info = await run_in_threadpool(analyze_company_name_fallback, company_name)
-            market_analysis = {
-                'industry': company_info.get('likely_industry', 'Unknown'), 
-                'sub_category': company_info.get('sub_category', ''),
-                'business_model': company_info.get('business_model', 'B2B'),
-                'pain_points': company_info.get('common_pain_points', ['Lead Generation', 'Online Visibility']), 
-                'growth_potential': 'High',
-                'online_presence': {'seo_status': 'Needs improvement'}
-            }
-            service_matches = {
-                'recommended_services': [
-                    {'service_name': 'Organic SEO', 'why_relevant': 'Improve online visibility and search rankings', 'expected_impact': 'More qualified leads from search'},
-                    {'service_name': 'Local SEO', 'why_relevant': 'Dominate local search results', 'expected_impact': 'Increased local customer acquisition'}
-                ], 
-                'email_hook': f'Growth opportunities for {company_info.get("likely_industry", "your business")}',
-                'package_suggestion': 'Growth'
-            }
-
-        contact = {'name': company_name, 'email': primary_email, 'role': 'Decision Maker'}
-        email_draft = await run_in_threadpool(
-            generate_serp_hawk_email,
-            company_info, market_analysis, service_matches, contact
-        )
+        eligibility = await check_outreach_eligibility(session, normalized_url)
         
-        if email_draft:
-            subject = email_draft.get('subject', subject)
-            body_html = email_draft.get('body_html', body_html)
-
-        # Get services string
-        services = service_matches.get('recommended_services', [])
-        service_names = [s.get('service_name') for s in services]
-        recommended_services_str = ", ".join(service_names) if service_names else None
+        draft = await build_lead_draft(company_name, normalized_url, primary_email)
 
         return JSONResponse({
             'success': True,
-            'draft': {
-                'subject': subject,
-                'body': body_html,
-                'company_name': company_name,
-                'website_url': normalized_url,
-                'primary_email': primary_email,
-                'recommended_services': recommended_services_str
-            }
+            'draft': draft
         })
 
     except Exception as e:
@@ -431,78 +769,144 @@ async def draft_lead(
         return JSONResponse({'success': False, 'error': str(e)}, status_code=500)
 
 
-@app.post("/send-lead")
-async def send_lead_email(data: dict = Body(...), session: Session = Depends(get_session)):
+@app.post("/outreach/eligibility")
+async def bulk_outreach_eligibility(data: dict = Body(...), session: AsyncSession = Depends(get_session)):
     """
-    Sends BOTH Outbound and Inbound emails and creates a Client Record.
+    Vet a list of prospect URLs in one call: {"urls": [...]} -> per-URL verdicts plus remaining send capacity
+    """
+    urls = data.get('urls') or []
+    if not isinstance(urls, list):
+        raise HTTPException(status_code=400, detail="'urls' must be a list")
+    return await check_bulk_outreach_eligibility(session, [str(u or '').strip() for u in urls])
+
+
+@app.post("/prospects/import")
+async def import_prospects(
+    file: UploadFile = File(...),
+    concurrency: Optional[int] = None,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Bulk import-to-draft: upload a CSV/XLSX of prospects (company, website, email).
+    Rows are normalized and deduplicated, already-contacted domains are dropped before any
+    scraping, and the rest are drafted in parallel. Progress streams back as newline-delimited JSON.
     """
-    company_name = data.get('company_name')
-    email = data.get('primary_email')
-    outreach = data.get('outreach', {})
-    inbound = data.get('inbound', {})
-    website_url = data.get('website_url')
-    
-    # 1. Extract Services using AI
-    from modules.service_extractor import extract_services
-    services_offered = extract_services(outreach.get('body', ''))
-    services_requested = extract_services(inbound.get('body', ''))
-    
-    # 2. Send OUTBOUND Email
-    outbound_sent = False
     try:
-        # Check if manual send or real send
-        is_manual = data.get('manual', False)
-        
-        if not is_manual and OUTLOOK_EMAIL and OUTLOOK_PASSWORD:
-            send_email_outlook(
-                to_email=email,
-                subject=outreach.get('subject'),
-                body=outreach.get('body'),
-                sender_email=OUTLOOK_EMAIL,
-                sender_password=OUTLOOK_PASSWORD,
-                smtp_server=SMTP_SERVER,
-                smtp_port=SMTP_PORT,
-                html=True,
-                imap_server=IMAP_SERVER
-            )
-            outbound_sent = True
+        rows = await run_in_threadpool(lambda: list(iter_prospects(file.filename, file.file)))
+    except UNREADABLE_FILE_ERRORS as e:
+        detail = str(e) if isinstance(e, ValueError) else f"Could not read {file.filename}: {e}"
+        raise HTTPException(status_code=400, detail=detail)
+
+    # 1. Normalize & drop duplicates within the file
+    prospects, skipped, seen_domains = [], [], set()
+    for row in rows:
+        domain = domain_key(row['website_url'])
+        if not domain:
+            reason = 'Invalid website' if row['website_url'] else 'Missing website'
+            skipped.append({'row': row['row'], 'website_url': row['website_url'], 'reason': reason})
+            continue
+        if domain in seen_domains:
+            skipped.append({'row': row['row'], 'website_url': row['website_url'], 'reason': 'Duplicate in file'})
+            continue
+        seen_domains.add(domain)
+        prospects.append({**row, 'domain': domain, 'website_url': normalize_website_url(row['website_url'])})
+
+    # 2. Drop domains we already emailed (one set-based lookup for the whole file)
+    contacted = await find_contacted_domains(session, seen_domains)
+    queued = []
+    for prospect in prospects:
+        company = contacted.get(prospect['domain'])
+        if company:
+            skipped.append({
+                'row': prospect['row'],
+                'website_url': prospect['website_url'],
+                'reason': f"Already contacted on {company.created_at.strftime('%Y-%m-%d %H:%M')}"
+            })
         else:
-            print(f"Manual/Simulated Outbound Email to {email}")
-            outbound_sent = True # Treat manual as sent for tracking
-            
-    except Exception as e:
-        print(f"Failed to send outbound email: {e}")
+            queued.append(prospect)
 
-    # 3. Send INBOUND Email (to same person, simulating reply/inbound)
-    inbound_sent = False
-    try:
-        if not is_manual and OUTLOOK_EMAIL and OUTLOOK_PASSWORD:
-            # Checking if we should delay slightly or just send immediately
-            # For now, sending immediately as per request
-            send_email_outlook(
-                to_email=email, 
-                subject=inbound.get('subject'),
-                body=inbound.get('body'),
-                sender_email=OUTLOOK_EMAIL,
-                sender_password=OUTLOOK_PASSWORD,
-                smtp_server=SMTP_SERVER,
-                smtp_port=SMTP_PORT,
-                html=True,
-                imap_server=IMAP_SERVER
+    # 3. Check the listed emails (one MX lookup per domain) so drafts never target a dead address
+    listed = [prospect for prospect in queued if prospect['primary_email']]
+    verdicts = await run_in_threadpool(deliverability.check_many, [prospect['primary_email'] for prospect in listed])
+    for prospect, verdict in zip(listed, verdicts):
+        if not verdict['deliverable']:
+            prospect['email_rejected'] = {'email': prospect['primary_email'], 'reason': verdict['reason']}
+            prospect['primary_email'] = ''
+
+    limit = max(1, min(concurrency or IMPORT_DRAFT_CONCURRENCY, IMPORT_DRAFT_CONCURRENCY))
+
+    async def draft_prospect(prospect):
+        try:
+            draft = await build_lead_draft(
+                prospect['company_name'] or prospect['domain'],
+                prospect['website_url'],
+                prospect['primary_email']
             )
-            inbound_sent = True
-        else:
-             print(f"Manual/Simulated Inbound Email to {email}")
-             inbound_sent = True
-             
+            record = {'type': 'draft', 'row': prospect['row'], 'status': 'drafted', 'draft': draft}
+            if prospect.get('email_rejected'):
+                record['email_rejected'] = prospect['email_rejected']
+            return record
+        except Exception as e:
+            traceback.print_exc()
+            return {'type': 'draft', 'row': prospect['row'], 'status': 'failed',
+                    'website_url': prospect['website_url'], 'error': str(e)}
+
+    async def stream_progress():
+        yield json.dumps({'type': 'summary', 'rows': len(rows), 'queued': len(queued), 'skipped': len(skipped)}) + "\n"
+        for item in skipped:
+            yield json.dumps({'type': 'skipped', **item}) + "\n"
+
+        done = failed = 0
+        async for record in run_bounded(queued, draft_prospect, limit):
+            done += 1
+            failed += record['status'] == 'failed'
+            record['progress'] = {'done': done, 'total': len(queued)}
+            yield json.dumps(record, default=str) + "\n"
+
+        yield json.dumps({'type': 'done', 'drafted': done - failed, 'failed': failed, 'skipped': len(skipped)}) + "\n"
+
+    return StreamingResponse(stream_progress(), media_type="application/x-ndjson")
+
+
+async def deliver_email(**kwargs):
+    """Send one email from a route without blocking the event loop (SMTP_TRANSPORT picks how)"""
+    kwargs.setdefault('imap_port', IMAP_PORT)
+    if SMTP_TRANSPORT == 'async':
+        return await send_email_async(**kwargs)
+    return await run_in_threadpool(send_email_outlook, **kwargs)
+
+
+async def deliver_lead_email(kind: str, to_email: str, message: dict, account: Optional[dict]) -> bool:
+    """Send one email of the outbound/inbound pair (simulated when there is no account)"""
+    if not account:
+        print(f"Manual/Simulated {kind.title()} Email to {to_email}")
+        return True # Treat manual as sent for tracking
+    try:
+        await deliver_email(
+            to_email=to_email,
+            subject=message.get('subject'),
+            body=message.get('body'),
+            html=True,
+            **sender_credentials(account)
+        )
+        return True
     except Exception as e:
-        print(f"Failed to send inbound email: {e}")
-        
-    # 4. Create/Update Client Record
+        print(f"Failed to send {kind} email: {e}")
+        return False
+
+
+def save_lead_records(session: Session, data: dict, services_offered, services_requested,
+                      outbound_sent: bool, inbound_sent: bool, use_queue: bool, sender_email: Optional[str] = None):
+    """
+    Writes the user, client profile, activity, Company row and (when queueing)
+    the two queued emails in a single transaction. Returns (profile, queued).
+    """
+    company_name = data.get('company_name')
+    email = data.get('primary_email')
+    website_url = data.get('website_url')
+
     # Check if user exists first
-    stmt = select(User).where(User.email == email)
-    user = session.exec(stmt).first()
-    
+    user = session.exec(select(User).where(User.email == email)).first()
     if not user:
         # Create phantom user for client
         user = User(
@@ -512,13 +916,10 @@ async def send_lead_email(data: dict = Body(...), session: Session = Depends(get
             role="Client"
         )
         session.add(user)
-        session.commit()
-        session.refresh(user)
+        session.flush()
         
     # Create or Get Profile
-    stmt_profile = select(ClientProfile).where(ClientProfile.userId == user.id)
-    profile = session.exec(stmt_profile).first()
-    
+    profile = session.exec(select(ClientProfile).where(ClientProfile.userId == user.id)).first()
     if not profile:
         profile = ClientProfile(
             userId=user.id,
@@ -530,115 +931,195 @@ async def send_lead_email(data: dict = Body(...), session: Session = Depends(get
             outbound_email_sent=outbound_sent,
             inbound_email_sent=inbound_sent
         )
-        session.add(profile)
     else:
         # Update existing
         profile.services_offered = services_offered
         profile.services_requested = services_requested
         profile.outbound_email_sent = outbound_sent
         profile.inbound_email_sent = inbound_sent
-        session.add(profile)
-        
-    session.commit()
-    
-    # 5. Create Activity Log
-    activity = ActivityLog(
+    session.add(profile)
+    session.flush()
+
+    # Queued sends are delivered by the dispatcher, which flags the profile once each email goes out
+    queued = {}
+    if use_queue:
+        priority = request_priority(data)
+        for kind in ('outbound', 'inbound'):
+            message = data.get('outreach' if kind == 'outbound' else 'inbound', {})
+            queued[kind] = send_queue.enqueue(
+                session,
+                to_email=email,
+                subject=message.get('subject'),
+                body=message.get('body'),
+                kind=kind,
+                priority=priority,
+                client_id=profile.id,
+                commit=False
+            )
+
+    # Activity Log
+    session.add(ActivityLog(
         userId=user.id,
         clientId=profile.id,
         action="Outreach Campaign",
         method="Email", 
-        content=f"Sent outbound: {outbound_sent}, inbound: {inbound_sent}",
+        content="Queued outbound and inbound emails" if use_queue else f"Sent outbound: {outbound_sent}, inbound: {inbound_sent}",
         details=f"Offered: {services_offered} | Requested: {services_requested}"
-    )
-    session.add(activity)
+    ))
+    # Queued emails are counted by the dispatcher when they go out (or finally fail)
+    sent = 0 if use_queue else int(outbound_sent) + int(inbound_sent)
+    record_client_metrics(session, profile.id, activities=1, sent=sent, failed=0 if use_queue else 2 - sent)
     
     # Prepare services string for Company table
     recommended_services_str = ", ".join(services_offered) if isinstance(services_offered, list) else str(services_offered or "")
 
-    # 6. Sync to Company Table (User Request: Store in company table as well)
-    try:
-        # Check for existing company by Email OR Website URL to avoid Unique violations
-        from sqlalchemy import or_
-        
-        url_check = website_url if website_url else ""
-        
-        company_stmt = select(Company).where(
-            or_(
-                Company.primary_email == email,
-                (Company.website_url == url_check) & (Company.website_url != None)
-            )
+    # Sync to Company Table (User Request: Store in company table as well)
+    # Check for existing company by Email OR Website URL to avoid Unique violations
+    from sqlalchemy import or_
+    url_check = website_url if website_url else ""
+    existing_company = session.exec(select(Company).where(
+        or_(
+            Company.primary_email == email,
+            (Company.website_url == url_check) & (Company.website_url != None)
         )
-        existing_company = session.exec(company_stmt).first()
-        
-        if existing_company:
-             # Update existing
-             if not existing_company.company_name:
-                 existing_company.company_name = company_name
-             if website_url and not existing_company.website_url:
-                existing_company.website_url = website_url
-             if email and not existing_company.primary_email:
-                 existing_company.primary_email = email
-                 
-             # Update services if available
-             if recommended_services_str:
-                 existing_company.recommended_services = recommended_services_str
-                 
-             session.add(existing_company)
-        else:
-             # Create new
-             new_company = Company(
-                 company_name=company_name,
-                 website_url=website_url,
-                 primary_email=email,
-                 recommended_services=recommended_services_str,
-                 email_sent_status=outbound_sent
-             )
-             session.add(new_company)
-             
-        # Commit specifically for company to catch errors locally if needed, 
-        # but main commit is at end of function.
-        # session.commit() 
-    except Exception as e:
-        print(f"Error syncing to Company table: {e}")
-        # Don't fail the whole request for this side-effect
-        # session.rollback() # Might be needed if we want to proceed? 
-        # But main DB session is shared. We should ensure we don't break it.
-        pass
+    )).first()
+    
+    if existing_company:
+        # Update existing
+        if not existing_company.company_name:
+            existing_company.company_name = company_name
+        if website_url and not existing_company.website_url:
+            existing_company.website_url = website_url
+        if email and not existing_company.primary_email:
+            existing_company.primary_email = email
+        # Update services if available
+        if recommended_services_str:
+            existing_company.recommended_services = recommended_services_str
+        if sender_email and outbound_sent:
+            existing_company.email_sender = sender_email
+        session.add(existing_company)
+    else:
+        session.add(Company(
+            company_name=company_name,
+            website_url=website_url,
+            primary_email=email,
+            recommended_services=recommended_services_str,
+            email_sent_status=outbound_sent,
+            **({'email_sender': sender_email} if sender_email else {})
+        ))
 
     session.commit()
+    return profile, queued
+
+
+@app.post("/send-lead")
+async def send_lead_email(data: dict = Body(...), session: AsyncSession = Depends(get_session)):
+    """
+    Sends BOTH Outbound and Inbound emails and creates a Client Record.
+    Service extraction (worker threads) and delivery run concurrently so the
+    event loop is never blocked; the DB is written in one transaction at the end.
+    """
+    email = data.get('primary_email')
+    outreach = data.get('outreach', {})
+    inbound = data.get('inbound', {})
     
-    return JSONResponse({
+    # Check if manual send or real send
+    is_manual = data.get('manual', False)
+    simulate = bool(is_manual or not sender_pool)
+    use_queue = bool(not simulate and data.get('queue', SEND_QUEUE_ENABLED))
+    if use_queue:
+        request_priority(data) # 400 before anything is sent or queued
+    
+    if not simulate:
+        verdict = await run_in_threadpool(deliverability.check, email)
+        if not verdict['deliverable']:
+            return undeliverable_response(verdict)
+    
+    # Direct sends: both emails go out from the least-loaded account with room for two
+    account, reservation = None, None
+    if not simulate and not use_queue:
+        account, reservation = await run_in_threadpool(sender_pool.reserve, 2)
+        if not account:
+            return JSONResponse({'success': False, 'error': 'Hourly rate limit exceeded on every sender account'}, status_code=429)
+    
+    # 1. Extract Services using AI, 2/3. send OUTBOUND and INBOUND (to same person, simulating reply/inbound) - all at once
+    from modules.service_extractor import extract_services
+    tasks = [
+        asyncio.to_thread(extract_services, outreach.get('body', '')),
+        asyncio.to_thread(extract_services, inbound.get('body', ''))
+    ]
+    if not use_queue:
+        tasks += [
+            deliver_lead_email('outbound', email, outreach, account),
+            deliver_lead_email('inbound', email, inbound, account)
+        ]
+    services_offered, services_requested, *delivered = await asyncio.gather(*tasks)
+    outbound_sent, inbound_sent = delivered or (False, False)
+    failed = [outbound_sent, inbound_sent].count(False)
+    if reservation and failed:
+        # Hand back the slots of the emails that did not go out
+        await run_in_threadpool(sender_pool.release, {**reservation, 'count': failed})
+        
+    # 4. Create/Update Client Record, activity and Company row
+    try:
+        profile, queued = await session.run_sync(
+            save_lead_records, data, services_offered, services_requested,
+            outbound_sent, inbound_sent, use_queue, account['email'] if account else None
+        )
+    except Exception as e:
+        await session.rollback()
+        print(f"Error saving lead records: {e}")
+        return JSONResponse({
+            "success": False,
+            "error": f"Emails processed but saving the client record failed: {e}",
+            "outbound_sent": outbound_sent,
+            "inbound_sent": inbound_sent
+        }, status_code=500)
+    
+    dashboard_cache.invalidate()
+    
+    response = {
         "success": True, 
         "outbound_sent": outbound_sent,
         "inbound_sent": inbound_sent,
         "client_id": profile.id
-    })
-
+    }
+    if use_queue:
+        send_queue.notify()
+        response["queued"] = await session.run_sync(
+            lambda sync_session: {kind: serialize_outbound_email(sync_session, m) for kind, m in queued.items()}
+        )
+        return JSONResponse(response, status_code=202)
+    return JSONResponse(response)
 
 
 @app.get("/activities")
-async def get_activities(limit: int = 10, session: Session = Depends(get_session)):
+async def get_activities(
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    sent: Optional[bool] = None,
+    session: AsyncSession = Depends(get_session)
+):
     """
     Fetch recent outreach from Companies table (Syncing with legacy Company table as requested)
+    Newest first; pass the returned next_cursor as ?cursor= for the next page.
     """
+    results, next_cursor = await fetch_page(crm_queries.recent_companies, session, limit, cursor=cursor, sent=sent)
     try:
-        # User requested "everything that was there in companies table"
-        statement = select(Company).order_by(Company.created_at.desc()).limit(limit)
-        results = session.exec(statement).all()
         
         activities = []
         for company in results:
             activities.append({
-                'id': str(company.id),
-                'company_name': company.company_name,
-                'website_url': company.website_url,
-                'email': company.primary_email,
-                'sent_at': company.created_at.isoformat() if company.created_at else datetime.now().isoformat(),
+                'id': str(company['id']),
+                'company_name': company['company_name'],
+                'website_url': company['website_url'],
+                'email': company['primary_email'],
+                'sent_at': company['created_at'].isoformat() if company['created_at'] else datetime.now().isoformat(),
                 'status': 'Sent', 
-                'recommended_services': company.recommended_services or '-' 
+                'recommended_services': company['recommended_services'] or '-' 
             })
             
-        return JSONResponse({'activities': activities})
+        return JSONResponse({'activities': activities, 'next_cursor': next_cursor})
     except Exception as e:
         print(f"Error fetching activities from Company table: {e}")
         return JSONResponse({'activities': [], 'error': str(e)})
@@ -648,88 +1129,71 @@ async def get_activities(limit: int = 10, session: Session = Depends(get_session
 # AI ROUTES - SERP Hawk Logic
 # ============================================================================
 
-@app.post("/generate")
-async def generate_ai_analysis(data: dict):
+async def draft_email_with_checkpoint(checkpoints, company_info, market_analysis, service_matches, contact, draft_type):
+    """Generate one SERP Hawk email draft, reusing the checkpointed draft when its inputs are unchanged"""
+    recipient = (contact or {}).get('email') or (contact or {}).get('name') or 'general'
+    return await checkpoints.run(
+        f"email:{draft_type}:{recipient}",
+        [company_info, market_analysis, service_matches, contact, draft_type],
+        generate_serp_hawk_email,
+        company_info, market_analysis, service_matches, contact, draft_type
+    )
+
+
+async def process_generate_url(url: str) -> dict:
     """
-    Complete SERP Hawk outreach workflow:
+    Complete SERP Hawk outreach workflow for one URL:
     1. Scrape website
     2. Analyze company
     3. Analyze market & competitors
     4. Match services
     5. Generate email
     6. Create image
+    Returns the result record, or {'url', 'error'} on failure.
     """
-    urls = data.get('urls', [])
-    results = []
-
-    for url in urls:
-        try:
-            print(f"Processing: {url}")
-            
-            # Step 1: Scrape (run in threadpool with fresh loop for Windows compatibility)
-            scraped_text = await run_in_threadpool(sync_scrape_website_wrapper, url)
-            
-            if not scraped_text or scraped_text.startswith("ERROR SCRAPING"):
-                error_message = scraped_text if scraped_text else "Failed to scrape website"
-                results.append({'url': url, 'error': error_message})
-                continue
+    try:
+        print(f"Processing: {url}")
+        
+        # Every stage below is checkpointed, so a retry or resumed job restarts at the first missing stage
+        prospect_key = normalize_website_url(url)
+        checkpoints = StageCheckpointer(engine, prospect_key, PIPELINE_CHECKPOINT_MAX_AGE_HOURS)
+        
+        # Step 1: Scrape (run in threadpool with fresh loop for Windows compatibility)
+        scraped_text = await checkpoints.run('scrape', prospect_key, sync_scrape_website_wrapper, url)
+        
+        if not scraped_text or scraped_text.startswith("ERROR SCRAPING"):
+            error_message = scraped_text if scraped_text else "Failed to scrape website"
+            return {'url': url, 'error': error_message}
 
-            # Step 2: Analyze company
-            company_info = await run_in_threadpool(analyze_content, scraped_text)
-            company_name = company_info.get('company_name', 'Unknown Company')
+        # Step 2: Analyze company
+        company_info = await checkpoints.run('analysis', scraped_text, analyze_content, scraped_text)
+        company_name = company_info.get('company_name', 'Unknown Company')
 
-            # Step 3: Market analysis
-            market_analysis = await run_in_threadpool(analyze_market, scraped_text, company_name)
+        # Step 3: Market analysis
+        market_analysis = await checkpoints.run('market', [scraped_text, company_name], analyze_market, scraped_text, company_name)
 
-            # Step 4: Match services
-            service_matches = await run_in_threadpool(match_services, market_analysis, company_info)
+        # Step 4: Match services
+        service_matches = await checkpoints.run('services', [market_analysis, company_info], match_services, market_analysis, company_info)
 
-            # Step 5: Generate email
-            contacts = company_info.get('contacts', [])
-            generated_emails = []
-            
-            if contacts:
-                for contact in contacts:
-                    # Type 1: Outreach (Offering)
-                    outreach_draft = await run_in_threadpool(
-                        generate_serp_hawk_email,
-                        company_info, market_analysis, service_matches, contact, "outreach"
-                    )
-                    # Type 2: Inbound (Requesting)
-                    inbound_draft = await run_in_threadpool(
-                        generate_serp_hawk_email,
-                        company_info, market_analysis, service_matches, contact, "inbound"
-                    )
-                    
-                    generated_emails.append({
-                        'to_email': contact.get('email', ''),
-                        'recipient_name': contact.get('name'),
-                        'role': contact.get('role'),
-                        'outreach': {
-                            'subject': outreach_draft.get('subject'),
-                            'body': outreach_draft.get('body_html')
-                        },
-                        'inbound': {
-                            'subject': inbound_draft.get('subject'),
-                            'body': inbound_draft.get('body_html')
-                        }
-                    })
-            else:
+        # Step 5: Generate email
+        contacts = company_info.get('contacts', [])
+        generated_emails = []
+        
+        if contacts:
+            for contact in contacts:
                 # Type 1: Outreach (Offering)
-                outreach_draft = await run_in_threadpool(
-                    generate_serp_hawk_email,
-                    company_info, market_analysis, service_matches, None, "outreach"
+                outreach_draft = await draft_email_with_checkpoint(
+                    checkpoints, company_info, market_analysis, service_matches, contact, "outreach"
                 )
                 # Type 2: Inbound (Requesting)
-                inbound_draft = await run_in_threadpool(
-                    generate_serp_hawk_email,
-                    company_info, market_analysis, service_matches, None, "inbound"
+                inbound_draft = await draft_email_with_checkpoint(
+                    checkpoints, company_info, market_analysis, service_matches, contact, "inbound"
                 )
                 
                 generated_emails.append({
-                    'to_email': '', 
-                    'recipient_name': 'General',
-                    'role': 'N/A',
+                    'to_email': contact.get('email', ''),
+                    'recipient_name': contact.get('name'),
+                    'role': contact.get('role'),
                     'outreach': {
                         'subject': outreach_draft.get('subject'),
                         'body': outreach_draft.get('body_html')
@@ -739,126 +1203,335 @@ async def generate_ai_analysis(data: dict):
                         'body': inbound_draft.get('body_html')
                     }
                 })
-
-            # Step 6: Generate beautiful email image
-            services = service_matches.get('recommended_services', [])
-            
-            safe_company_name = "".join(c for c in company_name if c.isalnum() or c in (' ', '-', '_')).strip()
-            safe_company_name = safe_company_name.replace(' ', '_')[:50]
-            
-            image_filename = f"{safe_company_name}_email_image.html"
-            image_path = os.path.join('static', 'generated_images', image_filename)
-            
-            generated_image = await run_in_threadpool(
-                generate_email_image,
-                company_name, services, image_path
+        else:
+            # Type 1: Outreach (Offering)
+            outreach_draft = await draft_email_with_checkpoint(
+                checkpoints, company_info, market_analysis, service_matches, None, "outreach"
             )
-
-            results.append({
-                'url': url,
-                'analysis': {
-                    'company_name': company_name,
-                    'what_they_do': company_info.get('summary', 'Analysis available'),
-                    'contacts': contacts
+            # Type 2: Inbound (Requesting)
+            inbound_draft = await draft_email_with_checkpoint(
+                checkpoints, company_info, market_analysis, service_matches, None, "inbound"
+            )
+            
+            generated_emails.append({
+                'to_email': '', 
+                'recipient_name': 'General',
+                'role': 'N/A',
+                'outreach': {
+                    'subject': outreach_draft.get('subject'),
+                    'body': outreach_draft.get('body_html')
                 },
-                'emails': generated_emails,
-                'recommended_services': ", ".join([s.get('service_name', '') for s in service_matches.get('recommended_services', [])]) if service_matches.get('recommended_services') else None,
-                'image_url': f'/static/generated_images/{image_filename}' if generated_image else None
+                'inbound': {
+                    'subject': inbound_draft.get('subject'),
+                    'body': inbound_draft.get('body_html')
+                }
             })
 
-        except Exception as e:
-            traceback.print_exc()
-            results.append({'url': url, 'error': str(e)})
+        # Step 6: Generate beautiful email image
+        services = service_matches.get('recommended_services', [])
+        
+        safe_company_name = "".join(c for c in company_name if c.isalnum() or c in (' ', '-', '_')).strip()
+        safe_company_name = safe_company_name.replace(' ', '_')[:50]
+        
+        image_filename = f"{safe_company_name}_email_image.html"
+        image_path = os.path.join('static', 'generated_images', image_filename)
+        
+        generated_image = await run_in_threadpool(
+            generate_email_image,
+            company_name, services, image_path
+        )
+
+        return {
+            'url': url,
+            'analysis': {
+                'company_name': company_name,
+                'what_they_do': company_info.get('summary', 'Analysis available'),
+                'contacts': contacts
+            },
+            'emails': generated_emails,
+            'recommended_services': ", ".join([s.get('service_name', '') for s in service_matches.get('recommended_services', [])]) if service_matches.get('recommended_services') else None,
+            'image_url': f'/static/generated_images/{image_filename}' if generated_image else None
+        }
+
+    except Exception as e:
+        traceback.print_exc()
+        return {'url': url, 'error': str(e)}
+
+
+
+# Background job queue for /generate (started in lifespan)
+generate_queue = GenerateJobQueue(engine, process_generate_url, workers=GENERATE_WORKERS)
+
+
+async def stream_generate_results(urls: List[str], concurrency: int):
+    """
+    Process URLs concurrently (at most `concurrency` at a time) and yield one
+    NDJSON line per URL as soon as it finishes, tagged with its input index.
+    """
+    async def run(indexed_url):
+        index, url = indexed_url
+        return index, await process_generate_url(url)
+
+    async for index, result in run_bounded(list(enumerate(urls)), run, concurrency):
+        yield json.dumps({'index': index, **result}, default=str) + "\n"
+
+
+@app.post("/generate")
+async def generate_ai_analysis(data: dict, session: AsyncSession = Depends(get_session)):
+    """
+    Run the SERP Hawk workflow over data['urls'].
+    With data['background'] = true, the URLs are queued as a job and the job id is returned immediately.
+    With data['stream'] = true, URLs run in parallel (data['concurrency'], capped by GENERATE_CONCURRENCY)
+    and each result is streamed back as a newline-delimited JSON record when it completes.
+    """
+    urls = data.get('urls')
+    if not isinstance(urls, list) or not urls or not all(isinstance(url, str) and url.strip() for url in urls):
+        raise HTTPException(status_code=400, detail="'urls' must be a non-empty list of URLs")
+
+    if data.get('stream'):
+        concurrency = data.get('concurrency') or GENERATE_CONCURRENCY
+        if isinstance(concurrency, str) and concurrency.strip().isdigit():
+            concurrency = int(concurrency)
+        if not isinstance(concurrency, int) or isinstance(concurrency, bool) or concurrency < 1:
+            raise HTTPException(status_code=400, detail="'concurrency' must be a positive integer")
+        concurrency = min(concurrency, GENERATE_CONCURRENCY)
+        return StreamingResponse(stream_generate_results(urls, concurrency), media_type="application/x-ndjson")
+
+    if data.get('background'):
+        job = await session.run_sync(generate_queue.enqueue, urls)
+        return JSONResponse({
+            'job_id': str(job.id),
+            'status': job.status,
+            'total': job.total,
+            'status_url': f'/generate/jobs/{job.id}'
+        }, status_code=202)
+
+    results = []
+    for url in urls:
+        results.append(await process_generate_url(url))
 
     return JSONResponse(results)
 
 
+def serialize_job_item(item: GenerateJobItem) -> dict:
+    """Per-URL record for job status responses"""
+    return {
+        'url': item.url,
+        'position': item.position,
+        'status': item.status,
+        'attempts': item.attempts,
+        'result': item.result,
+        'error': item.error,
+        'finishedAt': item.finishedAt.isoformat() if item.finishedAt else None
+    }
+
+
+async def get_job_or_404(session: AsyncSession, job_id: str) -> GenerateJob:
+    try:
+        job = await session.get(GenerateJob, uuid.UUID(job_id))
+    except ValueError:
+        job = None
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/generate/jobs/{job_id}")
+async def get_generate_job(job_id: str, include_results: bool = True, session: AsyncSession = Depends(get_session)):
+    """Status, progress and finished per-URL results of a background /generate job"""
+    job = await get_job_or_404(session, job_id)
+    counts = await session.run_sync(generate_queue.progress, job.id)
+    items = await session.run_sync(generate_queue.finished_items, job.id) if include_results else []
+
+    return {
+        'job_id': str(job.id),
+        'status': job.status,
+        'total': job.total,
+        'progress': counts,
+        'createdAt': job.createdAt.isoformat(),
+        'finishedAt': job.finishedAt.isoformat() if job.finishedAt else None,
+        'results': [serialize_job_item(i) for i in items]
+    }
+
+
+@app.get("/generate/jobs/{job_id}/stream")
+async def stream_generate_job(job_id: str, session: AsyncSession = Depends(get_session)):
+    """Stream a job's per-URL results as newline-delimited JSON until the job finishes"""
+    job_uuid = (await get_job_or_404(session, job_id)).id
+
+    async def stream_results():
+        # Items finish out of order: the cursor advances over the contiguous finished
+        # prefix, and `ahead` holds positions already sent past it (at most the in-flight gap)
+        after_position, ahead = -1, set()
+        while True:
+            # Own session per poll: the request's session is closed once streaming starts
+            async with AsyncSession(async_engine, expire_on_commit=False) as poll_session:
+                job = await poll_session.get(GenerateJob, job_uuid)
+                items = await poll_session.run_sync(generate_queue.finished_items, job_uuid, after_position)
+                for item in items:
+                    if item.position not in ahead:
+                        ahead.add(item.position)
+                        yield json.dumps(serialize_job_item(item), default=str) + "\n"
+                while after_position + 1 in ahead:
+                    after_position += 1
+                    ahead.discard(after_position)
+                if job.status == 'Done':
+                    break
+            await asyncio.sleep(1)
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
 @app.post("/send")
-async def send_email_api(data: dict, session: Session = Depends(get_session)):
+async def send_email_api(data: dict, session: AsyncSession = Depends(get_session)):
     """
     Send email using credentials and log to DB (AI Outreach version)
+    By default the email is queued and the response carries the queued-message id to poll;
+    pass "queue": false to send immediately.
     """
     email_data = data.get('email_data')
     if not email_data:
         return JSONResponse({'success': False, 'error': 'No email data provided'}, status_code=400)
 
-    sender_email = OUTLOOK_EMAIL
-    sender_password = OUTLOOK_PASSWORD
-    
-    if not sender_email or not sender_password:
-        return JSONResponse({'success': False, 'error': 'Email credentials not configured in .env'}), 500
+    if not sender_pool:
+        return JSONResponse({'success': False, 'error': 'Email credentials not configured in .env'}, status_code=500)
+
+    # Reject bad recipients before they are queued or take a send slot
+    verdict = await run_in_threadpool(deliverability.check, email_data.get('to_email'))
+    if not verdict['deliverable']:
+        return undeliverable_response(verdict)
+
+    if data.get('queue', SEND_QUEUE_ENABLED):
+        priority = request_priority(data)
+        message = await session.run_sync(
+            lambda sync_session: send_queue.enqueue(
+                sync_session,
+                to_email=email_data['to_email'],
+                subject=email_data['subject'],
+                body=email_data['body'],
+                kind="adhoc",
+                priority=priority,
+                key=data.get('idempotency_key')
+            )
+        )
+        status = await session.run_sync(serialize_outbound_email, message)
+        return JSONResponse({'success': True, 'queued': True, **status}, status_code=202)
 
     try:
         # Check eligibility/rate limit before sending
         # Note: We need a URL to check duplicates, but the AI UI sends email_data directly.
         # We'll treat this as "Ad-hoc" send, but still rate limit.
         
-        # Rate Limit Check
-        one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-        rate_statement = select(func.count(EmailLog.id)).where(
-            EmailLog.sender_email == SENDER_EMAIL,
-            EmailLog.sent_at > one_hour_ago
-        )
-        emails_sent_count = session.exec(rate_statement).one()
+        # Rate Limit Check (atomically takes a send slot from the least-loaded sender account
+        # so concurrent requests can't overshoot)
+        account, reservation = await run_in_threadpool(sender_pool.reserve)
         
-        if emails_sent_count >= HOURLY_EMAIL_LIMIT:
+        if not account:
              return JSONResponse({'success': False, 'error': 'Hourly rate limit exceeded'}, status_code=429)
 
         # Send Email
-        await run_in_threadpool(
-            send_email_outlook,
-            to_email=email_data['to_email'],
-            subject=email_data['subject'],
-            body=email_data['body'],
-            sender_email=sender_email,
-            sender_password=sender_password,
-            smtp_server=SMTP_SERVER,
-            smtp_port=SMTP_PORT,
-            html=True
-        )
+        try:
+            await deliver_email(
+                to_email=email_data['to_email'],
+                subject=email_data['subject'],
+                body=email_data['body'],
+                html=True,
+                **sender_credentials(account)
+            )
+        except Exception:
+            await run_in_threadpool(sender_pool.release, reservation)
+            raise
         
         # Log to DB
-        # We might not have a Company ID if it came from the AI tool randomly.
-        # For now, we'll try to find a company by email or create a "clean" one if needed.
-        # But to avoid complexity, we can just log the rate limit and maybe create a minimal company.
-        
-        # Try to find company by email
-        statement = select(Company).where(Company.primary_email == email_data['to_email'])
-        company = session.exec(statement).first()
-        
-        if not company:
-            # Create a shell company entry for logging purposes
-            company = Company(
-                company_name="AI Outreach Contact",
-                website_url=f"ai-generated-{uuid.uuid4()}@example.com", # Placeholder
-                primary_email=email_data['to_email'],
-                email_sender=SENDER_EMAIL,
-                email_sent_status=True
-            )
-            session.add(company)
-            session.commit()
-            session.refresh(company)
-        else:
-            company.email_sent_status = True
-            session.add(company)
-            session.commit()
-
-        # Log
-        email_log = EmailLog(
-            company_id=company.id,
-            sender_email=SENDER_EMAIL,
-            sent_at=datetime.utcnow()
-        )
-        session.add(email_log)
-        session.commit()
+        # We might not have a Company ID if it came from the AI tool randomly,
+        # so record_sent_email creates a minimal company when needed.
+        await session.run_sync(record_sent_email, email_data['to_email'], sender_email=account['email'])
+        await session.commit()
 
-        return JSONResponse({'success': True})
+        return JSONResponse({'success': True, 'sender_email': account['email']})
         
     except Exception as e:
         traceback.print_exc()
         return JSONResponse({'success': False, 'error': str(e)}, status_code=500)
 
 
+@app.post("/emails/validate")
+async def validate_emails(data: dict = Body(...)):
+    """
+    Deliverability pre-check for a list of addresses (syntax + MX, each domain resolved once).
+    """
+    emails = data.get('emails') or []
+    if not isinstance(emails, list):
+        raise HTTPException(status_code=400, detail="emails must be a list")
+    results = await run_in_threadpool(deliverability.check_many, [str(e) for e in emails])
+    summary = {'deliverable': 0, 'undeliverable': 0, 'unverified': 0}
+    for result in results:
+        if not result['deliverable']:
+            summary['undeliverable'] += 1
+        elif not result['verified']:
+            summary['unverified'] += 1
+        else:
+            summary['deliverable'] += 1
+    return {'results': results, 'summary': summary, 'cache': deliverability.stats()}
+
+
+@app.get("/senders")
+async def list_sender_accounts():
+    """Sender accounts with their caps and current usage (no credentials)"""
+    usage = await run_in_threadpool(sender_pool.usage)
+    return {
+        "accounts": usage,
+        "hourly_limit": sender_pool.hourly_limit,
+        "remaining": sum(entry['remaining'] for entry in usage)
+    }
+
+
+@app.get("/send-queue")
+async def list_send_queue(status: Optional[str] = 'Queued', limit: int = 50, session: AsyncSession = Depends(get_session)):
+    """List queued/sent messages in dispatch order"""
+    statement = select(OutboundEmail)
+    if status and status != 'All':
+        statement = statement.where(OutboundEmail.status == status)
+    statement = statement.order_by(OutboundEmail.priority.desc(), OutboundEmail.createdAt).limit(limit)
+    messages = (await session.exec(statement)).all()
+    positions = await session.run_sync(send_queue.queue_positions, messages)
+    return {"messages": [serialize_outbound_email(None, m, positions.get(m.id, 0)) for m in messages]}
+
+
+@app.get("/send-queue/{message_id}")
+async def get_send_queue_message(message_id: str, session: AsyncSession = Depends(get_session)):
+    """Poll the status of a queued message"""
+    try:
+        message = await session.get(OutboundEmail, uuid.UUID(message_id))
+    except ValueError:
+        message = None
+    if not message:
+        raise HTTPException(status_code=404, detail="Queued message not found")
+    return await session.run_sync(serialize_outbound_email, message)
+
+
+@app.delete("/send-queue/{message_id}")
+async def cancel_send_queue_message(message_id: str, session: AsyncSession = Depends(get_session)):
+    """Cancel a message that has not been sent yet"""
+    try:
+        message = await session.get(OutboundEmail, uuid.UUID(message_id))
+    except ValueError:
+        message = None
+    if not message:
+        raise HTTPException(status_code=404, detail="Queued message not found")
+    # Conditional update so we never cancel a message the dispatcher just claimed
+    cancelled = await session.exec(
+        sql_update(OutboundEmail)
+        .where(OutboundEmail.id == message.id, OutboundEmail.status == 'Queued')
+        .values(status='Cancelled')
+    )
+    await session.commit()
+    await session.refresh(message)
+    if cancelled.rowcount != 1:
+        raise HTTPException(status_code=409, detail=f"Message is already {message.status}")
+    return await session.run_sync(serialize_outbound_email, message)
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -878,24 +1551,36 @@ async def health_check():
 
 
 @app.get("/dashboard-stats")
-async def get_dashboard_stats(role: str, email: str, session: Session = Depends(get_session)):
-    """Fetch stats for the dashboard based on role"""
+async def get_dashboard_stats(role: str, email: str, session: AsyncSession = Depends(get_session)):
+    """
+    Fetch stats for the dashboard based on role. Admin counts come from one GROUP BY
+    (cached for DASHBOARD_CACHE_TTL_SECONDS); email/activity metrics from the daily rollup.
+    """
     if role == 'Admin':
-        total_clients = session.exec(select(func.count(ClientProfile.id))).one()
-        active_clients = session.exec(select(func.count(ClientProfile.id)).where(ClientProfile.status == 'Active')).one()
-        pending_clients = session.exec(select(func.count(ClientProfile.id)).where(ClientProfile.status == 'Pending')).one()
-        hold_clients = session.exec(select(func.count(ClientProfile.id)).where(ClientProfile.status == 'Hold')).one()
-        
-        return {
-            "total": total_clients,
-            "active": active_clients,
-            "pending": pending_clients,
-            "hold": hold_clients
-        }
+        stats = dashboard_cache.get('admin')
+        if stats is None:
+            stats = await overview(session)
+            dashboard_cache.put('admin', stats)
+        return stats
     else:
         # Client specific stats
-        profile_stmt = select(ClientProfile).join(User).where(User.email == email)
-        profile = session.exec(profile_stmt).first()
+        profile_stmt = (
+            select(
+                ClientProfile.id,
+                ClientProfile.companyName,
+                ClientProfile.projectName,
+                ClientProfile.websiteUrl,
+                ClientProfile.status,
+                ClientProfile.seoStrategy,
+                ClientProfile.recommended_services,
+                ClientProfile.targetKeywords,
+                ClientProfile.nextMilestone,
+                ClientProfile.nextMilestoneDate
+            )
+            .join(User, User.id == ClientProfile.userId)
+            .where(User.email == email)
+        )
+        profile = (await session.exec(profile_stmt)).first()
         if not profile:
             return {"error": "Profile not found"}
             
@@ -911,129 +1596,186 @@ async def get_dashboard_stats(role: str, email: str, session: Session = Depends(
             "targetKeywords": profile.targetKeywords or [],
             "nextMilestone": profile.nextMilestone,
             "nextMilestoneDate": profile.nextMilestoneDate,
-            # Placeholder metrics for the dynamic dashboard visual
-            "metrics": {
-                "successRate": "87.5%",
-                "failed": 539,
-                "successful": 5231,
-                "suspended": 15,
-                "totalLive": 1,
-                "goal": "$212,943,433",
-                "backers": 582160,
-                "pledged": "$41,264,435"
-            }
+            "metrics": await client_metrics(session, profile.id)
         }
 
 
+# ============================================================================
+# SEARCH
+# ============================================================================
+
+@app.get("/search")
+async def search(
+    q: str,
+    types: Optional[str] = None,
+    client_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Ranked full-text search over clients, remarks, activity notes and OCR'd documents.
+    `types` narrows it (comma-separated: client, remark, activity, document).
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Search query is empty")
+    kinds = [kind.strip() for kind in types.split(',') if kind.strip()] if types else None
+    unknown = [kind for kind in kinds or [] if kind not in SEARCH_KINDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown search types: {unknown} (use {', '.join(SEARCH_KINDS)})")
+    try:
+        results, next_cursor = await fetch_page(
+            search_records, session, limit, q=q, kinds=kinds, client_id=client_id, cursor=cursor
+        )
+    except SearchUnavailableError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    return {"results": results, "next_cursor": next_cursor}
+
+
 # ============================================================================
 # CLIENT PROFILE ROUTES
 # ============================================================================
 
 @app.get("/clients")
-async def list_clients(status: Optional[str] = None, session: Session = Depends(get_session)):
-    """List all client profiles with filters"""
-    statement = select(ClientProfile)
-    if status and status != 'All':
-        statement = statement.where(ClientProfile.status == status)
-    
-    profiles = session.exec(statement).all()
+async def list_clients(
+    status: Optional[str] = None,
+    employee_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    keyword: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = LIST_PAGE_SIZE,
+    session: AsyncSession = Depends(get_session)
+):
+    """List client profiles with filters, one page at a time (follow next_cursor)"""
+    profiles, next_cursor = await fetch_page(
+        crm_queries.list_clients, session, limit,
+        status=status, employee_id=employee_id, project_id=project_id, keyword=keyword, cursor=cursor
+    )
     results = []
     for p in profiles:
-        # Get latest email sent
-        user_email = p.user.email if p.user else "N/A"
         results.append({
-            "id": p.id,
-            "projectName": p.projectName or p.companyName,
-            "category": p.seoStrategy or "Software Training Institute", # Placeholder category
-            "email": user_email,
-            "status": p.status,
-            "keywords": p.targetKeywords or [],
-            "website": p.websiteUrl
+            "id": p['id'],
+            "projectName": p['projectName'] or p['companyName'],
+            "category": p['seoStrategy'] or "Software Training Institute", # Placeholder category
+            "email": p['email'] or "N/A",
+            "status": p['status'],
+            "keywords": p['targetKeywords'] or [],
+            "website": p['websiteUrl']
         })
-    return {"clients": results}
+    return {"clients": results, "next_cursor": next_cursor}
 
 @app.get("/employees")
-async def list_employees(session: Session = Depends(get_session)):
-    """List all users with role 'Employee' or 'Admin'"""
-    statement = select(User).where(User.role.in_(['Employee', 'Admin']))
-    users = session.exec(statement).all()
-    return {"employees": [{"id": u.id, "name": u.name, "email": u.email, "role": u.role} for u in users]}
+async def list_employees(cursor: Optional[str] = None, limit: int = LIST_PAGE_SIZE, session: AsyncSession = Depends(get_session)):
+    """List users with role 'Employee' or 'Admin', one page at a time (cached)"""
+    async def load():
+        users, next_cursor = await fetch_page(crm_queries.list_users, session, limit, roles=['Employee', 'Admin'], cursor=cursor)
+        return {"employees": users, "next_cursor": next_cursor}
+    return await entity_cache.get_or_load('users', f"employees:{cursor}:{limit}", load)
 
 @app.put("/clients/{client_id}/assign-employee")
-async def assign_employee(client_id: int, employee_id: int = Body(..., embed=True), session: Session = Depends(get_session)):
+async def assign_employee(client_id: int, employee_id: int = Body(..., embed=True), session: AsyncSession = Depends(get_session)):
     """Assign an employee to a client"""
-    client = session.get(ClientProfile, client_id)
+    client = await session.get(ClientProfile, client_id)
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
         
-    employee = session.get(User, employee_id)
+    employee = await session.get(User, employee_id)
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
         
     client.assignedEmployeeId = employee_id
     session.add(client)
-    session.commit()
+    await session.commit()
+    await entity_cache.invalidate('client', client_id)
     return {"success": True, "assigned_to": employee.name}
 
 @app.get("/projects")
-async def list_projects(session: Session = Depends(get_session)):
-    """List all projects with basic details"""
-    statement = select(Project)
-    projects = session.exec(statement).all()
-    return {"projects": projects}
+async def list_projects(
+    status: Optional[str] = None,
+    member_id: Optional[int] = None,
+    client_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = LIST_PAGE_SIZE,
+    session: AsyncSession = Depends(get_session)
+):
+    """List projects with basic details, one page at a time (member_id / client_id: projects they are on)"""
+    projects, next_cursor = await fetch_page(
+        crm_queries.list_projects, session, limit,
+        status=status, member_id=member_id, client_id=client_id, cursor=cursor
+    )
+    return {"projects": projects, "next_cursor": next_cursor}
+
+async def save_project_membership(session: AsyncSession, project_id: int, lists: dict):
+    """Writes the employeeIds/internIds/clientIds lists present in `lists`; unknown ids are a 400"""
+    try:
+        for field in MEMBERSHIP_FIELDS:
+            if field in lists:
+                await set_project_membership(session, project_id, field, lists[field])
+    except UnknownMemberError as e:
+        await session.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def project_response(session: AsyncSession, project: Project) -> dict:
+    """Project row with its membership lists (the shape the API has always returned)"""
+    membership = await crm_queries.project_membership(session, [project.id])
+    return {**project.model_dump(), **membership[project.id]}
 
 @app.post("/projects")
-async def create_project(data: ProjectCreate, session: Session = Depends(get_session)):
+async def create_project(data: ProjectCreate, session: AsyncSession = Depends(get_session)):
     """Create a new advanced project"""
-    project = Project(**data.model_dump())
+    project = Project(**data.model_dump(exclude=set(MEMBERSHIP_FIELDS)))
     session.add(project)
-    session.commit()
-    session.refresh(project)
-    return project
+    await session.flush()
+    await save_project_membership(session, project.id, data.model_dump(include=set(MEMBERSHIP_FIELDS)))
+    await session.commit()
+    return await project_response(session, project)
 
 @app.get("/projects/{project_id}")
-async def get_project_detail_view(project_id: int, session: Session = Depends(get_session)):
-    """Get full details of a project including remarks and team"""
-    project = session.get(Project, project_id)
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-        
-    # Get remarks
-    remarks_stmt = select(Remark).where(Remark.projectId == project_id).order_by(Remark.createdAt.desc())
-    remarks_list = session.exec(remarks_stmt).all()
-    
-    # Get assigned team details
-    employees = session.exec(select(User).where(User.id.in_(project.employeeIds))).all() if project.employeeIds else []
-    interns = session.exec(select(User).where(User.id.in_(project.internIds))).all() if project.internIds else []
-    
-    return {
-        "project": project,
-        "remarks": remarks_list,
-        "team": {
-            "employees": [{"id": e.id, "name": e.name, "email": e.email} for e in employees],
-            "interns": [{"id": i.id, "name": i.name, "email": i.email} for i in interns]
+async def get_project_detail_view(project_id: int, session: AsyncSession = Depends(get_session)):
+    """Get full details of a project including remarks and team (cached)"""
+    async def load():
+        project = await session.get(Project, project_id)
+        if not project:
+            return None
+
+        # Get remarks
+        remarks_list = await crm_queries.project_remarks(session, project_id)
+
+        # Get assigned team details (membership lists and members in one query)
+        membership, team = await crm_queries.project_team(session, project_id)
+
+        return {
+            "project": {**project.model_dump(), **membership},
+            "remarks": remarks_list,
+            "team": team
         }
-    }
+
+    detail = await entity_cache.get_or_load('project', project_id, load)
+    if detail is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return detail
 
 @app.patch("/projects/{project_id}")
-async def update_project(project_id: int, data: ProjectUpdate, session: Session = Depends(get_session)):
+async def update_project(project_id: int, data: ProjectUpdate, session: AsyncSession = Depends(get_session)):
     """Update project progress, status, or assignments"""
-    project = session.get(Project, project_id)
+    project = await session.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
         
     update_data = data.model_dump(exclude_unset=True)
     for key, value in update_data.items():
-        setattr(project, key, value)
+        if key not in MEMBERSHIP_FIELDS:
+            setattr(project, key, value)
+    await save_project_membership(session, project_id, update_data)
     
     project.updatedAt = datetime.utcnow()
     session.add(project)
-    session.commit()
-    session.refresh(project)
-    return project
+    await session.commit()
+    await entity_cache.invalidate('project', project_id)
+    return await project_response(session, project)
 
 @app.post("/projects/{project_id}/remarks")
-async def add_project_remark(project_id: int, data: ProjectRemarkAdd, author_id: int = Body(..., embed=True), session: Session = Depends(get_session)):
+async def add_project_remark(project_id: int, data: ProjectRemarkAdd, author_id: int = Body(..., embed=True), session: AsyncSession = Depends(get_session)):
     """Add a comment/remark to a project"""
     remark = Remark(
         content=data.content,
@@ -1042,23 +1784,25 @@ async def add_project_remark(project_id: int, data: ProjectRemarkAdd, author_id:
         isInternal=data.isInternal
     )
     session.add(remark)
-    session.commit()
-    session.refresh(remark)
+    await session.commit()
+    await session.refresh(remark)
+    await entity_cache.invalidate('project', project_id)
     return remark
 
 @app.get("/interns")
-async def list_interns(session: Session = Depends(get_session)):
-    """List all users with role 'Intern'"""
-    statement = select(User).where(User.role == 'Intern')
-    users = session.exec(statement).all()
-    return {"interns": [{"id": u.id, "name": u.name, "email": u.email, "role": u.role} for u in users]}
+async def list_interns(cursor: Optional[str] = None, limit: int = LIST_PAGE_SIZE, session: AsyncSession = Depends(get_session)):
+    """List users with role 'Intern', one page at a time (cached)"""
+    async def load():
+        users, next_cursor = await fetch_page(crm_queries.list_users, session, limit, roles=['Intern'], cursor=cursor)
+        return {"interns": users, "next_cursor": next_cursor}
+    return await entity_cache.get_or_load('users', f"interns:{cursor}:{limit}", load)
 
 @app.post("/users")
-async def create_user(data: UserCreate, session: Session = Depends(get_session)):
+async def create_user(data: UserCreate, session: AsyncSession = Depends(get_session)):
     """Create a new user (Intern/Employee/Admin)"""
     # Check if user exists
     stmt = select(User).where(User.email == data.email)
-    existing = session.exec(stmt).first()
+    existing = (await session.exec(stmt)).first()
     if existing:
         raise HTTPException(status_code=400, detail="User already exists")
     
@@ -1069,24 +1813,29 @@ async def create_user(data: UserCreate, session: Session = Depends(get_session))
         role=data.role
     )
     session.add(new_user)
-    session.commit()
-    session.refresh(new_user)
+    await session.commit()
+    await session.refresh(new_user)
+    await entity_cache.invalidate('users')
     return new_user
 
 @app.delete("/users/{user_id}")
-async def delete_user(user_id: int, session: Session = Depends(get_session)):
+async def delete_user(user_id: int, session: AsyncSession = Depends(get_session)):
     """Delete a user"""
-    user = session.get(User, user_id)
+    user = await session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    session.delete(user)
-    session.commit()
+    await remove_user_memberships(session, user_id)
+    await session.delete(user)
+    await session.commit()
+    # Staff lists, plus any client or project detail that names the user
+    for namespace in ('users', 'client', 'project'):
+        await entity_cache.invalidate(namespace)
     return {"success": True}
 
 @app.patch("/clients/{client_id}")
-async def update_client_profile(client_id: int, data: ClientUpdate, session: Session = Depends(get_session)):
+async def update_client_profile(client_id: int, data: ClientUpdate, session: AsyncSession = Depends(get_session)):
     """Update specific fields of a client profile"""
-    profile = session.get(ClientProfile, client_id)
+    profile = await session.get(ClientProfile, client_id)
     if not profile:
         raise HTTPException(status_code=404, detail="Client not found")
         
@@ -1095,74 +1844,89 @@ async def update_client_profile(client_id: int, data: ClientUpdate, session: Ses
         setattr(profile, key, value)
         
     session.add(profile)
-    session.commit()
-    session.refresh(profile)
+    await session.commit()
+    await session.refresh(profile)
+    dashboard_cache.invalidate()
+    await entity_cache.invalidate('client', client_id)
     return profile
 
 @app.post("/clients/{client_id}/keywords")
-async def add_keyword(client_id: int, keyword: str = Body(..., embed=True), session: Session = Depends(get_session)):
-    """Add a target keyword to client profile"""
-    client = session.get(ClientProfile, client_id)
-    if not client:
+async def add_keyword(client_id: int, keyword: str = Body(..., embed=True), session: AsyncSession = Depends(get_session)):
+    """Add a target keyword to client profile (one row insert; concurrent adds all land)"""
+    keywords = request_keywords([keyword])
+    if not keywords:
+        raise HTTPException(status_code=400, detail="Keyword must not be empty")
+    keywords = await session.run_sync(add_client_keywords, client_id, keywords)
+    if keywords is None:
         raise HTTPException(status_code=404, detail="Client not found")
-        
-    current_keywords = list(client.targetKeywords) if client.targetKeywords else []
-    if keyword not in current_keywords:
-        current_keywords.append(keyword)
-        client.targetKeywords = current_keywords
-        session.add(client)
-        session.commit()
-        
-    return {"success": True, "keywords": client.targetKeywords}
+    await session.commit()
+    await entity_cache.invalidate('client', client_id)
+    return {"success": True, "keywords": keywords}
 
 @app.delete("/clients/{client_id}/keywords")
-async def remove_keyword(client_id: int, keyword: str = Body(..., embed=True), session: Session = Depends(get_session)):
-    """Remove a target keyword from client profile"""
-    client = session.get(ClientProfile, client_id)
-    if not client:
+async def remove_keyword(client_id: int, keyword: str = Body(..., embed=True), session: AsyncSession = Depends(get_session)):
+    """Remove a target keyword from client profile (one row delete)"""
+    keywords = await session.run_sync(remove_client_keywords, client_id, request_keywords([keyword]))
+    if keywords is None:
         raise HTTPException(status_code=404, detail="Client not found")
-        
-    current_keywords = list(client.targetKeywords) if client.targetKeywords else []
-    if keyword in current_keywords:
-        current_keywords.remove(keyword)
-        client.targetKeywords = current_keywords
-        session.add(client)
-        session.commit()
-        
-    return {"success": True, "keywords": client.targetKeywords}
+    await session.commit()
+    await entity_cache.invalidate('client', client_id)
+    return {"success": True, "keywords": keywords}
+
+@app.post("/clients/keywords/lookup")
+async def lookup_keywords(data: KeywordLookup, session: AsyncSession = Depends(get_session)):
+    """Which clients target each of a batch of keywords (count plus the first `limit` clients per keyword)"""
+    keywords = request_keywords(data.keywords)
+    if not keywords:
+        raise HTTPException(status_code=400, detail="Give at least one keyword")
+    if len(keywords) > KEYWORD_LOOKUP_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {KEYWORD_LOOKUP_MAX} keywords per lookup")
+    limit = max(1, min(data.limit, LIST_MAX_PAGE_SIZE))
+    return {"keywords": await crm_queries.clients_by_keywords(session, keywords, limit=limit)}
 
 @app.get("/clients/{client_id}")
-async def get_client_detail(client_id: int, session: Session = Depends(get_session)):
-    """Get detailed profile for a specific client"""
-    profile = session.get(ClientProfile, client_id)
-    if not profile:
+async def get_client_detail(client_id: int, session: AsyncSession = Depends(get_session)):
+    """Get detailed profile for a specific client (cached)"""
+    async def load():
+        profile = await session.get(ClientProfile, client_id, options=[selectinload(ClientProfile.user)])
+        if not profile:
+            return None
+
+        # Get assigned employee details
+        assigned_employee = None
+        if profile.assignedEmployeeId:
+            emp = await session.get(User, profile.assignedEmployeeId)
+            if emp:
+                assigned_employee = {"id": emp.id, "name": emp.name, "email": emp.email}
+
+        return {
+            "id": profile.id,
+            "companyName": profile.companyName,
+            "website": profile.websiteUrl,
+            "address": profile.address,
+            "phone": profile.phone,
+            "email": profile.user.email if profile.user else "",
+            "seoStrategy": profile.seoStrategy,
+            "tagline": profile.tagline,
+            "projectName": profile.projectName,
+            "gmbName": profile.gmbName,
+            "targetKeywords": profile.targetKeywords or [],
+            "assignedEmployee": assigned_employee,
+            "status": profile.status,
+            "recommended_services": profile.recommended_services,
+            "nextMilestone": profile.nextMilestone,
+            "nextMilestoneDate": profile.nextMilestoneDate
+        }
+
+    detail = await entity_cache.get_or_load('client', client_id, load)
+    if detail is None:
         raise HTTPException(status_code=404, detail="Client not found")
-    
-    # Get assigned employee details
-    assigned_employee = None
-    if profile.assignedEmployeeId:
-        emp = session.get(User, profile.assignedEmployeeId)
-        if emp:
-            assigned_employee = {"id": emp.id, "name": emp.name, "email": emp.email}
+    return detail
 
-    return {
-        "id": profile.id,
-        "companyName": profile.companyName,
-        "website": profile.websiteUrl,
-        "address": profile.address,
-        "phone": profile.phone,
-        "email": profile.user.email if profile.user else "",
-        "seoStrategy": profile.seoStrategy,
-        "tagline": profile.tagline,
-        "projectName": profile.projectName,
-        "gmbName": profile.gmbName,
-        "targetKeywords": profile.targetKeywords or [],
-        "assignedEmployee": assigned_employee,
-        "status": profile.status,
-        "recommended_services": profile.recommended_services,
-        "nextMilestone": profile.nextMilestone,
-        "nextMilestoneDate": profile.nextMilestoneDate
-    }
+@app.get("/cache-stats")
+async def get_cache_stats():
+    """Entity cache hit rate, size and evictions (overall and per namespace)"""
+    return entity_cache.stats()
 
 # ============================================================================
 # DOCUMENT OCR ROUTES
@@ -1170,30 +1934,83 @@ async def get_client_detail(client_id: int, session: Session = Depends(get_sessi
 
 from modules.llm_engine import analyze_document
 
+def serialize_document(document: Document) -> dict:
+    """Shape a Document row for the API, decoding its stored OCR result"""
+    return {
+        "id": document.id,
+        "filename": document.filename,
+        "fileUrl": document.fileUrl,
+        "contentHash": document.contentHash,
+        "status": document.status,
+        "clientId": document.clientId,
+        "result": document_result(document),
+        "createdAt": document.createdAt.isoformat()
+    }
+
 @app.post("/documents/ocr")
-async def ocr_document(file: UploadFile = File(...), session: Session = Depends(get_session)):
-    """Upload an image and extract details using OCR"""
+async def ocr_document(file: UploadFile = File(...), session: AsyncSession = Depends(get_session)):
+    """Upload an image and extract details using OCR (re-uploads are served from the Document table)"""
     try:
         contents = await file.read()
-        result = analyze_document(contents)
+        _, result, _ = await ocr_image(contents, filename=file.filename, session=session)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/documents/ocr/batch")
+async def ocr_documents_batch(files: List[UploadFile] = File(...)):
+    """
+    Upload many card images (or zip archives of them) and stream OCR results back
+    as newline-delimited JSON, one record per image as soon as it is done.
+    """
+    images = []
+    for upload in files:
+        contents = await upload.read()
+        try:
+            images.extend(expand_upload(upload.filename, contents))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Could not read {upload.filename}: {e}")
+
+    async def stream_results():
+        # The request-scoped session is closed before a streamed body is sent, and concurrent
+        # images cannot share one AsyncSession: every lookup/update opens its own
+        session_factory = lambda: AsyncSession(async_engine, expire_on_commit=False)
+        async for item in ocr_images(images, concurrency=OCR_BATCH_CONCURRENCY, session_factory=session_factory):
+            yield json.dumps(item) + "\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@app.get("/documents/by-hash/{content_hash}")
+async def get_document_by_content_hash(content_hash: str, session: AsyncSession = Depends(get_session)):
+    """Look up a previously uploaded card by the SHA-256 of its image"""
+    document = await session.run_sync(get_document_by_hash, content_hash.lower())
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return serialize_document(document)
+
+@app.get("/documents/{document_id}")
+async def get_document(document_id: int, session: AsyncSession = Depends(get_session)):
+    """Get a stored document and its OCR result without re-running OCR"""
+    document = await session.get(Document, document_id)
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return serialize_document(document)
+
 @app.post("/clients")
 async def create_client(
     data: ClientCreate,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Manually create a new client and user"""
+    target_keywords = request_keywords(data.targetKeywords) # Checked before anything is written
     # 1. Ensure User exists
     user_stmt = select(User).where(User.email == data.email)
-    user = session.exec(user_stmt).first()
+    user = (await session.exec(user_stmt)).first()
     if not user:
         user = User(email=data.email, password="password123", name=data.companyName, role="Client")
         session.add(user)
-        session.commit()
-        session.refresh(user)
+        await session.commit()
+        await session.refresh(user)
     
     # 2. Create Profile
     profile = ClientProfile(
@@ -1206,12 +2023,22 @@ async def create_client(
         gmbName=data.gmbName,
         seoStrategy=data.seoStrategy,
         tagline=data.tagline,
-        recommended_services=data.recommended_services,
-        targetKeywords=data.targetKeywords or []
+        recommended_services=data.recommended_services
     )
     session.add(profile)
-    session.commit()
-    session.refresh(profile)
+    await session.flush()
+    await session.run_sync(set_client_keywords, profile.id, target_keywords)
+    await session.commit()
+    await session.refresh(profile)
+    dashboard_cache.invalidate()
+    
+    # 3. Link the business card this client was created from
+    if data.documentId:
+        document = await session.get(Document, data.documentId)
+        if document:
+            document.clientId = profile.id
+            session.add(document)
+            await session.commit()
     
     return {"id": profile.id, "companyName": profile.companyName, "status": "created"}
 
@@ -1219,7 +2046,7 @@ async def create_client(
 async def add_client_activity(
     client_id: int,
     data: ActivityAdd,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Add a manual activity for a client"""
     activity = ActivityLog(
@@ -1231,29 +2058,29 @@ async def add_client_activity(
         createdAt=datetime.utcnow()
     )
     session.add(activity)
-    session.commit()
+    await session.run_sync(record_client_metrics, client_id, activities=1, at=activity.createdAt)
+    await session.commit()
     return {"success": True}
 
 @app.get("/clients/{client_id}/activities")
 async def get_client_activities(
     client_id: int, 
     limit: int = 50,
-    session: Session = Depends(get_session)
+    method: Optional[str] = None,
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_session)
 ):
-    """Get activities for a specific client with pagination"""
-    statement = select(ActivityLog).where(ActivityLog.clientId == client_id).order_by(ActivityLog.createdAt.desc()).limit(limit)
-    activities = session.exec(statement).all()
-    return {"activities": [
-        {
-            "id": a.id,
-            "method": a.method,
-            "content": a.content,
-            "createdAt": a.createdAt.isoformat()
-        } for a in activities
-    ]}
+    """Get activities for a specific client with pagination (newest first, follow next_cursor)"""
+    activities, next_cursor = await fetch_page(
+        crm_queries.client_activities, session, limit, client_id=client_id, method=method, cursor=cursor
+    )
+    return {
+        "activities": [{**a, "createdAt": a['createdAt'].isoformat()} for a in activities],
+        "next_cursor": next_cursor
+    }
 
 @app.post("/clients/{client_id}/remarks")
-async def add_remark(client_id: int, data: RemarkAdd, session: Session = Depends(get_session)):
+async def add_remark(client_id: int, data: RemarkAdd, session: AsyncSession = Depends(get_session)):
     """Add a remark for a client"""
     remark = Remark(
         content=data.content,
@@ -1262,35 +2089,32 @@ async def add_remark(client_id: int, data: RemarkAdd, session: Session = Depends
         isInternal=True
     )
     session.add(remark)
-    session.commit()
+    await session.commit()
     return {"success": True}
 
 @app.get("/clients/{client_id}/remarks")
 async def get_client_remarks(
     client_id: int, 
     limit: int = 50,
-    session: Session = Depends(get_session)
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_session)
 ):
-    """Get remarks for a specific client with pagination"""
-    statement = select(Remark).where(Remark.clientId == client_id).order_by(Remark.createdAt.desc()).limit(limit)
-    remarks = session.exec(statement).all()
-    return {"remarks": [
-        {
-            "id": r.id,
-            "content": r.content,
-            "createdAt": r.createdAt.isoformat()
-        } for r in remarks
-    ]}
+    """Get remarks for a specific client with pagination (newest first, follow next_cursor)"""
+    remarks, next_cursor = await fetch_page(crm_queries.client_remarks, session, limit, client_id=client_id, cursor=cursor)
+    return {
+        "remarks": [{**r, "createdAt": r['createdAt'].isoformat()} for r in remarks],
+        "next_cursor": next_cursor
+    }
 
 
 @app.post("/clients/{client_id}/send-email")
 async def send_client_email(
     client_id: int,
     data: EmailSend,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Send an email to a client and log it as an activity"""
-    profile = session.get(ClientProfile, client_id)
+    profile = await session.get(ClientProfile, client_id, options=[selectinload(ClientProfile.user)])
     if not profile or not profile.user:
         raise HTTPException(status_code=404, detail="Client or user not found")
     
@@ -1308,7 +2132,8 @@ async def send_client_email(
         createdAt=datetime.utcnow()
     )
     session.add(activity)
-    session.commit()
+    await session.run_sync(record_client_metrics, client_id, activities=1, at=activity.createdAt)
+    await session.commit()
     
     return {"success": True}
 
@@ -0,0 +1,29 @@
+"""
+Apply pending schema migrations (run as a deploy step before starting the app).
+
+    python migrate.py            # apply everything pending
+    python migrate.py --status   # show the current and latest version only
+"""
+import sys
+
+from database import engine
+from modules.migrations import migrate, current_version, LATEST_VERSION, MIGRATIONS
+
+
+def main():
+    version = current_version(engine)
+    print(f"Schema version {version} (latest {LATEST_VERSION})")
+    if '--status' in sys.argv:
+        for number, description, _ in MIGRATIONS:
+            print(f"  {'✓' if number <= version else ' '} {number}: {description}")
+        return
+
+    applied = migrate(engine)
+    if applied:
+        print(f"✅ Applied migrations {', '.join(map(str, applied))}; schema is at version {LATEST_VERSION}")
+    else:
+        print("✅ Schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
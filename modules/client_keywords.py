@@ -0,0 +1,126 @@
+"""
+Client target keyword writes and the one-time move off the JSON list.
+
+Keywords live in client_keywords, one row per (client, keyword), with a
+(keyword, clientId) index, so "which clients target K" is an index lookup and
+adding or removing one keyword is a single-row INSERT/DELETE instead of
+rewriting the whole list. ClientProfile.targetKeywords is kept as an ordered
+copy for the read paths (lists, detail, dashboard, search); it is only
+written here, under the client row's lock, so concurrent edits never lose
+each other's keywords.
+"""
+import json
+
+from sqlalchemy import text
+from sqlmodel import Session, select, update, delete, func
+
+from database import ClientKeyword, ClientProfile
+
+KEYWORD_MAX_LENGTH = 255 # client_keywords.keyword column size
+
+
+class InvalidKeywordError(ValueError):
+    """Raised for a keyword that does not fit the client_keywords.keyword column"""
+    pass
+
+
+def clean_keywords(keywords):
+    """Stripped, non-empty, first occurrence wins. Raises InvalidKeywordError for one over KEYWORD_MAX_LENGTH."""
+    cleaned = list(dict.fromkeys(k.strip() for k in keywords or [] if isinstance(k, str) and k.strip()))
+    for keyword in cleaned:
+        if len(keyword) > KEYWORD_MAX_LENGTH:
+            raise InvalidKeywordError(f"Keyword longer than {KEYWORD_MAX_LENGTH} characters: {keyword[:40]}...")
+    return cleaned
+
+
+def _lock_client(session, client_id):
+    """
+    Locks the client row for the rest of the transaction (a no-op UPDATE: a row lock
+    on Postgres, the write lock on SQLite). False if the client does not exist.
+    """
+    result = session.exec(
+        update(ClientProfile).where(ClientProfile.id == client_id).values(targetKeywords=ClientProfile.targetKeywords)
+    )
+    return result.rowcount > 0
+
+
+def _keywords(session, client_id):
+    return list(session.exec(
+        select(ClientKeyword.keyword).where(ClientKeyword.clientId == client_id).order_by(ClientKeyword.position)
+    ).all())
+
+
+def _store(session, client_id):
+    """Rewrites the profile's targetKeywords copy from the table and returns it"""
+    keywords = _keywords(session, client_id)
+    session.exec(update(ClientProfile).where(ClientProfile.id == client_id).values(targetKeywords=keywords))
+    return keywords
+
+
+def add_client_keywords(session, client_id, keywords):
+    """
+    Adds keywords a client does not have yet, in the caller's transaction (no commit).
+    Returns the client's keywords, or None if the client does not exist.
+    """
+    if not _lock_client(session, client_id):
+        return None
+    existing = set(_keywords(session, client_id))
+    position = session.exec(
+        select(func.coalesce(func.max(ClientKeyword.position), -1)).where(ClientKeyword.clientId == client_id)
+    ).one()
+    for keyword in clean_keywords(keywords):
+        if keyword not in existing:
+            position += 1
+            session.add(ClientKeyword(clientId=client_id, keyword=keyword, position=position))
+    session.flush()
+    return _store(session, client_id)
+
+
+def remove_client_keywords(session, client_id, keywords):
+    """Removes keywords from a client (no commit). Returns the rest, or None if the client does not exist."""
+    if not _lock_client(session, client_id):
+        return None
+    session.exec(
+        delete(ClientKeyword).where(ClientKeyword.clientId == client_id, ClientKeyword.keyword.in_(clean_keywords(keywords)))
+    )
+    return _store(session, client_id)
+
+
+def set_client_keywords(session, client_id, keywords):
+    """Replaces a client's keywords (no commit). Returns them, or None if the client does not exist."""
+    if not _lock_client(session, client_id):
+        return None
+    session.exec(delete(ClientKeyword).where(ClientKeyword.clientId == client_id))
+    session.add_all([
+        ClientKeyword(clientId=client_id, keyword=keyword, position=position)
+        for position, keyword in enumerate(clean_keywords(keywords))
+    ])
+    session.flush()
+    return _store(session, client_id)
+
+
+def backfill_client_keywords(engine):
+    """
+    Copies every profile's targetKeywords JSON list into client_keywords, once
+    (while the table is still empty). Returns how many keywords were written.
+    """
+    with Session(engine) as session:
+        if session.exec(select(ClientKeyword.clientId).limit(1)).first() is not None:
+            return 0
+
+        written = 0
+        for client_id, keywords in session.exec(text('SELECT id, "targetKeywords" FROM client_profiles')).all():
+            # JSON columns come back parsed on Postgres and as text on SQLite
+            keywords = json.loads(keywords) if isinstance(keywords, str) else keywords
+            keywords = keywords if isinstance(keywords, list) else []
+            too_long = [k for k in keywords if isinstance(k, str) and len(k.strip()) > KEYWORD_MAX_LENGTH]
+            if too_long:
+                print(f"⚠️ Client {client_id}: skipping {len(too_long)} keyword(s) over {KEYWORD_MAX_LENGTH} characters")
+            keywords = clean_keywords([k for k in keywords if k not in too_long])
+            session.add_all([
+                ClientKeyword(clientId=client_id, keyword=keyword, position=position)
+                for position, keyword in enumerate(keywords)
+            ])
+            written += len(keywords)
+        session.commit()
+        return written
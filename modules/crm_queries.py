@@ -0,0 +1,256 @@
+"""
+Read queries behind the CRM list endpoints.
+
+Each function selects only the columns its endpoint returns (joining what it
+needs up front), so a list costs a fixed number of queries however many rows
+it has, and never loads columns like users.password.
+
+Lists are paged by keyset: rows are ordered by (createdAt, id) - or id alone
+where the table has no creation time - and a page returns an opaque cursor
+holding its last row's sort key. The next page starts strictly after it, so
+paging stays one index range scan however deep it goes, and rows inserted
+meanwhile never shift or repeat a page.
+"""
+import json
+import uuid
+import base64
+from datetime import datetime
+
+from sqlmodel import select, and_, or_, func
+from sqlalchemy import union_all, literal, null
+
+from database import User, ClientProfile, ClientKeyword, Project, ProjectMember, ProjectClient, Remark, ActivityLog, Company
+
+
+class InvalidCursorError(ValueError):
+    """Raised for a ?cursor= token that was not issued by this API"""
+    pass
+
+
+def _rows(result):
+    return [dict(row._mapping) for row in result.all()]
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _decode_value(column, value):
+    python_type = column.type.python_type
+    if value is None or isinstance(value, python_type):
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values):
+    raw = json.dumps([_encode_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, keys):
+    """Sort-key values of a cursor token, typed like the `keys` columns"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("wrong number of values")
+        return [_decode_value(column, value) for column, value in zip(keys, values)]
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid cursor ({e.__class__.__name__})")
+
+
+def _after(keys, values, descending):
+    """Rows strictly past `values` in (keys...) order, as plain comparisons (index-friendly everywhere)"""
+    column, value = keys[0], values[0]
+    past = column < value if descending else column > value
+    if len(keys) == 1:
+        return past
+    return or_(past, and_(column == value, _after(keys[1:], values[1:], descending)))
+
+
+async def keyset_page(session, statement, keys, cursor=None, limit=50, descending=False):
+    """
+    Runs one page of `statement` ordered by `keys` (also used by modules/search.py).
+    Returns (rows, next cursor), the cursor being None on the last page.
+    """
+    if cursor:
+        statement = statement.where(_after(keys, decode_cursor(cursor, keys), descending))
+    statement = statement.order_by(*[key.desc() if descending else key for key in keys]).limit(limit + 1)
+    rows = _rows(await session.exec(statement))
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([rows[-1][key.key] for key in keys])
+
+
+async def list_clients(session, status=None, employee_id=None, project_id=None, keyword=None, cursor=None, limit=50):
+    """
+    Client profiles with their login email (one joined query), filtered by status,
+    assigned employee, project and target keyword. Paged by id (profiles carry no creation time).
+    """
+    statement = (
+        select(
+            ClientProfile.id,
+            ClientProfile.projectName,
+            ClientProfile.companyName,
+            ClientProfile.seoStrategy,
+            ClientProfile.status,
+            ClientProfile.targetKeywords,
+            ClientProfile.websiteUrl,
+            User.email
+        )
+        .outerjoin(User, User.id == ClientProfile.userId)
+    )
+    if status and status != 'All':
+        statement = statement.where(ClientProfile.status == status)
+    if employee_id is not None:
+        statement = statement.where(ClientProfile.assignedEmployeeId == employee_id)
+    if project_id is not None:
+        statement = statement.where(ClientProfile.projectId == project_id)
+    if keyword:
+        statement = statement.where(
+            ClientProfile.id.in_(select(ClientKeyword.clientId).where(ClientKeyword.keyword == keyword))
+        )
+    return await keyset_page(session, statement, [ClientProfile.id], cursor, limit)
+
+
+async def clients_by_keywords(session, keywords, limit=100):
+    """
+    {keyword: {count, clients}} for a batch of keywords: how many clients target each,
+    and the first `limit` of them (by id). Two index-only queries on client_keywords.
+    """
+    result = {keyword: {"count": 0, "clients": []} for keyword in keywords}
+    if not keywords:
+        return result
+    counts = select(ClientKeyword.keyword, func.count()).where(ClientKeyword.keyword.in_(keywords)).group_by(ClientKeyword.keyword)
+    for keyword, count in (await session.exec(counts)).all():
+        result[keyword]["count"] = count
+
+    ranked = select(
+        ClientKeyword.keyword,
+        ClientKeyword.clientId,
+        func.row_number().over(partition_by=ClientKeyword.keyword, order_by=ClientKeyword.clientId).label('n')
+    ).where(ClientKeyword.keyword.in_(keywords)).subquery()
+    statement = (
+        select(ranked.c.keyword, ClientProfile.id, ClientProfile.companyName, ClientProfile.status)
+        .join(ClientProfile, ClientProfile.id == ranked.c.clientId)
+        .where(ranked.c.n <= limit)
+        .order_by(ranked.c.keyword, ClientProfile.id)
+    )
+    for row in _rows(await session.exec(statement)):
+        result[row.pop('keyword')]["clients"].append(row)
+    return result
+
+
+async def list_users(session, roles, cursor=None, limit=50):
+    """id, name, email and role of the users with one of `roles`, oldest first"""
+    statement = select(User.id, User.name, User.email, User.role, User.createdAt).where(User.role.in_(roles))
+    return await keyset_page(session, statement, [User.createdAt, User.id], cursor, limit)
+
+
+def _membership_rows(project_ids):
+    """(projectId, role, id) of every member and client of the projects, as one UNION ALL"""
+    return union_all(
+        select(ProjectMember.projectId, ProjectMember.role, ProjectMember.userId)
+        .where(ProjectMember.projectId.in_(project_ids)),
+        select(ProjectClient.projectId, literal('Client'), ProjectClient.clientId)
+        .where(ProjectClient.projectId.in_(project_ids))
+    )
+
+
+_ROLE_FIELDS = {'Employee': 'employeeIds', 'Intern': 'internIds', 'Client': 'clientIds'}
+
+
+async def project_membership(session, project_ids):
+    """{project id: {employeeIds, internIds, clientIds}} for a list of projects, in one query"""
+    membership = {project_id: {field: [] for field in _ROLE_FIELDS.values()} for project_id in project_ids}
+    if project_ids:
+        for project_id, role, member_id in sorted((await session.exec(_membership_rows(project_ids))).all()):
+            membership[project_id][_ROLE_FIELDS[role]].append(member_id)
+    return membership
+
+
+async def list_projects(session, status=None, member_id=None, client_id=None, cursor=None, limit=50):
+    """
+    Every project column plus its membership lists, oldest first, filtered by
+    status, team member (user id) and client. Two queries per page.
+    """
+    statement = select(*Project.__table__.columns)
+    if status and status != 'All':
+        statement = statement.where(Project.status == status)
+    if member_id is not None:
+        statement = statement.where(Project.id.in_(select(ProjectMember.projectId).where(ProjectMember.userId == member_id)))
+    if client_id is not None:
+        statement = statement.where(Project.id.in_(select(ProjectClient.projectId).where(ProjectClient.clientId == client_id)))
+    projects, next_cursor = await keyset_page(session, statement, [Project.createdAt, Project.id], cursor, limit)
+    membership = await project_membership(session, [project['id'] for project in projects])
+    return [{**project, **membership[project['id']]} for project in projects], next_cursor
+
+
+async def project_team(session, project_id):
+    """
+    Membership lists plus team member details of one project, in one query.
+    Returns (membership, {'employees': [...], 'interns': [...]}).
+    """
+    members = (
+        select(ProjectMember.role, ProjectMember.userId.label('id'), User.name, User.email)
+        .join(User, User.id == ProjectMember.userId)
+        .where(ProjectMember.projectId == project_id)
+    )
+    clients = (
+        select(literal('Client'), ProjectClient.clientId, null(), null())
+        .where(ProjectClient.projectId == project_id)
+    )
+    membership = {field: [] for field in _ROLE_FIELDS.values()}
+    team = {'employees': [], 'interns': []}
+    for role, member_id, name, email in sorted((await session.exec(union_all(members, clients))).all(), key=lambda r: (r[0], r[1])):
+        membership[_ROLE_FIELDS[role]].append(member_id)
+        if role != 'Client':
+            team['employees' if role == 'Employee' else 'interns'].append({'id': member_id, 'name': name, 'email': email})
+    return membership, team
+
+
+async def project_remarks(session, project_id):
+    statement = (
+        select(*Remark.__table__.columns)
+        .where(Remark.projectId == project_id)
+        .order_by(Remark.createdAt.desc())
+    )
+    return _rows(await session.exec(statement))
+
+
+async def client_activities(session, client_id, method=None, cursor=None, limit=50):
+    """A client's activity log, newest first"""
+    statement = (
+        select(ActivityLog.id, ActivityLog.method, ActivityLog.content, ActivityLog.createdAt)
+        .where(ActivityLog.clientId == client_id)
+    )
+    if method:
+        statement = statement.where(ActivityLog.method == method)
+    return await keyset_page(session, statement, [ActivityLog.createdAt, ActivityLog.id], cursor, limit, descending=True)
+
+
+async def client_remarks(session, client_id, cursor=None, limit=50):
+    """A client's remarks, newest first"""
+    statement = select(Remark.id, Remark.content, Remark.createdAt).where(Remark.clientId == client_id)
+    return await keyset_page(session, statement, [Remark.createdAt, Remark.id], cursor, limit, descending=True)
+
+
+async def recent_companies(session, sent=None, cursor=None, limit=10):
+    """Latest Company rows for the outreach activity feed (`sent` filters on email_sent_status)"""
+    statement = select(
+        Company.id,
+        Company.company_name,
+        Company.website_url,
+        Company.primary_email,
+        Company.recommended_services,
+        Company.created_at
+    )
+    if sent is not None:
+        statement = statement.where(Company.email_sent_status == sent)
+    return await keyset_page(session, statement, [Company.created_at, Company.id], cursor, limit, descending=True)
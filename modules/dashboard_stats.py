@@ -0,0 +1,194 @@
+"""
+Dashboard aggregates.
+
+Per-client email and activity totals live in a daily rollup (client_metrics_daily)
+bumped in the same transaction as each EmailLog/ActivityLog write, so the dashboard
+sums a handful of rollup rows instead of counting the logs.
+"""
+import time
+import threading
+from datetime import datetime, date, timedelta
+
+from sqlmodel import Session, select, func, update, case
+from sqlalchemy.exc import IntegrityError
+
+from database import ClientMetricsDaily, ClientProfile, User, ActivityLog, EmailLog, Company, OutboundEmail
+
+
+class StatsCache:
+    """
+    Short-lived in-process cache for dashboard aggregates. Writers call
+    invalidate(); other workers see changes once `ttl_seconds` runs out.
+    """
+
+    def __init__(self, ttl_seconds=30):
+        self.ttl = ttl_seconds
+        self._entries = {} # key -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.monotonic():
+                return entry[0]
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# ----------------------------------------------------------------------
+# Rollup maintenance
+# ----------------------------------------------------------------------
+
+def record_client_metrics(session, client_id, sent=0, failed=0, activities=0, at=None):
+    """
+    Adds to a client's rollup row for the day, in the caller's transaction (no commit).
+    """
+    if not client_id or not (sent or failed or activities):
+        return
+    at = at or datetime.utcnow()
+    where = (ClientMetricsDaily.clientId == client_id, ClientMetricsDaily.day == at.date())
+    values = {
+        'emailsSent': ClientMetricsDaily.emailsSent + sent,
+        'emailsFailed': ClientMetricsDaily.emailsFailed + failed,
+        'activities': ClientMetricsDaily.activities + activities
+    }
+    if activities:
+        values['lastActivityAt'] = at
+
+    bumped = session.exec(update(ClientMetricsDaily).where(*where).values(**values))
+    if bumped.rowcount:
+        return
+    try:
+        with session.begin_nested():
+            session.add(ClientMetricsDaily(
+                clientId=client_id,
+                day=at.date(),
+                emailsSent=sent,
+                emailsFailed=failed,
+                activities=activities,
+                lastActivityAt=at if activities else None
+            ))
+    except IntegrityError:
+        # Another request created the day's row first
+        session.exec(update(ClientMetricsDaily).where(*where).values(**values))
+
+
+def _day(value):
+    # func.date() is a date on Postgres and an ISO string on SQLite
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def backfill_client_metrics(engine):
+    """
+    Builds the rollup from ActivityLog, EmailLog and failed queued emails when it is
+    empty (first start after upgrading). Returns how many rows were written.
+    """
+    with Session(engine) as session:
+        if session.exec(select(ClientMetricsDaily.clientId).limit(1)).first() is not None:
+            return 0
+
+        rows = {}
+
+        def row(client_id, day):
+            key = (client_id, _day(day))
+            if key not in rows:
+                rows[key] = ClientMetricsDaily(clientId=client_id, day=key[1])
+            return rows[key]
+
+        activity_day = func.date(ActivityLog.createdAt)
+        for client_id, day, count, last in session.exec(
+            select(ActivityLog.clientId, activity_day, func.count(), func.max(ActivityLog.createdAt))
+            .where(ActivityLog.clientId != None)
+            .group_by(ActivityLog.clientId, activity_day)
+        ).all():
+            entry = row(client_id, day)
+            entry.activities, entry.lastActivityAt = count, last
+
+        # EmailLog has no client column: the client is the profile whose login is the recipient
+        sent_day = func.date(EmailLog.sent_at)
+        for client_id, day, count in session.exec(
+            select(ClientProfile.id, sent_day, func.count())
+            .select_from(EmailLog)
+            .join(Company, Company.id == EmailLog.company_id)
+            .join(User, User.email == Company.primary_email)
+            .join(ClientProfile, ClientProfile.userId == User.id)
+            .group_by(ClientProfile.id, sent_day)
+        ).all():
+            row(client_id, day).emailsSent = count
+
+        failed_day = func.date(func.coalesce(OutboundEmail.claimedAt, OutboundEmail.createdAt))
+        for client_id, day, count in session.exec(
+            select(OutboundEmail.clientId, failed_day, func.count())
+            .where(OutboundEmail.status == 'Failed', OutboundEmail.clientId != None)
+            .group_by(OutboundEmail.clientId, failed_day)
+        ).all():
+            row(client_id, day).emailsFailed = count
+
+        session.add_all(rows.values())
+        session.commit()
+        return len(rows)
+
+
+# ----------------------------------------------------------------------
+# Reads
+# ----------------------------------------------------------------------
+
+def _metrics(sent, failed, activities, recent_sent, last_activity_at):
+    sent, failed = int(sent or 0), int(failed or 0)
+    attempted = sent + failed
+    return {
+        'successRate': f"{100 * sent / attempted:.1f}%" if attempted else "0%",
+        'successful': sent,
+        'failed': failed,
+        'activities': int(activities or 0),
+        'sentLast30Days': int(recent_sent or 0),
+        'lastActivityAt': last_activity_at.isoformat() if last_activity_at else None
+    }
+
+
+def _metric_columns(today):
+    since = today - timedelta(days=30)
+    return (
+        func.sum(ClientMetricsDaily.emailsSent),
+        func.sum(ClientMetricsDaily.emailsFailed),
+        func.sum(ClientMetricsDaily.activities),
+        func.sum(case((ClientMetricsDaily.day > since, ClientMetricsDaily.emailsSent), else_=0)),
+        func.max(ClientMetricsDaily.lastActivityAt)
+    )
+
+
+async def client_status_counts(session):
+    """{status: client count} in one GROUP BY"""
+    rows = (await session.exec(
+        select(ClientProfile.status, func.count(ClientProfile.id)).group_by(ClientProfile.status)
+    )).all()
+    return {status: count for status, count in rows}
+
+
+async def overview(session):
+    """Admin dashboard: client counts by status and email/activity totals over every client"""
+    counts = await client_status_counts(session)
+    totals = (await session.exec(select(*_metric_columns(datetime.utcnow().date())))).one()
+    return {
+        "total": sum(counts.values()),
+        "active": counts.get('Active', 0),
+        "pending": counts.get('Pending', 0),
+        "hold": counts.get('Hold', 0),
+        "completedActivities": int(totals[0] or 0),
+        "metrics": _metrics(*totals)
+    }
+
+
+async def client_metrics(session, client_id):
+    """One client's totals from its rollup rows"""
+    totals = (await session.exec(
+        select(*_metric_columns(datetime.utcnow().date())).where(ClientMetricsDaily.clientId == client_id)
+    )).one()
+    return _metrics(*totals)
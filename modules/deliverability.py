@@ -0,0 +1,172 @@
+import re
+import time
+import socket
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Practical address shape (not full RFC 5322): dot-atom local part, dotted hostname with an alphabetic TLD
+EMAIL_PATTERN = re.compile(
+    r"^(?P<local>[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*)"
+    r"@(?P<domain>(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,63})$"
+)
+
+# Scraped/OCR'd "addresses" like logo@2x.png are asset filenames, not mailboxes
+FILE_EXTENSION_TLDS = {
+    'png', 'jpg', 'jpeg', 'gif', 'webp', 'svg', 'bmp', 'ico', 'tif', 'tiff', 'avif', 'heic',
+    'css', 'js', 'json', 'pdf', 'zip', 'mp4', 'webm', 'woff', 'woff2', 'ttf', 'php', 'html', 'htm'
+}
+
+
+class DeliverabilityLookupError(Exception):
+    """Raised by a resolver when DNS could not give an answer (timeout, no nameservers)"""
+    pass
+
+
+def dns_mx_resolver(domain):
+    """
+    Returns the mail hosts for a domain, best preference first; [] when the domain
+    does not exist or does not accept mail. Uses dnspython when installed, otherwise
+    falls back to an address lookup (a domain without MX receives mail on its A record).
+    """
+    try:
+        import dns.resolver
+        import dns.exception
+    except ImportError:
+        try:
+            socket.getaddrinfo(domain, 25, proto=socket.IPPROTO_TCP)
+            return [domain]
+        except socket.gaierror as e:
+            if e.errno in (socket.EAI_NONAME, getattr(socket, 'EAI_NODATA', socket.EAI_NONAME)):
+                return []
+            raise DeliverabilityLookupError(str(e))
+
+    try:
+        answer = dns.resolver.resolve(domain, 'MX', lifetime=5)
+        hosts = [str(r.exchange).rstrip('.') for r in sorted(answer, key=lambda r: r.preference)]
+        # Null MX (RFC 7505): the domain explicitly accepts no mail
+        return [host for host in hosts if host]
+    except dns.resolver.NXDOMAIN:
+        return []
+    except dns.resolver.NoAnswer:
+        # No MX record: mail goes to the domain's address records, if any
+        for record_type in ('A', 'AAAA'):
+            try:
+                dns.resolver.resolve(domain, record_type, lifetime=5)
+                return [domain]
+            except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
+                continue
+        return []
+    except dns.exception.DNSException as e:
+        raise DeliverabilityLookupError(str(e))
+
+
+def check_syntax(email):
+    """
+    Returns (normalized address, None) or (address, reason) when it cannot be a mailbox.
+    """
+    email = (email or '').strip().strip('<>').strip()
+    if not email:
+        return email, 'empty'
+    match = EMAIL_PATTERN.match(email)
+    if not match or len(email) > 254 or len(match.group('local')) > 64:
+        return email, 'invalid_syntax'
+    domain = match.group('domain').lower()
+    if domain.rsplit('.', 1)[-1] in FILE_EXTENSION_TLDS:
+        return email, 'looks_like_filename'
+    return f"{match.group('local')}@{domain}", None
+
+
+class DeliverabilityChecker:
+    """
+    Pre-send address check: syntax first, then whether the domain has a mail
+    server (MX, or an address record as implicit MX).
+
+    DNS answers are cached per domain for `ttl_seconds` (`negative_ttl_seconds`
+    for domains without mail), so a bulk run resolves each domain once. A DNS
+    failure (timeout etc.) is not cached and does not block the send; the result
+    is marked unverified instead. `resolver` is callable(domain) -> [mail hosts]
+    and can be swapped for a stub in tests.
+    """
+
+    def __init__(self, resolver=None, ttl_seconds=3600, negative_ttl_seconds=600, max_entries=10000, lookup_concurrency=8):
+        self.resolver = resolver or dns_mx_resolver
+        self.ttl = ttl_seconds
+        self.negative_ttl = negative_ttl_seconds
+        self.max_entries = max_entries
+        self.lookup_concurrency = lookup_concurrency
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict() # domain -> (mail hosts, expires_at)
+        self._lock = threading.Lock()
+
+    def _cached(self, domain):
+        with self._lock:
+            entry = self._entries.get(domain)
+            if entry and entry[1] > time.monotonic():
+                self._entries.move_to_end(domain)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def mail_hosts(self, domain):
+        """
+        Mail hosts for a domain, from the cache or the resolver.
+        Raises DeliverabilityLookupError when DNS gave no answer.
+        """
+        hosts = self._cached(domain)
+        if hosts is not None:
+            return hosts
+        hosts = list(self.resolver(domain))
+        with self._lock:
+            self._entries[domain] = (hosts, time.monotonic() + (self.ttl if hosts else self.negative_ttl))
+            self._entries.move_to_end(domain)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return hosts
+
+    def _lookup(self, domain):
+        """Returns (mail hosts, None) or (None, error) without raising"""
+        try:
+            return self.mail_hosts(domain), None
+        except Exception as e:
+            print(f"MX lookup failed for {domain}: {e}")
+            return None, e
+
+    def _verdict(self, email, reason, lookup=None):
+        if reason:
+            return {'email': email, 'deliverable': False, 'verified': True, 'reason': reason, 'mx': []}
+        hosts, error = lookup
+        if error is not None:
+            return {'email': email, 'deliverable': True, 'verified': False, 'reason': 'lookup_failed', 'mx': []}
+        if not hosts:
+            return {'email': email, 'deliverable': False, 'verified': True, 'reason': 'no_mail_server', 'mx': []}
+        return {'email': email, 'deliverable': True, 'verified': True, 'reason': None, 'mx': hosts}
+
+    def check(self, email):
+        """
+        Returns {email, deliverable, verified, reason, mx} for one address.
+        """
+        email, reason = check_syntax(email)
+        return self._verdict(email, reason, None if reason else self._lookup(email.rsplit('@', 1)[1]))
+
+    def check_many(self, emails):
+        """
+        Checks many addresses; each distinct domain is looked up once (in parallel).
+        Results are in input order.
+        """
+        parsed = [check_syntax(email) for email in emails]
+        domains = list({email.rsplit('@', 1)[1] for email, reason in parsed if not reason})
+        lookups = {}
+        if domains:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.lookup_concurrency, len(domains)))) as pool:
+                lookups = dict(zip(domains, pool.map(self._lookup, domains)))
+        return [
+            self._verdict(email, reason, None if reason else lookups[email.rsplit('@', 1)[1]])
+            for email, reason in parsed
+        ]
+
+    def stats(self):
+        with self._lock:
+            return {'domains_cached': len(self._entries), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,299 @@
+import io
+import os
+import json
+import asyncio
+import hashlib
+import threading
+import zipfile
+from collections import OrderedDict
+
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, delete, func
+
+from database import Document
+from modules.llm_engine import analyze_document
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+MAX_ZIP_MEMBERS = 200
+UPLOAD_DIR = os.path.join('static', 'uploads')
+
+
+def content_hash(image_bytes):
+    """
+    Returns the SHA-256 hex digest used to deduplicate uploaded images.
+    """
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+class OCRResultCache:
+    """
+    Bounded in-process LRU of OCR results keyed by image content hash.
+    """
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest):
+        with self._lock:
+            result = self._entries.get(digest)
+            if result is not None:
+                self._entries.move_to_end(digest)
+            return result
+
+    def put(self, digest, result):
+        with self._lock:
+            self._entries[digest] = result
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+ocr_cache = OCRResultCache()
+
+
+def expand_upload(filename, data):
+    """
+    Returns a list of (filename, bytes) pairs for an upload.
+    Zip archives are expanded into their image members; anything else is passed through as a single image.
+    """
+    if data[:4] != b'PK\x03\x04':
+        return [(filename, data)]
+
+    images = []
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for info in archive.infolist():
+            if len(images) >= MAX_ZIP_MEMBERS:
+                print(f"OCR: {filename} has more than {MAX_ZIP_MEMBERS} images, ignoring the rest")
+                break
+            if info.is_dir() or not info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            if info.file_size > MAX_IMAGE_BYTES:
+                print(f"OCR: Skipping {info.filename} in {filename} ({info.file_size} bytes)")
+                continue
+            images.append((f"{filename}/{info.filename}", archive.read(info)))
+    return images
+
+
+# ---------------------------------------------------------------------------
+# Document persistence
+# ---------------------------------------------------------------------------
+
+def store_upload(digest, filename, data):
+    """
+    Writes the upload under static/uploads, named by content hash, and returns its URL.
+    """
+    ext = os.path.splitext(filename or '')[1].lower()
+    if ext not in IMAGE_EXTENSIONS:
+        ext = '.jpg'
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    stored_name = f"{digest}{ext}"
+    path = os.path.join(UPLOAD_DIR, stored_name)
+    if not os.path.exists(path):
+        with open(path, 'wb') as f:
+            f.write(data)
+    return f"/static/uploads/{stored_name}"
+
+
+def get_document_by_hash(session, digest):
+    """
+    Returns the Document row for an image hash, if one was uploaded before.
+    """
+    return session.exec(select(Document).where(Document.contentHash == digest)).first()
+
+
+def document_result(document):
+    """
+    Decodes the OCR result stored on a Document row (None if not OCR'd yet).
+    """
+    if document.status != 'Done' or not document.ocrText:
+        return None
+    try:
+        result = json.loads(document.ocrText)
+    except ValueError:
+        return None
+    result['documentId'] = document.id
+    return result
+
+
+def begin_document(session, digest, filename, data, uploader_id=None):
+    """
+    Gets or creates the Document row for an upload and marks it Pending.
+    contentHash is unique: if a concurrent upload of the same image inserts its row
+    first, that row is re-read and used instead.
+    """
+    document = get_document_by_hash(session, digest)
+    if not document:
+        session.add(Document(
+            filename=filename or 'upload.jpg',
+            fileUrl=store_upload(digest, filename, data),
+            contentHash=digest,
+            uploaderId=uploader_id
+        ))
+        try:
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+        document = get_document_by_hash(session, digest)
+    document.status = 'Pending'
+    session.add(document)
+    session.commit()
+    session.refresh(document)
+    return document
+
+
+def dedupe_documents(engine):
+    """
+    Deletes duplicate Document rows per contentHash before it becomes unique, keeping
+    the one linked to a client, else an OCR'd one, else the oldest. Returns how many were deleted.
+    """
+    with Session(engine) as session:
+        rows = session.exec(
+            select(Document.id, Document.contentHash, Document.clientId, Document.status)
+            .where(Document.contentHash.in_(
+                select(Document.contentHash).where(Document.contentHash != None)
+                .group_by(Document.contentHash).having(func.count() > 1)
+            ))
+        ).all()
+        keep = {}
+        for row in sorted(rows, key=lambda r: (r.clientId is None, r.status != 'Done', r.id)):
+            keep.setdefault(row.contentHash, row.id)
+        duplicates = [row.id for row in rows if keep[row.contentHash] != row.id]
+        if duplicates:
+            session.exec(delete(Document).where(Document.id.in_(duplicates)))
+            session.commit()
+        return len(duplicates)
+
+
+def finish_document(session, document, result):
+    """
+    Stores the OCR result on the row as Done, or marks it Failed.
+    """
+    if result.get('error'):
+        document.status = 'Failed'
+        document.ocrText = None
+    else:
+        document.status = 'Done'
+        document.ocrText = json.dumps(result)
+    session.add(document)
+    session.commit()
+
+
+async def _in_session(session, fn, *args):
+    """Runs a sync DB helper on `session` (an AsyncSession runs it through run_sync)"""
+    if hasattr(session, 'run_sync'):
+        return await session.run_sync(fn, *args)
+    return fn(session, *args)
+
+
+def _db(session=None, session_factory=None):
+    """
+    async callable(fn, *args) running a sync DB helper on `session`, or each call on its
+    own session from `session_factory` (concurrent tasks cannot share one AsyncSession).
+    None when there is no database.
+    """
+    if session_factory is not None:
+        async def run(fn, *args):
+            async with session_factory() as own_session:
+                return await _in_session(own_session, fn, *args)
+        return run
+    if session is not None:
+        return lambda fn, *args: _in_session(session, fn, *args)
+    return None
+
+
+async def _persisted_result(db, digest, cache):
+    if db is None:
+        return None
+    document = await db(get_document_by_hash, digest)
+    result = document_result(document) if document else None
+    if result is not None:
+        cache.put(digest, result)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# OCR pipeline
+# ---------------------------------------------------------------------------
+
+async def _run_analyzer(analyzer, data):
+    try:
+        return await asyncio.to_thread(analyzer, data)
+    except Exception as e:
+        return {"error": f"OCR failed: {str(e)}"}
+
+
+async def _analyze_and_record(analyzer, data, digest, filename, db, uploader_id, cache):
+    document = None
+    if db is not None:
+        document = await db(begin_document, digest, filename, data, uploader_id)
+    result = await _run_analyzer(analyzer, data)
+    if document is not None:
+        await db(finish_document, document, result)
+        result = {**result, 'documentId': document.id}
+    if not result.get('error'):
+        cache.put(digest, result)
+    return result
+
+
+async def ocr_image(data, filename=None, session=None, uploader_id=None, analyzer=analyze_document, cache=ocr_cache):
+    """
+    OCRs a single image off the event loop.
+    Repeats are served from the hash cache, then from the Document table, before the model is called.
+    Returns (digest, result, cached).
+    """
+    db = _db(session)
+    digest = content_hash(data)
+    cached = cache.get(digest)
+    if cached is None:
+        cached = await _persisted_result(db, digest, cache)
+    if cached is not None:
+        return digest, cached, True
+
+    result = await _analyze_and_record(analyzer, data, digest, filename, db, uploader_id, cache)
+    return digest, result, False
+
+
+async def ocr_images(images, concurrency=4, session_factory=None, uploader_id=None, analyzer=analyze_document, cache=ocr_cache):
+    """
+    OCRs (filename, bytes) pairs concurrently, at most `concurrency` vision calls at a time.
+    Yields one result dict per file in completion order. Identical images are analyzed once,
+    and images already stored on the Document table are not analyzed again.
+    `session_factory` (e.g. a partial of AsyncSession) gives every DB step its own session.
+    """
+    db = _db(session_factory=session_factory)
+    semaphore = asyncio.Semaphore(concurrency)
+    in_flight = {}
+
+    async def analyze_once(digest, filename, data):
+        async with semaphore:
+            # Another upload of the same image may have finished while we waited
+            cached = cache.get(digest)
+            if cached is not None:
+                return cached
+            return await _analyze_and_record(analyzer, data, digest, filename, db, uploader_id, cache)
+
+    async def process(filename, data):
+        digest = content_hash(data)
+        cached = cache.get(digest)
+        if cached is None:
+            cached = await _persisted_result(db, digest, cache)
+        if cached is not None:
+            return {"filename": filename, "hash": digest, "cached": True, "result": cached}
+
+        task = in_flight.get(digest)
+        duplicate = task is not None
+        if task is None:
+            task = asyncio.ensure_future(analyze_once(digest, filename, data))
+            in_flight[digest] = task
+        result = await task
+        return {"filename": filename, "hash": digest, "cached": duplicate, "result": result}
+
+    tasks = [asyncio.ensure_future(process(filename, data)) for filename, data in images]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in list(tasks) + list(in_flight.values()):
+            task.cancel()
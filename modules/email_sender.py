@@ -1,7 +1,11 @@
 import smtplib
 import imaplib
+import asyncio
 import time
 import ssl
+import threading
+import queue
+import re
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
@@ -14,68 +18,413 @@ DEFAULT_CC_EMAILS = [
     "gayathri@serphawk.com"
 ]
 
-def save_to_sent(to_email, msg, sender_email, sender_password, imap_server, imap_port=993):
+# Loopback hosts may speak plain SMTP/IMAP (the local test sink in modules/mail_sink.py)
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '::1')
+
+class SMTPConnectionPool:
     """
-    Saves the email to the IMAP Sent folder.
+    Keeps authenticated SMTP sessions open between sends, keyed by (server, port, account).
+
+    A session idle for more than `noop_after` seconds is checked with NOOP before
+    reuse, and one idle longer than `idle_timeout` is closed (most servers drop
+    idle clients after a few minutes anyway). If the server dropped the session
+    the send reconnects once, transparently.
     """
-    try:
-        print(f"Connecting to IMAP {imap_server} to save copy...")
-        mail = imaplib.IMAP4_SSL(imap_server, imap_port)
-        mail.login(sender_email, sender_password)
-        
-        # Get list of folders
-        status, folder_list = mail.list()
-        folders = []
-        if status == 'OK':
-            for f in folder_list:
-                # Parse folder name from bytes: b'(\HasNoChildren) "/" "Sent"'
-                name = f.decode().split(' "|" ')[-1].split(' "/" ')[-1].strip('"')
-                # simpler parsing for common formats
-                if '"' in f.decode():
-                    name = f.decode().split('"')[-2]
-                else:
-                    name = f.decode().split(' ')[-1]
-                folders.append(name)
-        
-        print(f"Available folders: {folders}")
 
-        # Intelligent Sent folder detection
-        sent_candidates = ['Expected Sent Folder', 'Sent Items', 'Sent', 'INBOX.Sent', 'INBOX.Sent Items', 'Enviados']
-        target_folder = None
-        
-        # 1. Try exact matches from our list
-        for candidate in sent_candidates:
-            if candidate in folders:
-                target_folder = candidate
+    def __init__(self, max_idle_per_key=2, idle_timeout=240, noop_after=15):
+        self.max_idle_per_key = max_idle_per_key
+        self.idle_timeout = idle_timeout
+        self.noop_after = noop_after
+        self._idle = {} # key -> [(server, last_used), ...]
+        self._lock = threading.Lock()
+
+    def _connect(self, smtp_server, smtp_port, sender_email, sender_password):
+        print(f"Connecting to {smtp_server}:{smtp_port}...")
+        context = ssl.create_default_context()
+
+        # Use SSL for port 465, TLS for port 587
+        if smtp_port == 465:
+            server = smtplib.SMTP_SSL(smtp_server, smtp_port, context=context, timeout=30)
+        else:
+            server = smtplib.SMTP(smtp_server, smtp_port, timeout=30)
+            server.ehlo()
+            if smtp_server not in LOCAL_HOSTS or server.has_extn('starttls'):
+                server.starttls(context=context)
+        try:
+            server.login(sender_email, sender_password)
+        except Exception:
+            self._close(server)
+            raise
+        return server
+
+    def _close(self, server):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _healthy(self, server, last_used):
+        if time.monotonic() - last_used < self.noop_after:
+            return True
+        try:
+            return server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _acquire(self, key, sender_password):
+        """Returns (server, reused) - an idle healthy session or a fresh one."""
+        while True:
+            with self._lock:
+                idle = self._idle.get(key) or []
+                entry = idle.pop() if idle else None
+            if entry is None:
                 break
-                
-        # 2. If not found, look for "Sent" in the name (case insensitive)
-        if not target_folder:
-            for folder in folders:
-                if 'sent' in folder.lower():
-                    target_folder = folder
-                    break
-        
-        if target_folder:
-            print(f"Saving to folder: {target_folder}")
-            # Append the message
-            # Flags: \Seen (read) and \Answered (replied) if applicable, or usually just \Seen
-            # Python's datetime for internal date
-            now = imaplib.Time2Internaldate(time.time())
-            mail.append(f'"{target_folder}"', '\\Seen', now, msg.as_bytes())
-            print(f"✓ Successfully saved copy to {target_folder}")
+            server, last_used = entry
+            if time.monotonic() - last_used < self.idle_timeout and self._healthy(server, last_used):
+                return server, True
+            self._close(server)
+        return self._connect(key[0], key[1], key[2], sender_password), False
+
+    def _release(self, key, server):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_key:
+                idle.append((server, time.monotonic()))
+                return
+        self._close(server)
+
+    def send(self, smtp_server, smtp_port, sender_email, sender_password, recipients, text):
+        """
+        Sends one message over a pooled session. Only the MAIL/RCPT/DATA exchange
+        happens when a live session is available.
+        """
+        key = (smtp_server, int(smtp_port), sender_email)
+        server, reused = self._acquire(key, sender_password)
+        try:
+            server.sendmail(sender_email, recipients, text)
+        except smtplib.SMTPServerDisconnected:
+            self._close(server)
+            if not reused:
+                raise
+            # The pooled session died between the health check and the send
+            server = self._connect(smtp_server, int(smtp_port), sender_email, sender_password)
+            try:
+                server.sendmail(sender_email, recipients, text)
+            except Exception:
+                self._close(server)
+                raise
+        except smtplib.SMTPRecipientsRefused:
+            # Session is still fine; the recipients were rejected
+            self._release(key, server)
+            raise
+        except Exception:
+            self._close(server)
+            raise
+        self._release(key, server)
+
+    def close_all(self):
+        """Closes every idle session (call on shutdown)."""
+        with self._lock:
+            entries = [entry for idle in self._idle.values() for entry in idle]
+            self._idle = {}
+        for server, _ in entries:
+            self._close(server)
+
+
+# Shared by every send in this process
+smtp_pool = SMTPConnectionPool()
+
+
+class AsyncSMTPConnectionPool:
+    """
+    asyncio counterpart of SMTPConnectionPool built on aiosmtplib, for sending
+    straight from the event loop without tying up a worker thread per message.
+    Sessions belong to the event loop that opened them.
+    """
+
+    def __init__(self, max_idle_per_key=4, idle_timeout=240, noop_after=15):
+        self.max_idle_per_key = max_idle_per_key
+        self.idle_timeout = idle_timeout
+        self.noop_after = noop_after
+        self._idle = {} # key -> [(server, last_used), ...]
+
+    async def _connect(self, smtp_server, smtp_port, sender_email, sender_password):
+        import aiosmtplib
+
+        print(f"Connecting to {smtp_server}:{smtp_port} (async)...")
+        context = ssl.create_default_context()
+        server = aiosmtplib.SMTP(
+            hostname=smtp_server,
+            port=smtp_port,
+            use_tls=smtp_port == 465,
+            start_tls=False,
+            tls_context=context,
+            timeout=30
+        )
+        await server.connect()
+        try:
+            await server.ehlo()
+            if smtp_port != 465 and (smtp_server not in LOCAL_HOSTS or server.supports_extension('starttls')):
+                await server.starttls(tls_context=context)
+            await server.login(sender_email, sender_password)
+        except Exception:
+            await self._close(server)
+            raise
+        return server
+
+    async def _close(self, server):
+        try:
+            await server.quit()
+        except Exception:
+            server.close()
+
+    async def _healthy(self, server, last_used):
+        if time.monotonic() - last_used < self.noop_after:
+            return server.is_connected
+        try:
+            return (await server.noop()).code == 250
+        except Exception:
+            return False
+
+    async def _acquire(self, key, sender_password):
+        idle = self._idle.get(key) or []
+        while idle:
+            server, last_used = idle.pop()
+            if time.monotonic() - last_used < self.idle_timeout and await self._healthy(server, last_used):
+                return server, True
+            await self._close(server)
+        return await self._connect(key[0], key[1], key[2], sender_password), False
+
+    def _release(self, key, server):
+        idle = self._idle.setdefault(key, [])
+        if len(idle) < self.max_idle_per_key:
+            idle.append((server, time.monotonic()))
+            return False
+        return True
+
+    async def send(self, smtp_server, smtp_port, sender_email, sender_password, recipients, text):
+        """
+        Sends one message over a pooled session; concurrent sends each get their own session.
+        """
+        import aiosmtplib
+
+        key = (smtp_server, int(smtp_port), sender_email)
+        server, reused = await self._acquire(key, sender_password)
+        try:
+            await server.sendmail(sender_email, recipients, text)
+        except aiosmtplib.SMTPServerDisconnected:
+            server.close()
+            if not reused:
+                raise
+            # The pooled session died between the health check and the send
+            server = await self._connect(smtp_server, int(smtp_port), sender_email, sender_password)
+            try:
+                await server.sendmail(sender_email, recipients, text)
+            except Exception:
+                await self._close(server)
+                raise
+        except aiosmtplib.SMTPRecipientsRefused:
+            # Session is still fine; the recipients were rejected
+            if self._release(key, server):
+                await self._close(server)
+            raise
+        except Exception:
+            await self._close(server)
+            raise
+        if self._release(key, server):
+            await self._close(server)
+
+    async def close_all(self):
+        """Closes every idle session (call on shutdown, from the owning loop)."""
+        entries = [entry for idle in self._idle.values() for entry in idle]
+        self._idle = {}
+        for server, _ in entries:
+            await self._close(server)
+
+
+async_smtp_pool = AsyncSMTPConnectionPool()
+
+
+# LIST response line, e.g. b'(\HasNoChildren \Sent) "/" "Sent Items"'
+LIST_RESPONSE = re.compile(r'\((?P<flags>[^)]*)\) (?:"[^"]*"|NIL) (?P<name>.+)$')
+SENT_CANDIDATES = ['Expected Sent Folder', 'Sent Items', 'Sent', 'INBOX.Sent', 'INBOX.Sent Items', 'Enviados']
+
+
+def parse_folder_list(folder_list):
+    """
+    Returns [(name, flags)] from an IMAP LIST response.
+    """
+    folders = []
+    for line in folder_list or []:
+        if not isinstance(line, bytes):
+            continue
+        match = LIST_RESPONSE.match(line.decode('utf-8', 'replace'))
+        if not match:
+            continue
+        name = match.group('name').strip()
+        if name.startswith('"') and name.endswith('"'):
+            name = name[1:-1].replace('\\"', '"')
+        folders.append((name, match.group('flags').split()))
+    return folders
+
+
+def find_sent_folder(folders):
+    """
+    Picks the Sent folder: the folder the server flags as special-use Sent first,
+    then well-known names, then anything with "sent" in it.
+    """
+    for name, flags in folders:
+        if '\\Sent' in flags:
+            return name
+    names = [name for name, _ in folders]
+    for candidate in SENT_CANDIDATES:
+        if candidate in names:
+            return candidate
+    for name in names:
+        if 'sent' in name.lower():
+            return name
+    return None
+
+
+def default_imap_server(smtp_server):
+    """Heuristic IMAP host for an SMTP host"""
+    if 'smtp.' in smtp_server:
+        return smtp_server.replace('smtp.', 'imap.')
+    if 'office365' in smtp_server:
+        return 'outlook.office365.com'
+    return smtp_server
+
+
+class SentFolderArchiver:
+    """
+    Saves copies of sent emails to the IMAP Sent folder off the send path.
+
+    send_email_outlook only enqueues the message; a single daemon thread keeps one
+    logged-in IMAP connection per (server, account), resolves the Sent folder once
+    and caches it, and appends whatever has queued up in one pass.
+    """
+
+    def __init__(self, batch_size=20, idle_timeout=600):
+        self.batch_size = batch_size
+        self.idle_timeout = idle_timeout
+        self._queue = queue.Queue()
+        self._connections = {} # (server, port, account) -> (mail, last_used)
+        self._sent_folders = {} # (server, port, account) -> folder name
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def enqueue(self, msg, sender_email, sender_password, imap_server, imap_port=993):
+        """Queues a copy of `msg` for the Sent folder and returns immediately."""
+        self._ensure_started()
+        self._queue.put(((imap_server, imap_port, sender_email), sender_password, msg.as_bytes()))
+
+    def _ensure_started(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='sent-folder-archiver', daemon=True)
+                self._thread.start()
+
+    def _connect(self, key, sender_password):
+        entry = self._connections.pop(key, None)
+        if entry:
+            mail, last_used = entry
+            try:
+                if time.monotonic() - last_used < self.idle_timeout and mail.noop()[0] == 'OK':
+                    return mail
+            except Exception:
+                pass
+            self._logout(mail)
+
+        imap_server, imap_port, sender_email = key
+        print(f"Connecting to IMAP {imap_server} to save copies...")
+        if imap_server in LOCAL_HOSTS and imap_port != 993:
+            mail = imaplib.IMAP4(imap_server, imap_port)
         else:
-            print(f"⚠ Could not find a 'Sent' folder. Available: {folders}")
-            
-        mail.logout()
-    except Exception as e:
-        print(f"❌ Failed to save copy to Sent folder: {e}")
+            mail = imaplib.IMAP4_SSL(imap_server, imap_port)
+        mail.login(sender_email, sender_password)
+        return mail
+
+    def _logout(self, mail):
+        try:
+            mail.logout()
+        except Exception:
+            pass
+
+    def _sent_folder(self, key, mail):
+        if key not in self._sent_folders:
+            status, folder_list = mail.list()
+            folders = parse_folder_list(folder_list) if status == 'OK' else []
+            target_folder = find_sent_folder(folders)
+            if not target_folder:
+                print(f"⚠ Could not find a 'Sent' folder. Available: {[name for name, _ in folders]}")
+                return None
+            self._sent_folders[key] = target_folder
+        return self._sent_folders[key]
+
+    def _append_batch(self, key, sender_password, messages, retry=True):
+        try:
+            mail = self._connect(key, sender_password)
+            target_folder = self._sent_folder(key, mail)
+            if not target_folder:
+                self._connections[key] = (mail, time.monotonic())
+                return
+            while messages:
+                # Flags: \Seen (read)
+                now = imaplib.Time2Internaldate(time.time())
+                mail.append(f'"{target_folder}"', '\\Seen', now, messages[0])
+                messages.pop(0)
+            self._connections[key] = (mail, time.monotonic())
+            print(f"✓ Saved copies to {target_folder} ({key[2]})")
+        except Exception as e:
+            self._sent_folders.pop(key, None)
+            if retry:
+                # Server probably dropped the idle connection; the messages not yet appended get one more try
+                return self._append_batch(key, sender_password, messages, retry=False)
+            print(f"❌ Failed to save {len(messages)} copies to Sent folder: {e}")
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            by_account = {}
+            for key, sender_password, raw in batch:
+                by_account.setdefault((key, sender_password), []).append(raw)
+            for (key, sender_password), messages in by_account.items():
+                self._append_batch(key, sender_password, messages)
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self, timeout=None):
+        """Waits until every queued copy has been handled (or `timeout` seconds)."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+
+# Shared by every send in this process
+sent_archiver = SentFolderArchiver()
+
 
-def send_email_outlook(to_email, subject, body, sender_email, sender_password, smtp_server='smtp.office365.com', smtp_port=587, html=True, cc_emails=None, imap_server=None):
+def save_to_sent(to_email, msg, sender_email, sender_password, imap_server, imap_port=993):
     """
-    Sends an email using SMTP.
-    Supports both HTML and plain text emails.
-    Supports both TLS (port 587) and SSL (port 465).
+    Queues a copy of the email for the IMAP Sent folder (saved in the background).
+    """
+    sent_archiver.enqueue(msg, sender_email, sender_password, imap_server, imap_port)
+
+def build_message(to_email, subject, body, sender_email, html=True, cc_emails=None, message_id=None):
+    """
+    Builds the MIME message and the envelope recipients for a send.
     """
     # Use default CCs if not provided (and not explicitly empty list)
     if cc_emails is None:
@@ -85,6 +434,8 @@ def send_email_outlook(to_email, subject, body, sender_email, sender_password, s
     msg['From'] = sender_email
     msg['To'] = to_email
     msg['Subject'] = subject
+    if message_id:
+        msg['Message-ID'] = message_id
     
     if cc_emails:
         msg['Cc'] = ", ".join(cc_emails)
@@ -95,47 +446,61 @@ def send_email_outlook(to_email, subject, body, sender_email, sender_password, s
     else:
         msg.attach(MIMEText(body, 'plain'))
 
+    # Combine recipients for the envelope
+    recipients = [to_email] + cc_emails if cc_emails else [to_email]
+    return msg, recipients
+
+
+def send_email_outlook(to_email, subject, body, sender_email, sender_password, smtp_server='smtp.office365.com', smtp_port=587, html=True, cc_emails=None, imap_server=None, message_id=None, imap_port=993):
+    """
+    Sends an email using SMTP.
+    Supports both HTML and plain text emails.
+    Supports both TLS (port 587) and SSL (port 465).
+    A fixed message_id lets receiving servers recognise a retried message as the same one.
+    """
+    msg, recipients = build_message(to_email, subject, body, sender_email, html, cc_emails, message_id)
+
     try:
         smtp_port = int(smtp_port)
-        print(f"Connecting to {smtp_server}:{smtp_port}...")
-        
-        # Prepare SSL context
-        context = ssl.create_default_context()
-
-        # Use SSL for port 465, TLS for port 587
-        if smtp_port == 465:
-            # SSL connection
-            server = smtplib.SMTP_SSL(smtp_server, smtp_port, context=context, timeout=30)
-        else:
-            # TLS connection
-            server = smtplib.SMTP(smtp_server, smtp_port, timeout=30)
-            server.starttls(context=context)
-        
-        server.login(sender_email, sender_password)
-        text = msg.as_string()
-        
-        # Combine recipients for the envelope
-        recipients = [to_email] + cc_emails if cc_emails else [to_email]
         
-        server.sendmail(sender_email, recipients, text)
-        server.quit()
-        print(f"Email sent to {to_email} (CC: {cc_emails})")
+        # Reuses an authenticated session to this server/account when one is open
+        smtp_pool.send(smtp_server, smtp_port, sender_email, sender_password, recipients, msg.as_string())
+        print(f"Email sent to {to_email} (CC: {recipients[1:]})")
         
-        # Try to save to sent folder
-        target_imap = imap_server
-        if not target_imap:
-            # Heuristic detection if not provided
-            target_imap = smtp_server
-            if 'smtp.' in smtp_server:
-                target_imap = smtp_server.replace('smtp.', 'imap.')
-            elif 'office365' in smtp_server:
-                target_imap = 'outlook.office365.com'
-            elif 'mail.' in smtp_server:
-                target_imap = smtp_server  # Already in correct format
-            
-        save_to_sent(to_email, msg, sender_email, sender_password, target_imap)
+        # Copy to the Sent folder in the background (never delays the send)
+        target_imap = imap_server or default_imap_server(smtp_server)
+        save_to_sent(to_email, msg, sender_email, sender_password, target_imap, imap_port)
         
         return True
     except Exception as e:
         print(f"Failed to send email: {e}")
         raise e
+
+
+async def send_email_async(to_email, subject, body, sender_email, sender_password, smtp_server='smtp.office365.com', smtp_port=587, html=True, cc_emails=None, imap_server=None, message_id=None, imap_port=993):
+    """
+    Async version of send_email_outlook (same arguments) using aiosmtplib.
+    Falls back to send_email_outlook in a worker thread when aiosmtplib is not installed.
+    """
+    try:
+        import aiosmtplib  # noqa: F401
+    except ImportError:
+        return await asyncio.to_thread(
+            send_email_outlook, to_email, subject, body, sender_email, sender_password,
+            smtp_server, smtp_port, html, cc_emails, imap_server, message_id, imap_port
+        )
+
+    msg, recipients = build_message(to_email, subject, body, sender_email, html, cc_emails, message_id)
+
+    try:
+        smtp_port = int(smtp_port)
+        await async_smtp_pool.send(smtp_server, smtp_port, sender_email, sender_password, recipients, msg.as_string())
+        print(f"Email sent to {to_email} (CC: {recipients[1:]})")
+
+        target_imap = imap_server or default_imap_server(smtp_server)
+        save_to_sent(to_email, msg, sender_email, sender_password, target_imap, imap_port)
+
+        return True
+    except Exception as e:
+        print(f"Failed to send email: {e}")
+        raise e
@@ -0,0 +1,193 @@
+"""
+Read-through cache for hot entity lookups (users by role, client and project detail).
+
+Entries are grouped by namespace ('users', 'client', 'project') and keyed within
+it. The mutating routes invalidate exactly what they change: one key, or a whole
+namespace when a change fans out (a deleted user may appear in any client or
+project detail). Entries also expire after a TTL, which bounds how stale a read
+can get after writes made outside the API (scripts, the import tools).
+
+By default entries live in this process, LRU-bounded to `max_entries`. With a
+shared backend (ENTITY_CACHE_REDIS_URL) they live in Redis instead, so every
+worker sees an invalidation as soon as it happens. A backend error is never
+fatal: the read falls through to the database.
+"""
+import json
+import time
+import threading
+from collections import OrderedDict
+
+from fastapi.encoders import jsonable_encoder
+
+
+class LocalBackend:
+    """In-process LRU with per-entry expiry"""
+
+    name = 'local'
+
+    def __init__(self, max_entries=2000):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries = OrderedDict() # (namespace, key) -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    async def get(self, namespace, key):
+        """(found, value)"""
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if not entry:
+                return False, None
+            if entry[1] <= time.monotonic():
+                del self._entries[(namespace, key)]
+                return False, None
+            self._entries.move_to_end((namespace, key))
+            return True, entry[0]
+
+    async def set(self, namespace, key, value, ttl):
+        with self._lock:
+            self._entries[(namespace, key)] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def delete(self, namespace, key=None):
+        with self._lock:
+            if key is not None:
+                self._entries.pop((namespace, key), None)
+                return
+            for entry in [entry for entry in self._entries if entry[0] == namespace]:
+                del self._entries[entry]
+
+    def size(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    """
+    Shared entries in Redis (JSON values with EX expiry). Each namespace keeps a set
+    of its keys so a whole-namespace invalidation is one SMEMBERS + DEL.
+    Size is bounded by Redis itself (maxmemory with an LRU policy).
+    """
+
+    name = 'redis'
+
+    def __init__(self, url, prefix='crm-cache'):
+        import redis.asyncio as redis
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+        self.evictions = 0 # Done by Redis, not counted here
+
+    def _key(self, namespace, key):
+        return f"{self.prefix}:{namespace}:{key}"
+
+    def _members(self, namespace):
+        return f"{self.prefix}:{namespace}:__keys__"
+
+    async def get(self, namespace, key):
+        raw = await self.client.get(self._key(namespace, key))
+        return (False, None) if raw is None else (True, json.loads(raw))
+
+    async def set(self, namespace, key, value, ttl):
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(self._key(namespace, key), json.dumps(value), ex=ttl)
+            pipe.sadd(self._members(namespace), key)
+            pipe.expire(self._members(namespace), ttl)
+            await pipe.execute()
+
+    async def delete(self, namespace, key=None):
+        if key is not None:
+            await self.client.delete(self._key(namespace, key))
+            return
+        keys = [self._key(namespace, member.decode()) for member in await self.client.smembers(self._members(namespace))]
+        await self.client.delete(self._members(namespace), *keys)
+
+    def size(self):
+        return None
+
+
+def make_backend(redis_url=None, max_entries=2000):
+    """Redis when a URL is given and the redis package is installed, else in-process"""
+    if redis_url:
+        try:
+            return RedisBackend(redis_url)
+        except ImportError:
+            print("⚠️ ENTITY_CACHE_REDIS_URL is set but the redis package is not installed; caching in-process")
+    return LocalBackend(max_entries)
+
+
+class EntityCache:
+    """
+    Read-through cache: get_or_load() returns the cached value or awaits the loader
+    and stores its result (JSON-encoded, so hits and misses return the same shape).
+    A loader result of None (not found) is not cached. ttl_seconds=0 disables caching.
+    """
+
+    def __init__(self, ttl_seconds=60, backend=None):
+        self.ttl = ttl_seconds
+        self.backend = backend or LocalBackend()
+        self._generations = {} # namespace -> invalidation count, so a load racing a write is not stored
+        self._counts = {} # namespace -> {'hits', 'misses', 'errors'}
+
+    def _count(self, namespace, outcome):
+        counts = self._counts.setdefault(namespace, {'hits': 0, 'misses': 0, 'errors': 0})
+        counts[outcome] += 1
+
+    async def get_or_load(self, namespace, key, loader):
+        if self.ttl <= 0:
+            return await loader()
+        key = str(key)
+        try:
+            found, value = await self.backend.get(namespace, key)
+        except Exception as e:
+            print(f"⚠️ Entity cache read failed ({namespace}:{key}): {e}")
+            self._count(namespace, 'errors')
+            found = False
+        if found:
+            self._count(namespace, 'hits')
+            return value
+
+        self._count(namespace, 'misses')
+        generation = self._generations.get(namespace, 0)
+        value = await loader()
+        if value is None:
+            return None
+        value = jsonable_encoder(value)
+        if self._generations.get(namespace, 0) == generation:
+            try:
+                await self.backend.set(namespace, key, value, self.ttl)
+            except Exception as e:
+                print(f"⚠️ Entity cache write failed ({namespace}:{key}): {e}")
+                self._count(namespace, 'errors')
+        return value
+
+    async def invalidate(self, namespace, key=None):
+        """Drops one entry, or the whole namespace when `key` is None"""
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+        try:
+            await self.backend.delete(namespace, None if key is None else str(key))
+        except Exception as e:
+            print(f"⚠️ Entity cache invalidation failed ({namespace}:{key}): {e}")
+            self._count(namespace, 'errors')
+
+    def stats(self):
+        """Hit/miss counts and hit rate per namespace and overall, plus backend size and evictions"""
+        def rate(counts):
+            lookups = counts['hits'] + counts['misses']
+            return round(counts['hits'] / lookups, 4) if lookups else None
+
+        total = {'hits': 0, 'misses': 0, 'errors': 0}
+        namespaces = {}
+        for namespace, counts in self._counts.items():
+            namespaces[namespace] = {**counts, 'hit_rate': rate(counts)}
+            for outcome, count in counts.items():
+                total[outcome] += count
+        return {
+            'backend': self.backend.name,
+            'ttl_seconds': self.ttl,
+            'size': self.backend.size(),
+            'evictions': self.backend.evictions,
+            **total,
+            'hit_rate': rate(total),
+            'namespaces': namespaces
+        }
@@ -0,0 +1,208 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, select, func, update
+
+from database import GenerateJob, GenerateJobItem
+
+FINISHED_ITEM_STATUSES = ('Done', 'Failed')
+
+
+class GenerateJobQueue:
+    """
+    Database-backed work queue for /generate batches.
+
+    Every URL is a GenerateJobItem row. Workers claim rows with an optimistic
+    UPDATE, so several uvicorn processes can share the queue, and a row whose
+    worker died (crash, redeploy) is picked up again once its lease expires.
+    Finished rows keep their result, so a restart only redoes unfinished URLs.
+    """
+
+    def __init__(self, engine, processor, workers=3, poll_interval=2.0, lease_seconds=600, max_attempts=3):
+        self.engine = engine
+        self.processor = processor # async callable: url -> result dict
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._tasks = []
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        print(f"Generate job queue started with {self.workers} workers")
+
+    async def stop(self):
+        self._stopping = True
+        self._wakeup.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wake idle workers (called after enqueueing)."""
+        self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Enqueue & status
+    # ------------------------------------------------------------------
+
+    def enqueue(self, session, urls):
+        """
+        Persists a job with one item per URL and returns the job
+        (already Done when there are no URLs, since no worker would ever finish it).
+        """
+        job = GenerateJob(total=len(urls))
+        if not urls:
+            job.status, job.finishedAt = 'Done', datetime.utcnow()
+        session.add(job)
+        session.flush()
+        for position, url in enumerate(urls):
+            session.add(GenerateJobItem(jobId=job.id, url=url, position=position))
+        session.commit()
+        session.refresh(job)
+        self.notify()
+        return job
+
+    @staticmethod
+    def progress(session, job_id):
+        """
+        Returns item counts by status for a job.
+        """
+        rows = session.exec(
+            select(GenerateJobItem.status, func.count(GenerateJobItem.id))
+            .where(GenerateJobItem.jobId == job_id)
+            .group_by(GenerateJobItem.status)
+        ).all()
+        counts = {"Pending": 0, "Running": 0, "Done": 0, "Failed": 0}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    @staticmethod
+    def finished_items(session, job_id, after_position=-1):
+        """
+        Returns finished items of a job in submission order, optionally only past a position.
+        """
+        return session.exec(
+            select(GenerateJobItem)
+            .where(
+                GenerateJobItem.jobId == job_id,
+                GenerateJobItem.status.in_(FINISHED_ITEM_STATUSES),
+                GenerateJobItem.position > after_position
+            )
+            .order_by(GenerateJobItem.position)
+        ).all()
+
+    # ------------------------------------------------------------------
+    # Worker internals
+    # ------------------------------------------------------------------
+
+    def _claim_next(self):
+        """
+        Claims one Pending item (or a Running item whose lease expired).
+        Returns (item_id, job_id, url) or None when there is nothing to do.
+        """
+        now = datetime.utcnow()
+        stale_before = now - timedelta(seconds=self.lease_seconds)
+        with Session(self.engine) as session:
+            for _ in range(5):
+                candidate = session.exec(
+                    select(GenerateJobItem)
+                    .where(
+                        (GenerateJobItem.status == 'Pending') |
+                        ((GenerateJobItem.status == 'Running') & (GenerateJobItem.claimedAt < stale_before))
+                    )
+                    .order_by(GenerateJobItem.id)
+                    .limit(1)
+                ).first()
+                if not candidate:
+                    return None
+
+                if candidate.attempts >= self.max_attempts:
+                    self._finish(session, candidate.id, candidate.jobId, None, f"Gave up after {candidate.attempts} attempts")
+                    continue
+
+                # Only one worker wins the row: the UPDATE matches the state we just read
+                claimed = session.exec(
+                    update(GenerateJobItem)
+                    .where(
+                        GenerateJobItem.id == candidate.id,
+                        GenerateJobItem.status == candidate.status,
+                        GenerateJobItem.attempts == candidate.attempts
+                    )
+                    .values(status='Running', claimedAt=now, attempts=candidate.attempts + 1)
+                )
+                if claimed.rowcount == 1:
+                    session.exec(
+                        update(GenerateJob)
+                        .where(GenerateJob.id == candidate.jobId, GenerateJob.status == 'Queued')
+                        .values(status='Running', updatedAt=now)
+                    )
+                    session.commit()
+                    return candidate.id, candidate.jobId, candidate.url
+                session.rollback()
+        return None
+
+    def _finish(self, session, item_id, job_id, result, error):
+        now = datetime.utcnow()
+        session.exec(
+            update(GenerateJobItem)
+            .where(GenerateJobItem.id == item_id)
+            .values(
+                status='Failed' if error else 'Done',
+                result=result,
+                error=error,
+                finishedAt=now
+            )
+        )
+        remaining = session.exec(
+            select(func.count(GenerateJobItem.id)).where(
+                GenerateJobItem.jobId == job_id,
+                GenerateJobItem.status.not_in(FINISHED_ITEM_STATUSES)
+            )
+        ).one()
+        values = {"updatedAt": now}
+        if remaining == 0:
+            values.update(status='Done', finishedAt=now)
+        session.exec(update(GenerateJob).where(GenerateJob.id == job_id).values(**values))
+        session.commit()
+
+    def _record(self, item_id, job_id, result, error):
+        with Session(self.engine) as session:
+            self._finish(session, item_id, job_id, result, error)
+
+    async def _worker(self, index):
+        while not self._stopping:
+            try:
+                claimed = await asyncio.to_thread(self._claim_next)
+            except Exception as e:
+                print(f"Generate worker {index}: could not claim work: {e}")
+                claimed = None
+
+            if not claimed:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            item_id, job_id, url = claimed
+            try:
+                result = await self.processor(url)
+                error = result.get('error') if isinstance(result, dict) else None
+            except Exception as e:
+                result, error = {'url': url, 'error': str(e)}, str(e)
+
+            try:
+                await asyncio.to_thread(self._record, item_id, job_id, result, error)
+            except Exception as e:
+                # Leave the row Running; its lease expiry hands it to another worker
+                print(f"Generate worker {index}: could not save result for {url}: {e}")
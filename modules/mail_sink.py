@@ -0,0 +1,252 @@
+"""
+Local SMTP + IMAP sink for exercising the send path without a real mailbox.
+
+Accepts any login, keeps every delivered message and every APPENDed Sent copy
+in memory, and speaks just enough of each protocol for modules/email_sender
+(EHLO, AUTH PLAIN/LOGIN, MAIL/RCPT/DATA, NOOP, RSET, QUIT; LOGIN, LIST, APPEND,
+NOOP, LOGOUT). Plain text only, so point the sender at 127.0.0.1/localhost.
+
+Usage: python -m modules.mail_sink [--smtp-port 2525] [--imap-port 2143]
+"""
+import re
+import time
+import asyncio
+import argparse
+import threading
+
+
+class MailSink:
+    """
+    In-memory mail server. `delay` adds that many seconds to every DATA and
+    APPEND reply to mimic a remote server's processing time.
+    """
+
+    def __init__(self, host='127.0.0.1', smtp_port=0, imap_port=0, delay=0.0, sent_folder='Sent Items'):
+        self.host = host
+        self.smtp_port = smtp_port
+        self.imap_port = imap_port
+        self.delay = delay
+        self.sent_folder = sent_folder
+        self.messages = [] # {'mail_from', 'rcpt_to', 'data', 'received_at'}
+        self.appended = [] # {'folder', 'data', 'received_at'}
+        self.smtp_connections = 0
+        self.imap_connections = 0
+        self._servers = []
+        self._handlers = {} # handler task -> writer
+        self._loop = None
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        smtp = await asyncio.start_server(self._handle_smtp, self.host, self.smtp_port)
+        imap = await asyncio.start_server(self._handle_imap, self.host, self.imap_port)
+        self._servers = [smtp, imap]
+        self.smtp_port = smtp.sockets[0].getsockname()[1]
+        self.imap_port = imap.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        for server in self._servers:
+            server.close()
+        # Clients (e.g. the Sent-folder archiver) may still hold connections open
+        for writer in list(self._handlers.values()):
+            writer.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        for server in self._servers:
+            await server.wait_closed()
+        self._servers = []
+
+    def start_in_thread(self):
+        """Runs the sink on its own event loop in a daemon thread (for sync callers)."""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name='mail-sink', daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop_thread(self):
+        if self._loop:
+            asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+    # ------------------------------------------------------------------
+    # SMTP
+    # ------------------------------------------------------------------
+
+    def _track(self, writer):
+        task = asyncio.current_task()
+        self._handlers[task] = writer
+        task.add_done_callback(lambda done: self._handlers.pop(done, None))
+
+    async def _handle_smtp(self, reader, writer):
+        self.smtp_connections += 1
+        self._track(writer)
+
+        def reply(line):
+            writer.write(f"{line}\r\n".encode())
+
+        reply("220 mail-sink ESMTP ready")
+        mail_from, rcpt_to = None, []
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode('utf-8', 'replace').strip()
+                verb = command.split(' ', 1)[0].upper()
+
+                if verb in ('EHLO', 'HELO'):
+                    if verb == 'EHLO':
+                        writer.write(b"250-mail-sink\r\n250-AUTH PLAIN LOGIN\r\n250-8BITMIME\r\n250 SIZE 52428800\r\n")
+                    else:
+                        reply("250 mail-sink")
+                elif verb == 'AUTH':
+                    parts = command.split()
+                    if len(parts) > 1 and parts[1].upper() == 'LOGIN':
+                        # Base64 "Username:" (unless sent with the command) then "Password:"
+                        prompts = ['UGFzc3dvcmQ6'] if len(parts) > 2 else ['VXNlcm5hbWU6', 'UGFzc3dvcmQ6']
+                        for prompt in prompts:
+                            reply(f"334 {prompt}")
+                            await writer.drain()
+                            await reader.readline()
+                    elif len(parts) == 2:
+                        reply("334 ")
+                        await writer.drain()
+                        await reader.readline()
+                    reply("235 2.7.0 Authentication successful")
+                elif verb == 'MAIL':
+                    mail_from, rcpt_to = command[10:].strip(' <>'), []
+                    reply("250 2.1.0 OK")
+                elif verb == 'RCPT':
+                    rcpt_to.append(command[8:].strip(' <>'))
+                    reply("250 2.1.5 OK")
+                elif verb == 'DATA':
+                    reply("354 End data with <CR><LF>.<CR><LF>")
+                    await writer.drain()
+                    lines = []
+                    while True:
+                        data_line = await reader.readline()
+                        if not data_line or data_line in (b".\r\n", b".\n"):
+                            break
+                        lines.append(data_line[1:] if data_line.startswith(b"..") else data_line)
+                    if self.delay:
+                        await asyncio.sleep(self.delay)
+                    self.messages.append({
+                        'mail_from': mail_from,
+                        'rcpt_to': rcpt_to,
+                        'data': b"".join(lines),
+                        'received_at': time.time()
+                    })
+                    mail_from, rcpt_to = None, []
+                    reply("250 2.0.0 Queued")
+                elif verb in ('NOOP', 'RSET'):
+                    if verb == 'RSET':
+                        mail_from, rcpt_to = None, []
+                    reply("250 2.0.0 OK")
+                elif verb == 'QUIT':
+                    reply("221 2.0.0 Bye")
+                    await writer.drain()
+                    break
+                else:
+                    reply("502 5.5.2 Command not implemented")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    # ------------------------------------------------------------------
+    # IMAP
+    # ------------------------------------------------------------------
+
+    async def _handle_imap(self, reader, writer):
+        self.imap_connections += 1
+        self._track(writer)
+
+        def send(line):
+            writer.write(f"{line}\r\n".encode())
+
+        send("* OK [CAPABILITY IMAP4rev1] mail-sink ready")
+        literal = re.compile(rb'\{(\d+)\}\r?\n$')
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                # Commands with a literal ({n}) continue on the following bytes
+                match = literal.search(line)
+                payload = None
+                if match:
+                    send("+ Ready for literal data")
+                    await writer.drain()
+                    payload = await reader.readexactly(int(match.group(1)))
+                    await reader.readline()
+
+                parts = line.decode('utf-8', 'replace').strip().split(' ', 2)
+                tag = parts[0]
+                verb = parts[1].upper() if len(parts) > 1 else ''
+
+                if verb == 'CAPABILITY':
+                    send("* CAPABILITY IMAP4rev1 AUTH=PLAIN")
+                    send(f"{tag} OK CAPABILITY completed")
+                elif verb == 'LOGIN':
+                    send(f"{tag} OK LOGIN completed")
+                elif verb == 'LIST':
+                    send('* LIST (\\HasNoChildren) "/" "INBOX"')
+                    send(f'* LIST (\\HasNoChildren \\Sent) "/" "{self.sent_folder}"')
+                    send(f"{tag} OK LIST completed")
+                elif verb == 'APPEND':
+                    if self.delay:
+                        await asyncio.sleep(self.delay)
+                    folder = parts[2].split('"')[1] if '"' in parts[2] else parts[2].split(' ')[0]
+                    self.appended.append({'folder': folder, 'data': payload or b'', 'received_at': time.time()})
+                    send(f"{tag} OK APPEND completed")
+                elif verb == 'NOOP':
+                    send(f"{tag} OK NOOP completed")
+                elif verb == 'LOGOUT':
+                    send("* BYE mail-sink logging out")
+                    send(f"{tag} OK LOGOUT completed")
+                    await writer.drain()
+                    break
+                else:
+                    send(f"{tag} BAD Command not implemented")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _serve(args):
+    sink = await MailSink(args.host, args.smtp_port, args.imap_port, args.delay).start()
+    print(f"Mail sink listening: SMTP {args.host}:{sink.smtp_port}, IMAP {args.host}:{sink.imap_port}")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(f"Received {len(sink.messages)} messages, {len(sink.appended)} Sent copies")
+    finally:
+        await sink.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local SMTP/IMAP sink for offline send tests")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--smtp-port', type=int, default=2525)
+    parser.add_argument('--imap-port', type=int, default=2143)
+    parser.add_argument('--delay', type=float, default=0.0, help="Seconds added to each DATA/APPEND reply")
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
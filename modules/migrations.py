@@ -0,0 +1,169 @@
+"""
+Versioned schema migrations.
+
+Each migration runs once, in order, and is recorded in the schema_version
+table. App startup only reads the current version (one query); applying
+migrations is `python migrate.py`, run as a deploy step (or on startup when
+MIGRATE_ON_STARTUP is on).
+
+Migration 1 runs create_all with the current models, so a fresh database
+already has every table, column and index of later migrations. Later
+migrations must therefore be idempotent: add columns with add_column() and
+indexes (declared on the model) with create_indexes().
+"""
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlmodel import SQLModel, Session, select, func
+
+from database import SchemaVersion
+
+# Held while migrating on Postgres, so two starting workers never migrate at once
+MIGRATION_LOCK_ID = 4_211_046
+
+
+def add_column(engine, table, column, ddl):
+    """ALTER TABLE ... ADD COLUMN unless `table` already has `column` (portable IF NOT EXISTS)"""
+    if column in {c['name'] for c in inspect(engine).get_columns(table)}:
+        return
+    with engine.begin() as conn:
+        conn.execute(text(f'ALTER TABLE {table} ADD COLUMN "{column}" {ddl}'))
+
+
+def create_indexes(engine, *names):
+    """
+    Creates model indexes (by name) that do not exist yet. On Postgres they are built
+    CONCURRENTLY, so a big table keeps taking writes meanwhile.
+    """
+    indexes = {index.name: index for table in SQLModel.metadata.tables.values() for index in table.indexes}
+    for name in names:
+        index = indexes[name]
+        if engine.dialect.name != 'postgresql':
+            index.create(engine, checkfirst=True)
+            continue
+        ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=engine.dialect))
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)))
+
+
+def _create_tables(engine):
+    SQLModel.metadata.create_all(engine)
+
+
+def _legacy_columns(engine):
+    # Formerly ALTERed on every startup by create_db_and_tables() and the lifespan hook
+    add_column(engine, 'client_profiles', 'nextMilestone', 'VARCHAR(255)')
+    add_column(engine, 'client_profiles', 'nextMilestoneDate', 'VARCHAR(255)')
+    add_column(engine, 'client_profiles', 'recommended_services', 'VARCHAR(1000)')
+    add_column(engine, 'client_profiles', 'projectId', 'INTEGER')
+    add_column(engine, 'client_profiles', 'services_offered', 'TEXT')
+    add_column(engine, 'client_profiles', 'services_requested', 'TEXT')
+    add_column(engine, 'client_profiles', 'outbound_email_sent', 'BOOLEAN DEFAULT FALSE')
+    add_column(engine, 'client_profiles', 'inbound_email_sent', 'BOOLEAN DEFAULT FALSE')
+    add_column(engine, 'companies', 'recommended_services', 'VARCHAR(1000)')
+    add_column(engine, 'remarks', 'projectId', 'INTEGER')
+    add_column(engine, 'documents', 'contentHash', 'VARCHAR(64)')
+    with engine.begin() as conn:
+        conn.execute(text('CREATE INDEX IF NOT EXISTS "ix_documents_contentHash" ON documents ("contentHash")'))
+
+
+def _project_membership(engine):
+    from modules.project_members import backfill_project_members
+    print(f"👥 Moved {backfill_project_members(engine)} project memberships to project_members/project_clients")
+
+
+def _client_metrics(engine):
+    from modules.dashboard_stats import backfill_client_metrics
+    print(f"📊 Built {backfill_client_metrics(engine)} client metrics rollup rows")
+
+
+def _hot_query_indexes(engine):
+    create_indexes(
+        engine,
+        'ix_users_role_created',
+        'ix_projects_created',
+        'ix_client_profiles_status',
+        'ix_client_profiles_user',
+        'ix_client_profiles_employee',
+        'ix_client_profiles_project',
+        'ix_remarks_client_created',
+        'ix_remarks_project_created',
+        'ix_activity_logs_client_created',
+        'ix_companies_primary_email',
+        'ix_companies_created'
+    )
+
+
+def _search_index(engine):
+    from modules.search import create_search_index
+    create_search_index(engine)
+
+
+def _client_keywords(engine):
+    from modules.client_keywords import backfill_client_keywords
+    print(f"🔑 Moved {backfill_client_keywords(engine)} target keywords to client_keywords")
+
+
+def _unique_document_hash(engine):
+    from modules.document_ocr import dedupe_documents
+    print(f"🧾 Removed {dedupe_documents(engine)} duplicate OCR document rows")
+    unique = {index['name']: index['unique'] for index in inspect(engine).get_indexes('documents')}
+    if not unique.get('ix_documents_contentHash'):
+        # Migration 2 created it non-unique; databases created since have the unique one
+        with engine.begin() as conn:
+            conn.execute(text('DROP INDEX IF EXISTS "ix_documents_contentHash"'))
+        create_indexes(engine, 'ix_documents_contentHash')
+
+
+# (version, description, callable(engine)) - append only, never renumber
+MIGRATIONS = [
+    (1, "Create tables", _create_tables),
+    (2, "Milestone, service tracking, project and OCR hash columns", _legacy_columns),
+    (3, "Project membership from the projects JSON lists", _project_membership),
+    (4, "Client metrics rollup from the email and activity logs", _client_metrics),
+    (5, "Indexes for the list, lookup and dashboard queries", _hot_query_indexes),
+    (6, "Full-text search index (Postgres GIN, SQLite FTS5)", _search_index),
+    (7, "Client target keywords from the profiles JSON list", _client_keywords),
+    (8, "One OCR document row per image hash (unique contentHash)", _unique_document_hash),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(engine):
+    """Highest applied migration (0 for a database that has never been migrated). One query."""
+    try:
+        with Session(engine) as session:
+            return session.exec(select(func.max(SchemaVersion.version))).one() or 0
+    except (OperationalError, ProgrammingError):
+        return 0 # No schema_version table yet
+
+
+def migrate(engine, target=None):
+    """
+    Applies the pending migrations up to `target` (default: all), each recorded as soon
+    as it succeeds. Returns the versions applied.
+    """
+    target = target or LATEST_VERSION
+    with engine.connect() as lock:
+        if engine.dialect.name == 'postgresql':
+            lock.execute(text("SELECT pg_advisory_lock(:id)"), {'id': MIGRATION_LOCK_ID})
+        try:
+            SchemaVersion.__table__.create(engine, checkfirst=True)
+            version = current_version(engine) # Another worker may have migrated while we waited
+            applied = []
+            for number, description, apply in MIGRATIONS:
+                if number <= version or number > target:
+                    continue
+                print(f"🛠️ Applying migration {number}: {description}")
+                apply(engine)
+                with Session(engine) as session:
+                    session.add(SchemaVersion(version=number, description=description, appliedAt=datetime.utcnow()))
+                    session.commit()
+                applied.append(number)
+            return applied
+        finally:
+            if engine.dialect.name == 'postgresql':
+                lock.execute(text("SELECT pg_advisory_unlock(:id)"), {'id': MIGRATION_LOCK_ID})
+                lock.commit()
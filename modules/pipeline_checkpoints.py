@@ -0,0 +1,100 @@
+import json
+import asyncio
+import hashlib
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, select
+from sqlalchemy.exc import IntegrityError
+
+from database import PipelineCheckpoint
+
+
+def fingerprint(inputs):
+    """
+    Returns a stable SHA-256 of a stage's inputs (any JSON-serializable value).
+    """
+    encoded = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def _is_failure(output):
+    if output is None:
+        return True
+    if isinstance(output, str):
+        return output.startswith("ERROR SCRAPING")
+    return isinstance(output, dict) and bool(output.get('error'))
+
+
+class StageCheckpointer:
+    """
+    Runs the outreach pipeline stages for one prospect, reusing saved outputs.
+
+    Each stage's output is stored with a fingerprint of its inputs. A stage is
+    re-run only when it has no checkpoint, its inputs changed, or the checkpoint
+    is older than `max_age_hours`. Failed outputs are never saved, so a retry
+    picks up at the first stage that did not succeed.
+    """
+
+    def __init__(self, engine, prospect_key, max_age_hours=72):
+        self.engine = engine
+        self.prospect_key = prospect_key
+        self.max_age = timedelta(hours=max_age_hours)
+        self._checkpoints = None
+
+    def _load_all(self):
+        with Session(self.engine) as session:
+            rows = session.exec(
+                select(PipelineCheckpoint).where(PipelineCheckpoint.prospectKey == self.prospect_key)
+            ).all()
+            return {row.stage: (row.fingerprint, row.updatedAt, row.output) for row in rows}
+
+    def _save(self, stage, stage_fingerprint, output):
+        now = datetime.utcnow()
+        with Session(self.engine) as session:
+            row = session.exec(
+                select(PipelineCheckpoint).where(
+                    PipelineCheckpoint.prospectKey == self.prospect_key,
+                    PipelineCheckpoint.stage == stage
+                )
+            ).first()
+            if not row:
+                row = PipelineCheckpoint(prospectKey=self.prospect_key, stage=stage, fingerprint=stage_fingerprint)
+            row.fingerprint = stage_fingerprint
+            row.output = {"value": output}
+            row.updatedAt = now
+            session.add(row)
+            try:
+                session.commit()
+            except IntegrityError:
+                # Another worker saved the same stage first; its output is just as good
+                session.rollback()
+        self._checkpoints[stage] = (stage_fingerprint, now, {"value": output})
+
+    async def run(self, stage, inputs, fn, *args):
+        """
+        Returns the saved output of `stage` if still valid for `inputs`,
+        otherwise runs fn(*args) in a worker thread and checkpoints the result.
+        """
+        if self._checkpoints is None:
+            try:
+                self._checkpoints = await asyncio.to_thread(self._load_all)
+            except Exception as e:
+                print(f"Checkpoint load failed for {self.prospect_key}: {e}")
+                self._checkpoints = {}
+
+        stage_fingerprint = fingerprint(inputs)
+        saved = self._checkpoints.get(stage)
+        if saved:
+            saved_fingerprint, saved_at, saved_output = saved
+            if saved_fingerprint == stage_fingerprint and datetime.utcnow() - saved_at < self.max_age:
+                print(f"♻️ Reusing '{stage}' checkpoint for {self.prospect_key}")
+                return (saved_output or {}).get("value")
+
+        output = await asyncio.to_thread(fn, *args)
+
+        if not _is_failure(output):
+            try:
+                await asyncio.to_thread(self._save, stage, stage_fingerprint, output)
+            except Exception as e:
+                print(f"Checkpoint save failed for {self.prospect_key}/{stage}: {e}")
+        return output
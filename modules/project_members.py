@@ -0,0 +1,97 @@
+"""
+Project membership writes and the one-time move off the projects JSON lists.
+
+Team members and clients used to be JSON id lists on the projects row
+(employeeIds, internIds, clientIds). They now live in the project_members and
+project_clients junction tables, indexed both ways, so "projects of user X"
+and "team of project Y" are single index lookups. The API keeps the old list
+fields; see crm_queries.project_membership.
+"""
+import json
+
+from sqlalchemy import inspect, text
+from sqlmodel import Session, select, delete
+
+from database import ProjectMember, ProjectClient, User, ClientProfile
+
+# API list field -> project_members.role (clientIds is project_clients)
+MEMBER_ROLES = {'employeeIds': 'Employee', 'internIds': 'Intern'}
+MEMBERSHIP_FIELDS = [*MEMBER_ROLES, 'clientIds']
+
+
+class UnknownMemberError(ValueError):
+    """Raised when a membership list names a user or client that does not exist"""
+    pass
+
+
+def _unique(ids):
+    return list(dict.fromkeys(int(i) for i in ids or []))
+
+
+async def set_project_membership(session, project_id, field, ids):
+    """
+    Replaces one membership list of a project (`field` is employeeIds, internIds
+    or clientIds) in the caller's transaction. Unknown ids raise UnknownMemberError.
+    """
+    ids = _unique(ids)
+    if field == 'clientIds':
+        table, model = ProjectClient, ClientProfile
+        scope = ProjectClient.projectId == project_id
+        rows = [ProjectClient(projectId=project_id, clientId=i) for i in ids]
+    else:
+        table, model = ProjectMember, User
+        scope = (ProjectMember.projectId == project_id) & (ProjectMember.role == MEMBER_ROLES[field])
+        rows = [ProjectMember(projectId=project_id, userId=i, role=MEMBER_ROLES[field]) for i in ids]
+
+    if ids:
+        found = set((await session.exec(select(model.id).where(model.id.in_(ids)))).all())
+        missing = [i for i in ids if i not in found]
+        if missing:
+            raise UnknownMemberError(f"Unknown {field[:-3]} ids: {missing}")
+
+    await session.exec(delete(table).where(scope))
+    session.add_all(rows)
+
+
+async def remove_user_memberships(session, user_id):
+    """
+    Takes a user off every project team, in the caller's transaction. Done explicitly:
+    SQLite only honours the ON DELETE CASCADE when foreign keys are switched on.
+    """
+    await session.exec(delete(ProjectMember).where(ProjectMember.userId == user_id))
+
+
+def backfill_project_members(engine):
+    """
+    Copies the legacy projects.employeeIds/internIds/clientIds JSON lists into the
+    junction tables, once (while both tables are still empty). Ids that no longer
+    exist are dropped. Returns how many memberships were written.
+    """
+    legacy = {column['name'] for column in inspect(engine).get_columns('projects')}
+    if not legacy.issuperset(MEMBERSHIP_FIELDS):
+        return 0
+
+    with Session(engine) as session:
+        if (session.exec(select(ProjectMember.projectId).limit(1)).first() is not None
+                or session.exec(select(ProjectClient.projectId).limit(1)).first() is not None):
+            return 0
+
+        lists = session.exec(text('SELECT id, "employeeIds", "internIds", "clientIds" FROM projects')).all()
+        users = set(session.exec(select(User.id)).all())
+        clients = set(session.exec(select(ClientProfile.id)).all())
+
+        written = 0
+        for project_id, *values in lists:
+            # JSON columns come back parsed on Postgres and as text on SQLite
+            values = [json.loads(v) if isinstance(v, str) else v for v in values]
+            for field, ids in zip(MEMBERSHIP_FIELDS, values):
+                for member_id in _unique(ids):
+                    if field == 'clientIds':
+                        if member_id in clients:
+                            session.add(ProjectClient(projectId=project_id, clientId=member_id))
+                            written += 1
+                    elif member_id in users:
+                        session.add(ProjectMember(projectId=project_id, userId=member_id, role=MEMBER_ROLES[field]))
+                        written += 1
+        session.commit()
+        return written
@@ -0,0 +1,106 @@
+import io
+import csv
+import zipfile
+from urllib.parse import urlparse
+
+# Accepted spellings for each prospect column (compared lowercased, trimmed)
+HEADER_ALIASES = {
+    'company_name': ('company_name', 'company', 'company name', 'business', 'business name', 'name'),
+    'website_url': ('website_url', 'website', 'website url', 'url', 'site', 'domain', 'web'),
+    'primary_email': ('primary_email', 'email', 'e-mail', 'email address', 'contact email'),
+}
+
+# What a malformed upload raises while it is read (bad encoding, broken CSV, corrupt or non-XLSX zip)
+UNREADABLE_FILE_ERRORS = (ValueError, csv.Error, zipfile.BadZipFile, KeyError)
+
+
+def _map_headers(headers):
+    """Returns {column index: field name} for the headers we recognise."""
+    normalized = [str(h or '').strip().lower() for h in headers]
+    mapping = {}
+    for field, aliases in HEADER_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized and normalized.index(alias) not in mapping:
+                mapping[normalized.index(alias)] = field
+                break
+    return mapping
+
+
+def _rows_to_prospects(rows):
+    rows = iter(rows)
+    headers = next(rows, None)
+    if headers is None:
+        return
+    mapping = _map_headers(headers)
+    if 'website_url' not in mapping.values():
+        raise ValueError("No website column found (expected one of: website_url, website, url, domain)")
+
+    for line_number, row in enumerate(rows, start=2):
+        prospect = {'row': line_number, 'company_name': '', 'website_url': '', 'primary_email': ''}
+        for index, field in mapping.items():
+            if index < len(row) and row[index] is not None:
+                prospect[field] = str(row[index]).strip()
+        if any(prospect[f] for f in HEADER_ALIASES):
+            yield prospect
+
+
+def iter_csv_prospects(fileobj):
+    """
+    Streams prospect dicts from a binary CSV file object.
+    """
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    try:
+        yield from _rows_to_prospects(csv.reader(text))
+    finally:
+        text.detach()
+
+
+def iter_xlsx_prospects(fileobj):
+    """
+    Streams prospect dicts from the first sheet of an XLSX file object.
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("XLSX import requires openpyxl (pip install openpyxl); upload a CSV instead")
+
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        yield from _rows_to_prospects(workbook.active.iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+
+def iter_prospects(filename, fileobj):
+    """
+    Streams prospect dicts ({row, company_name, website_url, primary_email}) from a CSV or XLSX upload.
+    """
+    if (filename or '').lower().endswith(('.xlsx', '.xlsm')):
+        return iter_xlsx_prospects(fileobj)
+    return iter_csv_prospects(fileobj)
+
+
+def domain_key(url):
+    """
+    Returns the bare domain of a URL (lowercase, no scheme, port or leading www.),
+    or '' when there is none or the URL is malformed (e.g. 'http://[bad').
+    """
+    url = (url or '').strip().lower()
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    try:
+        host = urlparse(url).hostname or ''
+    except ValueError:
+        return ''
+    return host[4:] if host.startswith('www.') else host
+
+
+def url_variants(domain):
+    """
+    Returns the stored website_url spellings that refer to a domain's home page.
+    """
+    variants = []
+    for scheme in ('https://', 'http://'):
+        for host in (domain, f'www.{domain}'):
+            variants.extend([f'{scheme}{host}', f'{scheme}{host}/'])
+    return variants
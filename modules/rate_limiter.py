@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, select, func, update, delete, text, case
+
+from database import SendRateBucket, EmailLog
+
+
+def _minute(moment):
+    return moment.replace(second=0, microsecond=0)
+
+
+class SendRateLimiter:
+    """
+    Sliding-window send limiter backed by per-minute counters (send_rate_buckets).
+
+    "How many can I send now" sums at most `window_minutes` small rows, so its
+    cost does not grow with email_logs. reserve() checks and increments the
+    current minute inside one transaction holding a per-sender lock
+    (pg_advisory_xact_lock on Postgres), so concurrent uvicorn workers can
+    never both take the last slot. A reservation whose send fails is handed
+    back with release(). An optional daily cap is checked over the last
+    `daily_window_minutes` in the same transaction.
+    """
+
+    def __init__(self, engine, window_minutes=60, daily_window_minutes=1440):
+        self.engine = engine
+        self.window = timedelta(minutes=window_minutes)
+        self.daily_window = timedelta(minutes=daily_window_minutes)
+        # Buckets are kept long enough for the longest window that reads them
+        self.retention = max(2 * self.window, self.daily_window + self.window)
+
+    def _lock_sender(self, session, sender_email):
+        if self.engine.dialect.name == 'postgresql':
+            session.exec(text("SELECT pg_advisory_xact_lock(hashtext(:sender))").bindparams(sender=sender_email))
+
+    def _sent_in_window(self, session, sender_email, now, window=None):
+        return session.exec(
+            select(func.coalesce(func.sum(SendRateBucket.sent), 0)).where(
+                SendRateBucket.senderEmail == sender_email,
+                SendRateBucket.windowStart > _minute(now - (window or self.window))
+            )
+        ).one()
+
+    def sent_in_window(self, sender_email, now=None):
+        """
+        Sends recorded for a sender inside the current window.
+        """
+        now = now or datetime.utcnow()
+        with Session(self.engine) as session:
+            return self._sent_in_window(session, sender_email, now)
+
+    def usage(self, sender_emails, now=None):
+        """
+        Returns {sender: (sent in window, sent in daily window)} for many senders in one query.
+        """
+        now = now or datetime.utcnow()
+        window_start = _minute(now - self.window)
+        with Session(self.engine) as session:
+            rows = session.exec(
+                select(
+                    SendRateBucket.senderEmail,
+                    func.sum(case((SendRateBucket.windowStart > window_start, SendRateBucket.sent), else_=0)),
+                    func.sum(SendRateBucket.sent)
+                )
+                .where(
+                    SendRateBucket.senderEmail.in_(list(sender_emails)),
+                    SendRateBucket.windowStart > _minute(now - self.daily_window)
+                )
+                .group_by(SendRateBucket.senderEmail)
+            ).all()
+        usage = {sender: (0, 0) for sender in sender_emails}
+        for sender, hourly, daily in rows:
+            usage[sender] = (int(hourly or 0), int(daily or 0))
+        return usage
+
+    def remaining(self, sender_email, limit, now=None):
+        """
+        How many more emails the sender may send right now.
+        """
+        return max(0, limit - self.sent_in_window(sender_email, now))
+
+    def reserve(self, sender_email, limit, count=1, now=None, daily_limit=None):
+        """
+        Atomically takes `count` send slots for the sender.
+        Returns a reservation to pass to release() if the send fails, or None if the window
+        (or the daily window, when daily_limit is given) is full.
+        """
+        now = now or datetime.utcnow()
+        window_start = _minute(now)
+        with Session(self.engine) as session:
+            self._lock_sender(session, sender_email)
+            if self._sent_in_window(session, sender_email, now) + count > limit:
+                session.rollback()
+                return None
+            if daily_limit is not None and self._sent_in_window(session, sender_email, now, self.daily_window) + count > daily_limit:
+                session.rollback()
+                return None
+
+            bumped = session.exec(
+                update(SendRateBucket)
+                .where(SendRateBucket.senderEmail == sender_email, SendRateBucket.windowStart == window_start)
+                .values(sent=SendRateBucket.sent + count)
+            )
+            if bumped.rowcount == 0:
+                session.add(SendRateBucket(senderEmail=sender_email, windowStart=window_start, sent=count))
+
+            # Buckets that left the window are never read again
+            session.exec(
+                delete(SendRateBucket).where(
+                    SendRateBucket.senderEmail == sender_email,
+                    SendRateBucket.windowStart < _minute(now - self.retention)
+                )
+            )
+            session.commit()
+        return {'sender_email': sender_email, 'window_start': window_start, 'count': count}
+
+    def release(self, reservation):
+        """
+        Gives back the slots of a reservation whose send did not happen.
+        """
+        if not reservation:
+            return
+        with Session(self.engine) as session:
+            session.exec(
+                update(SendRateBucket)
+                .where(
+                    SendRateBucket.senderEmail == reservation['sender_email'],
+                    SendRateBucket.windowStart == reservation['window_start'],
+                    SendRateBucket.sent >= reservation['count']
+                )
+                .values(sent=SendRateBucket.sent - reservation['count'])
+            )
+            session.commit()
+
+    def backfill_from_logs(self, sender_email, now=None):
+        """
+        Seeds the buckets from email_logs when a sender has none yet in the daily window
+        (first start after upgrading), so the limits carry over.
+        """
+        now = now or datetime.utcnow()
+        since = _minute(now - self.daily_window)
+        with Session(self.engine) as session:
+            has_buckets = session.exec(
+                select(SendRateBucket.senderEmail).where(
+                    SendRateBucket.senderEmail == sender_email,
+                    SendRateBucket.windowStart > since
+                ).limit(1)
+            ).first()
+            if has_buckets:
+                return 0
+
+            logs = session.exec(
+                select(EmailLog.sent_at).where(EmailLog.sender_email == sender_email, EmailLog.sent_at > since)
+            ).all()
+            per_minute = {}
+            for sent_at in logs:
+                per_minute[_minute(sent_at)] = per_minute.get(_minute(sent_at), 0) + 1
+            for window_start, sent in per_minute.items():
+                session.add(SendRateBucket(senderEmail=sender_email, windowStart=window_start, sent=sent))
+            session.commit()
+            return len(logs)
@@ -0,0 +1,206 @@
+"""
+Full-text search over client profiles, remarks, activity notes and OCR'd documents.
+
+Postgres: each table has a GIN expression index on the to_tsvector() of its
+searchable text, which Postgres keeps current on every write. Queries use the
+same expression (so they hit the index), websearch_to_tsquery() for the user's
+input and ts_rank for ordering.
+
+SQLite: an FTS5 table, search_index, kept current by triggers on the four
+tables and ranked by bm25. A row's rowid is `source id * 4 + kind number`, so
+triggers replace it by rowid and results map back to their source row.
+"""
+import re
+from functools import reduce
+
+from sqlalchemy import (
+    Table, MetaData, Column, Integer, String, Text, Float, JSON,
+    select, union_all, literal_column, null, func, cast, case, type_coerce, text
+)
+
+from database import ClientProfile, Remark, ActivityLog, Document
+from modules import crm_queries
+
+TS_CONFIG = 'english'
+KINDS = ['client', 'remark', 'activity', 'document'] # position = kind number in search_index rowids
+
+# kind -> (model, clientId column, title column, searchable columns)
+SOURCES = {
+    'client': (ClientProfile, 'id', 'companyName', [
+        'companyName', 'gmbName', 'targetKeywords', 'services_offered', 'services_requested', 'recommended_services'
+    ]),
+    'remark': (Remark, 'clientId', None, ['content']),
+    'activity': (ActivityLog, 'clientId', 'action', ['content']),
+    'document': (Document, 'clientId', 'filename', ['ocrText']),
+}
+
+# SQLite FTS5 index (created by the migration, not by create_all)
+search_index = Table(
+    'search_index', MetaData(),
+    Column('rowid', Integer),
+    Column('body', Text),
+    Column('title', String),
+    Column('clientId', Integer)
+)
+
+
+class SearchUnavailableError(RuntimeError):
+    """Raised when the database has no full-text search support (neither Postgres nor SQLite)"""
+    pass
+
+
+def _body(model, names):
+    """Searchable text of a row: the columns joined by spaces (literals inline, so the index expression matches)"""
+    columns = [model.__table__.c[name] for name in names]
+    parts = [
+        func.coalesce(cast(column, Text) if isinstance(column.type, JSON) else column, literal_column("''"))
+        for column in columns
+    ]
+    return reduce(lambda left, right: left.concat(literal_column("' '")).concat(right), parts)
+
+
+def _tsvector(model, names):
+    return func.to_tsvector(literal_column(f"'{TS_CONFIG}'::regconfig"), _body(model, names))
+
+
+def _tsquery(q):
+    return func.websearch_to_tsquery(literal_column(f"'{TS_CONFIG}'::regconfig"), q)
+
+
+def _fts5_query(q):
+    """User input as FTS5 terms: every word must appear (each quoted, so FTS5 operators in the input are plain text)"""
+    return ' '.join(f'"{term}"' for term in re.findall(r'\w+', q))
+
+
+# ----------------------------------------------------------------------
+# Index maintenance
+# ----------------------------------------------------------------------
+
+def _postgres_ddl(engine):
+    dialect = engine.dialect
+    for model, _, _, names in SOURCES.values():
+        table = model.__tablename__
+        expression = dialect.statement_compiler(dialect, None).process(
+            _tsvector(model, names), include_table=False, literal_binds=True
+        )
+        yield f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_search ON {table} USING gin ({expression})"
+
+
+def _sqlite_row(number, kind, row):
+    """search_index values of a source row (`row` is 'new.', 'old.' or '' in a SELECT)"""
+    _, client_column, title, names = SOURCES[kind]
+    body = " || ' ' || ".join(f"coalesce({row}\"{name}\", '')" for name in names)
+    title = f'{row}"{title}"' if title else 'NULL'
+    return f'{row}id * 4 + {number}, {body}, {title}, {row}"{client_column}"'
+
+
+def _sqlite_ddl():
+    yield (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index "
+        "USING fts5(body, title UNINDEXED, \"clientId\" UNINDEXED, tokenize='porter unicode61')"
+    )
+    for number, kind in enumerate(KINDS):
+        model, client_column, title, names = SOURCES[kind]
+        table = model.__tablename__
+        watched = ', '.join(f'"{name}"' for name in dict.fromkeys([*names, title, client_column]) if name and name != 'id')
+        insert = f'INSERT INTO search_index(rowid, body, title, "clientId") VALUES ({_sqlite_row(number, kind, "new.")});'
+        delete = f'DELETE FROM search_index WHERE rowid = old.id * 4 + {number};'
+        yield f"CREATE TRIGGER IF NOT EXISTS search_{table}_insert AFTER INSERT ON {table} BEGIN {insert} END"
+        yield f"CREATE TRIGGER IF NOT EXISTS search_{table}_update AFTER UPDATE OF {watched} ON {table} BEGIN {delete} {insert} END"
+        yield f"CREATE TRIGGER IF NOT EXISTS search_{table}_delete AFTER DELETE ON {table} BEGIN {delete} END"
+
+    # (Re)build from the existing rows
+    yield "DELETE FROM search_index"
+    for number, kind in enumerate(KINDS):
+        yield (
+            f'INSERT INTO search_index(rowid, body, title, "clientId") '
+            f'SELECT {_sqlite_row(number, kind, "")} FROM {SOURCES[kind][0].__tablename__}'
+        )
+
+
+def create_search_index(engine):
+    """Creates the full-text index for the engine's database (idempotent; SQLite rebuilds its copy)"""
+    if engine.dialect.name == 'postgresql':
+        # CONCURRENTLY cannot run inside a transaction
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for ddl in _postgres_ddl(engine):
+                conn.execute(text(ddl))
+    elif engine.dialect.name == 'sqlite':
+        with engine.begin() as conn:
+            for ddl in _sqlite_ddl():
+                conn.execute(text(ddl))
+    else:
+        raise SearchUnavailableError(f"No full-text search for {engine.dialect.name}")
+
+
+# ----------------------------------------------------------------------
+# Queries
+# ----------------------------------------------------------------------
+
+def _postgres_matches(q, kinds, client_id):
+    query = _tsquery(q)
+    branches = []
+    for kind in kinds:
+        model, client_column, title, names = SOURCES[kind]
+        vector = _tsvector(model, names)
+        client = model.__table__.c[client_column]
+        branch = select(
+            literal_column(f"'{kind}'", String).label('kind'),
+            model.__table__.c.id.label('id'),
+            client.label('clientId'),
+            (model.__table__.c[title] if title else cast(null(), String)).label('title'),
+            _body(model, names).label('body'),
+            type_coerce(func.ts_rank(vector, query), Float).label('rank')
+        ).where(vector.op('@@')(query))
+        if client_id is not None:
+            branch = branch.where(client == client_id)
+        branches.append(branch)
+    matches = union_all(*branches).subquery('matches')
+    # ts_headline is costly: Postgres only computes it for the rows that survive the LIMIT
+    snippet = func.ts_headline(
+        literal_column(f"'{TS_CONFIG}'::regconfig"), matches.c.body, query,
+        literal_column("'MaxWords=20, MinWords=8'")
+    )
+    return matches, snippet
+
+
+def _sqlite_matches(q, kinds, client_id):
+    fts = literal_column('search_index')
+    kind_number = search_index.c.rowid.op('&', return_type=Integer)(3)
+    statement = select(
+        case(*[(kind_number == number, kind) for number, kind in enumerate(KINDS)]).label('kind'),
+        search_index.c.rowid.op('>>', return_type=Integer)(2).label('id'),
+        search_index.c.clientId.label('clientId'),
+        search_index.c.title.label('title'),
+        func.snippet(fts, 0, '<b>', '</b>', '…', 20).label('snippet'),
+        type_coerce(-func.bm25(fts), Float).label('rank')
+    ).where(fts.match(_fts5_query(q)))
+    if len(kinds) < len(KINDS):
+        statement = statement.where(kind_number.in_([KINDS.index(kind) for kind in kinds]))
+    if client_id is not None:
+        statement = statement.where(search_index.c.clientId == client_id)
+    matches = statement.subquery('matches')
+    return matches, matches.c.snippet
+
+
+async def search_records(session, q, kinds=None, client_id=None, cursor=None, limit=20):
+    """
+    Ranked full-text matches for `q` (best first) across `kinds` (default: all),
+    optionally within one client. Returns (rows, next cursor) like the list queries.
+    """
+    kinds = kinds or KINDS
+    dialect = session.bind.dialect.name
+    if dialect == 'postgresql':
+        matches, snippet = _postgres_matches(q, kinds, client_id)
+    elif dialect == 'sqlite':
+        if not _fts5_query(q):
+            return [], None
+        matches, snippet = _sqlite_matches(q, kinds, client_id)
+    else:
+        raise SearchUnavailableError(f"No full-text search for {dialect}")
+
+    statement = select(
+        matches.c.kind, matches.c.id, matches.c.clientId, matches.c.title, snippet.label('snippet'), matches.c.rank
+    )
+    keys = [matches.c.rank, matches.c.kind, matches.c.id]
+    return await crm_queries.keyset_page(session, statement, keys, cursor, limit, descending=True)
@@ -0,0 +1,267 @@
+import asyncio
+import hashlib
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, select, func, update
+from sqlalchemy.exc import IntegrityError
+
+from database import OutboundEmail
+
+
+# A default (content) key only dedupes while its message is pending; these free it for a resend
+RESENDABLE_STATUSES = ('Sent', 'Failed', 'Cancelled')
+
+
+def idempotency_key(kind, to_email, subject, body):
+    """
+    Default dedupe key: the same message to the same person is queued once while it is
+    pending (see RESENDABLE_STATUSES). Interrupted messages keep it: they may have gone out.
+    """
+    raw = "\x1f".join([kind or '', (to_email or '').strip().lower(), subject or '', body or ''])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class SendQueueDispatcher:
+    """
+    Background dispatcher for the outbound_emails queue.
+
+    Each message goes out from the least-loaded account of the SenderPool that is
+    not waiting out its pace (one send every 3600 / hourly_limit seconds per
+    account, so sends spread across the hour instead of bunching at its start).
+    The slot is taken through the shared SendRateLimiter, which keeps every
+    account's hard cap across workers. A message is claimed with an optimistic Queued -> Sending UPDATE before the
+    SMTP call. A message found still Sending after a restart is marked
+    Interrupted and never retried automatically, so nothing goes out twice.
+    """
+
+    def __init__(self, engine, send_fn, sender_pool, on_sent=None, on_failed=None, poll_interval=5.0,
+                 max_attempts=3, sending_timeout_seconds=600):
+        self.engine = engine
+        self.send_fn = send_fn # callable(message, account) -> None, raises on failure
+        self.sender_pool = sender_pool
+        self.on_sent = on_sent # callable(session, message) for post-send bookkeeping
+        self.on_failed = on_failed # callable(session, message) once a message is given up on (committed with it)
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.sending_timeout = timedelta(seconds=sending_timeout_seconds)
+        self._task = None
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        print(f"Send queue dispatcher started ({len(self.sender_pool.accounts)} sender accounts, "
+              f"one email every {self.sender_pool.spacing.total_seconds():.0f}s on average)")
+
+    async def stop(self):
+        self._stopping = True
+        self._wakeup.set()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    # ------------------------------------------------------------------
+    # Enqueue & status
+    # ------------------------------------------------------------------
+
+    def notify(self):
+        """Wake the dispatcher (after committing messages added with commit=False)."""
+        self._wakeup.set()
+
+    def enqueue(self, session, to_email, subject, body, kind="adhoc", priority=0,
+                client_id=None, html=True, key=None, commit=True):
+        """
+        Queues a message and returns its row. Re-submitting the same message
+        (same idempotency key) returns the existing row instead of queueing it twice.
+        An explicit `key` dedupes for good; the default content key only until the
+        message is sent, failed or cancelled, so an intentional resend queues again.
+        With commit=False the row is only flushed, so it joins the caller's transaction.
+        """
+        content_key = key is None
+        key = key or idempotency_key(kind, to_email, subject, body)
+        existing = session.exec(select(OutboundEmail).where(OutboundEmail.idempotencyKey == key)).first()
+        if existing and content_key and existing.status in RESENDABLE_STATUSES:
+            # Retire the finished row's key (conditional, in case the dispatcher just changed it)
+            session.exec(
+                update(OutboundEmail)
+                .where(OutboundEmail.id == existing.id, OutboundEmail.status.in_(RESENDABLE_STATUSES))
+                .values(idempotencyKey=f"done:{existing.id.hex}")
+            )
+            session.flush()
+            existing = None
+        if existing:
+            return existing
+
+        message = OutboundEmail(
+            idempotencyKey=key,
+            toEmail=to_email,
+            subject=subject or '',
+            body=body or '',
+            html=html,
+            kind=kind,
+            priority=priority,
+            clientId=client_id
+        )
+        session.add(message)
+        if not commit:
+            session.flush()
+            return message
+        try:
+            session.commit()
+        except IntegrityError:
+            # Queued concurrently by another request
+            session.rollback()
+            return session.exec(select(OutboundEmail).where(OutboundEmail.idempotencyKey == key)).first()
+        session.refresh(message)
+        self._wakeup.set()
+        return message
+
+    def queue_position(self, session, message):
+        """
+        Number of queued messages that will be sent before this one.
+        """
+        if message.status != 'Queued':
+            return 0
+        return session.exec(
+            select(func.count(OutboundEmail.id)).where(
+                OutboundEmail.status == 'Queued',
+                (OutboundEmail.priority > message.priority) |
+                ((OutboundEmail.priority == message.priority) & (OutboundEmail.createdAt < message.createdAt))
+            )
+        ).one()
+
+    def queue_positions(self, session, messages):
+        """
+        {message id: queue position} for many messages in one query (list views).
+        """
+        ids = [message.id for message in messages if message.status == 'Queued']
+        if not ids:
+            return {}
+        ranked = select(
+            OutboundEmail.id,
+            (func.row_number().over(order_by=(OutboundEmail.priority.desc(), OutboundEmail.createdAt)) - 1).label('position')
+        ).where(OutboundEmail.status == 'Queued').subquery()
+        rows = session.exec(select(ranked.c.id, ranked.c.position).where(ranked.c.id.in_(ids))).all()
+        return {message_id: position for message_id, position in rows}
+
+    def estimated_send_at(self, session, message, ahead=None):
+        """
+        Rough time the message should go out at the current pace
+        (`ahead` is its queue position when the caller already has it).
+        """
+        if message.status != 'Queued':
+            return None
+        if ahead is None:
+            ahead = self.queue_position(session, message)
+        return max(datetime.utcnow(), message.notBefore) + self.sender_pool.spacing * ahead
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+
+    def _dispatch_one(self):
+        """
+        Sends at most one message. Returns how many seconds to wait before the next attempt.
+        """
+        now = datetime.utcnow()
+        with Session(self.engine) as session:
+            # Anything still Sending long after its claim died mid-send: we cannot know if it went out
+            session.exec(
+                update(OutboundEmail)
+                .where(OutboundEmail.status == 'Sending', OutboundEmail.claimedAt < now - self.sending_timeout)
+                .values(status='Interrupted', lastError='Dispatcher stopped while sending; not retried to avoid a duplicate')
+            )
+            session.commit()
+
+            message = session.exec(
+                select(OutboundEmail)
+                .where(OutboundEmail.status == 'Queued', OutboundEmail.notBefore <= now)
+                .order_by(OutboundEmail.priority.desc(), OutboundEmail.createdAt)
+                .limit(1)
+            ).first()
+            if not message:
+                return self.poll_interval
+
+            # Pace each account evenly across the hour
+            last_sent = dict(session.exec(
+                select(OutboundEmail.senderEmail, func.max(OutboundEmail.sentAt))
+                .where(OutboundEmail.senderEmail.in_([a['email'] for a in self.sender_pool.accounts]))
+                .group_by(OutboundEmail.senderEmail)
+            ).all())
+            ready_at = {
+                account['email']: last_sent[account['email']] + self.sender_pool.account_spacing(account)
+                for account in self.sender_pool.accounts if last_sent.get(account['email'])
+            }
+            paced = [a for a in self.sender_pool.accounts if ready_at.get(a['email'], now) <= now]
+            if not paced:
+                return (min(ready_at.values()) - now).total_seconds()
+
+            account, reservation = self.sender_pool.reserve(candidates=paced, now=now)
+            if not account:
+                return 60
+
+            claimed = session.exec(
+                update(OutboundEmail)
+                .where(OutboundEmail.id == message.id, OutboundEmail.status == 'Queued')
+                .values(status='Sending', claimedAt=now, senderEmail=account['email'], attempts=OutboundEmail.attempts + 1)
+            )
+            session.commit()
+            if claimed.rowcount != 1:
+                self.sender_pool.release(reservation)
+                return 0
+            session.refresh(message)
+
+            try:
+                self.send_fn(message, account)
+            except Exception as e:
+                self.sender_pool.release(reservation)
+                message.lastError = str(e)
+                if message.attempts < self.max_attempts:
+                    message.status = 'Queued'
+                    message.notBefore = datetime.utcnow() + timedelta(minutes=2 ** message.attempts)
+                else:
+                    message.status = 'Failed'
+                    if self.on_failed:
+                        self.on_failed(session, message)
+                session.add(message)
+                session.commit()
+                print(f"❌ Queued email {message.id} to {message.toEmail} failed (attempt {message.attempts}): {e}")
+                return 0
+
+            # Record the send before anything else can fail
+            message.status = 'Sent'
+            message.sentAt = datetime.utcnow()
+            message.lastError = None
+            session.add(message)
+            session.commit()
+            print(f"✓ Queued email {message.id} sent to {message.toEmail} from {account['email']}")
+
+            if self.on_sent:
+                try:
+                    self.on_sent(session, message)
+                    session.commit()
+                except Exception as e:
+                    session.rollback()
+                    print(f"Post-send bookkeeping failed for {message.id}: {e}")
+            return 0 # another account may be free right away
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                delay = await asyncio.to_thread(self._dispatch_one)
+            except Exception as e:
+                print(f"Send queue dispatcher error: {e}")
+                delay = self.poll_interval
+
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
@@ -0,0 +1,130 @@
+import os
+import json
+from datetime import datetime, timedelta
+
+
+def load_sender_accounts(default_account=None):
+    """
+    Reads the sender mailboxes from SENDER_ACCOUNTS (a JSON list) or the JSON file
+    named by SENDER_ACCOUNTS_FILE. Each entry needs email and password; smtp_server,
+    smtp_port, imap_server, imap_port, hourly_limit and daily_limit are optional and
+    fall back to `default_account`. Without either setting, `default_account` (the
+    single OUTLOOK_EMAIL mailbox) is the whole pool.
+    """
+    defaults = dict(default_account or {})
+    raw = os.getenv('SENDER_ACCOUNTS')
+    path = os.getenv('SENDER_ACCOUNTS_FILE')
+    if not raw and path:
+        with open(path, encoding='utf-8') as f:
+            raw = f.read()
+
+    if not raw:
+        return [defaults] if defaults.get('email') and defaults.get('password') else []
+
+    accounts = []
+    for entry in json.loads(raw):
+        if not entry.get('email') or not entry.get('password'):
+            raise ValueError("Every SENDER_ACCOUNTS entry needs an email and a password")
+        account = {key: value for key, value in defaults.items() if key not in ('email', 'password')}
+        if entry.get('smtp_server') and not entry.get('imap_server'):
+            account['imap_server'] = None # guessed from this account's SMTP host, not the global one
+        account.update(entry)
+        account['smtp_port'] = int(account.get('smtp_port') or 587)
+        account['imap_port'] = int(account.get('imap_port') or 993)
+        account['hourly_limit'] = int(account.get('hourly_limit') or 50)
+        account['daily_limit'] = int(account['daily_limit']) if account.get('daily_limit') else None
+        accounts.append(account)
+    return accounts
+
+
+class SenderPool:
+    """
+    The mailboxes outreach is sent from, each with its own hourly/daily cap.
+
+    reserve() picks the least-loaded account that still has room (load is the
+    larger of its hourly and daily usage ratios) and takes the slot through the
+    shared SendRateLimiter, so total throughput grows with every account added.
+    """
+
+    def __init__(self, accounts, rate_limiter):
+        self.accounts = accounts
+        self.rate_limiter = rate_limiter
+        self._by_email = {account['email']: account for account in accounts}
+
+    def __bool__(self):
+        return bool(self.accounts)
+
+    def get(self, email):
+        return self._by_email.get(email)
+
+    @property
+    def hourly_limit(self):
+        """Combined hourly cap of every account"""
+        return sum(account['hourly_limit'] for account in self.accounts)
+
+    @property
+    def spacing(self):
+        """Average gap between sends when every account sends at its pace"""
+        return timedelta(seconds=3600 / max(1, self.hourly_limit))
+
+    def account_spacing(self, account):
+        return timedelta(seconds=3600 / max(1, account['hourly_limit']))
+
+    def usage(self, now=None):
+        """
+        Per-account usage: sent in the last hour and day, limits and remaining sends.
+        """
+        sent = self.rate_limiter.usage([account['email'] for account in self.accounts], now)
+        usage = []
+        for account in self.accounts:
+            hourly, daily = sent[account['email']]
+            remaining = account['hourly_limit'] - hourly
+            if account.get('daily_limit') is not None:
+                remaining = min(remaining, account['daily_limit'] - daily)
+            load = hourly / max(1, account['hourly_limit'])
+            if account.get('daily_limit'):
+                load = max(load, daily / account['daily_limit'])
+            usage.append({
+                'email': account['email'],
+                'sent_last_hour': hourly,
+                'sent_last_day': daily,
+                'hourly_limit': account['hourly_limit'],
+                'daily_limit': account.get('daily_limit'),
+                'remaining': max(0, remaining),
+                'load': round(load, 3)
+            })
+        return usage
+
+    def sent_last_hour(self, now=None):
+        return sum(entry['sent_last_hour'] for entry in self.usage(now))
+
+    def remaining(self, now=None):
+        return sum(entry['remaining'] for entry in self.usage(now))
+
+    def reserve(self, count=1, candidates=None, now=None):
+        """
+        Takes `count` send slots from the least-loaded eligible account.
+        Returns (account, reservation), or (None, None) when every account is at its cap.
+        """
+        now = now or datetime.utcnow()
+        allowed = {account['email'] for account in (candidates if candidates is not None else self.accounts)}
+        ranked = sorted(
+            (entry for entry in self.usage(now) if entry['email'] in allowed and entry['remaining'] >= count),
+            key=lambda entry: (entry['load'], entry['sent_last_hour'])
+        )
+        for entry in ranked:
+            account = self._by_email[entry['email']]
+            # Usage may be stale by now; the limiter re-checks under its lock
+            reservation = self.rate_limiter.reserve(
+                account['email'], account['hourly_limit'], count, now, daily_limit=account.get('daily_limit')
+            )
+            if reservation:
+                return account, reservation
+        return None, None
+
+    def release(self, reservation):
+        self.rate_limiter.release(reservation)
+
+    def backfill_from_logs(self):
+        for account in self.accounts:
+            self.rate_limiter.backfill_from_logs(account['email'])
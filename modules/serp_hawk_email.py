@@ -46,5 +46,6 @@ def generate_serp_hawk_email(company_info, market_analysis, service_matches, con
         print(f"Error in OpenAI email generation: {e}")
         return {
             "subject": f"Growth for {company_name}",
-            "body_html": f"<p>Error: {str(e)}</p>"
+            "body_html": f"<p>Error: {str(e)}</p>",
+            "error": str(e)
         }
@@ -0,0 +1,136 @@
+"""
+Deliverability pre-check with an injected resolver (no DNS traffic): null MX,
+DNS failures falling back to an unverified send, the per-domain TTL cache and
+the address-record fallback when dnspython is not installed.
+
+Run with `python test_deliverability.py` or pytest.
+"""
+import socket
+
+import modules.deliverability as deliverability
+from modules.deliverability import DeliverabilityChecker, DeliverabilityLookupError, dns_mx_resolver
+
+
+class StubResolver:
+    """Answers from a dict (domain -> hosts, or an exception to raise) and counts lookups"""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.calls = []
+
+    def __call__(self, domain):
+        self.calls.append(domain)
+        answer = self.answers[domain]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+class Clock:
+    """Stands in for time.monotonic so TTLs can expire without sleeping"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def checker(answers, **options):
+    resolver = StubResolver(answers)
+    return DeliverabilityChecker(resolver=resolver, **options), resolver
+
+
+def test_null_mx_and_syntax():
+    check, resolver = checker({"acme.test": ["mx1.acme.test"], "nomail.test": []})
+
+    ok = check.check(" Jane@ACME.test ")
+    assert ok["deliverable"] and ok["verified"] and ok["mx"] == ["mx1.acme.test"]
+    assert ok["email"] == "Jane@acme.test"
+
+    # Null MX (or no mail records at all): the resolver answers [] and the address is rejected
+    null_mx = check.check("info@nomail.test")
+    assert not null_mx["deliverable"] and null_mx["verified"] and null_mx["reason"] == "no_mail_server"
+
+    for email, reason in [("", "empty"), ("not-an-email", "invalid_syntax"), ("logo@2x.png", "looks_like_filename")]:
+        assert check.check(email)["reason"] == reason
+    assert resolver.calls == ["acme.test", "nomail.test"] # Syntax failures never reach DNS
+
+
+def test_lookup_failure_is_unverified_and_not_cached():
+    check, resolver = checker({"flaky.test": DeliverabilityLookupError("timeout")})
+
+    for _ in range(2):
+        verdict = check.check("a@flaky.test")
+        assert verdict["deliverable"] and not verdict["verified"] and verdict["reason"] == "lookup_failed"
+    assert resolver.calls == ["flaky.test", "flaky.test"]
+
+
+def test_ttl_cache():
+    clock = Clock()
+    original = deliverability.time.monotonic
+    deliverability.time.monotonic = clock
+    try:
+        check, resolver = checker({"acme.test": ["mx.acme.test"], "nomail.test": []},
+                                  ttl_seconds=100, negative_ttl_seconds=10)
+        check.check("a@acme.test")
+        check.check("b@acme.test")
+        check.check("a@nomail.test")
+        assert resolver.calls == ["acme.test", "nomail.test"]
+
+        clock.now += 11 # Past the negative TTL only
+        check.check("c@acme.test")
+        check.check("b@nomail.test")
+        assert resolver.calls == ["acme.test", "nomail.test", "nomail.test"]
+
+        clock.now += 100 # Past the positive TTL too
+        check.check("d@acme.test")
+        assert resolver.calls[-1] == "acme.test"
+        assert check.stats() == {"domains_cached": 2, "hits": 2, "misses": 4}
+    finally:
+        deliverability.time.monotonic = original
+
+
+def test_check_many_resolves_each_domain_once():
+    check, resolver = checker({"acme.test": ["mx.acme.test"], "nomail.test": []})
+    verdicts = check.check_many(["a@acme.test", "b@acme.test", "c@nomail.test", "bad", "d@ACME.test"])
+    assert [v["deliverable"] for v in verdicts] == [True, True, False, False, True]
+    assert sorted(resolver.calls) == ["acme.test", "nomail.test"]
+
+
+def test_address_record_fallback_without_dnspython():
+    try:
+        import dns.resolver # noqa: F401
+        return # dnspython answers real MX queries; the fallback only runs without it
+    except ImportError:
+        pass
+
+    original = socket.getaddrinfo
+
+    def getaddrinfo(host, *args, **kwargs):
+        if host == "has-a-record.test":
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("192.0.2.1", 25))]
+        if host == "broken-dns.test":
+            raise socket.gaierror(socket.EAI_AGAIN, "Temporary failure in name resolution")
+        raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+
+    socket.getaddrinfo = getaddrinfo
+    try:
+        assert dns_mx_resolver("has-a-record.test") == ["has-a-record.test"]
+        assert dns_mx_resolver("missing.test") == []
+        try:
+            dns_mx_resolver("broken-dns.test")
+            assert False, "a temporary DNS failure must raise"
+        except DeliverabilityLookupError:
+            pass
+    finally:
+        socket.getaddrinfo = original
+
+
+if __name__ == "__main__":
+    test_null_mx_and_syntax()
+    test_lookup_failure_is_unverified_and_not_cached()
+    test_ttl_cache()
+    test_check_many_resolves_each_domain_once()
+    test_address_record_fallback_without_dnspython()
+    print("OK: deliverability checks, cache and fallbacks behave")
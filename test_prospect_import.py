@@ -0,0 +1,78 @@
+"""
+Prospect URL handling: domain_key() on odd and malformed input, the bulk
+eligibility check giving a malformed URL an 'invalid' verdict instead of a 500,
+and /prospects/import skipping a malformed row instead of aborting the upload
+(drafting is stubbed, so no scraping or LLM calls are made).
+
+Uses its own SQLite file (PROSPECT_IMPORT_DATABASE_URL), never the app database.
+Run with `python test_prospect_import.py` or pytest.
+"""
+import os
+import json
+
+PROSPECT_IMPORT_DATABASE_URL = os.getenv("PROSPECT_IMPORT_DATABASE_URL", "sqlite:///prospect_import.db")
+
+if PROSPECT_IMPORT_DATABASE_URL.startswith("sqlite:///") and os.path.exists(PROSPECT_IMPORT_DATABASE_URL[10:]):
+    os.remove(PROSPECT_IMPORT_DATABASE_URL[10:])
+os.environ.update({
+    "DATABASE_URL": PROSPECT_IMPORT_DATABASE_URL,
+    "THROWAWAY_DATABASE_URLS": f"{os.getenv('THROWAWAY_DATABASE_URLS', '')} {PROSPECT_IMPORT_DATABASE_URL}".strip(),
+    "SEND_QUEUE_ENABLED": "false",
+    "MX_CHECK_ENABLED": "false",
+})
+
+from fastapi.testclient import TestClient
+
+import main
+from database import reset_db_and_tables
+from modules.prospect_import import domain_key
+
+
+def test_domain_key():
+    assert domain_key("https://www.Acme.com/about") == "acme.com"
+    assert domain_key("acme.com:8080") == "acme.com"
+    assert domain_key("") == domain_key(None) == ""
+    # urlparse raises ValueError on these; they count as no domain
+    assert domain_key("http://[bad") == ""
+    assert domain_key("https://[::1") == ""
+
+
+def test_bulk_eligibility_marks_malformed_urls_invalid():
+    reset_db_and_tables() # pytest may have run the other database checks on this engine first
+    with TestClient(main.app) as client:
+        response = client.post("/outreach/eligibility", json={"urls": ["https://acme.com", "http://[bad", ""]})
+    assert response.status_code == 200, response.text
+    verdicts = [result['verdict'] for result in response.json()['results']]
+    assert verdicts[1:] == ["invalid", "invalid"]
+    assert verdicts[0] in ("eligible", "rate_limited")
+
+
+def test_import_skips_malformed_rows():
+    reset_db_and_tables()
+    original = main.build_lead_draft
+
+    async def build_lead_draft(company_name, normalized_url, primary_email):
+        return {'company_name': company_name, 'website_url': normalized_url}
+
+    main.build_lead_draft = build_lead_draft
+    try:
+        upload = "company,website,email\nAcme,https://acme.com,\nBroken,http://[bad,\nBlank,,x@example.com\n"
+        with TestClient(main.app) as client:
+            response = client.post("/prospects/import", files={"file": ("prospects.csv", upload.encode(), "text/csv")})
+    finally:
+        main.build_lead_draft = original
+
+    assert response.status_code == 200, response.text
+    records = [json.loads(line) for line in response.text.splitlines()]
+    skipped = {record['row']: record['reason'] for record in records if record['type'] == 'skipped'}
+    assert skipped == {3: 'Invalid website', 4: 'Missing website'}
+    drafted = [record['row'] for record in records if record['type'] == 'draft' and record['status'] == 'drafted']
+    assert drafted == [2]
+    assert records[-1] == {'type': 'done', 'drafted': 1, 'failed': 0, 'skipped': 2}
+
+
+if __name__ == "__main__":
+    test_domain_key()
+    test_bulk_eligibility_marks_malformed_urls_invalid()
+    test_import_skips_malformed_rows()
+    print("OK: malformed prospect URLs are treated as invalid")
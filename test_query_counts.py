@@ -0,0 +1,119 @@
+"""
+Query-count check for the list endpoints: each must issue the same number of
+SQL statements with 5 rows as with 50 (no per-row lazy loads).
+
+Uses its own SQLite file (QUERY_COUNT_DATABASE_URL), never the app database:
+.env does not override it, and the reset refuses any database not listed in
+THROWAWAY_DATABASE_URLS. Starts from empty tables, so it can run in one pytest
+session with the other database checks. Run with `python test_query_counts.py` or pytest.
+"""
+import os
+from contextlib import contextmanager
+
+QUERY_COUNT_DATABASE_URL = os.getenv("QUERY_COUNT_DATABASE_URL", "sqlite:///query_counts.db")
+
+if QUERY_COUNT_DATABASE_URL.startswith("sqlite:///") and os.path.exists(QUERY_COUNT_DATABASE_URL[10:]):
+    os.remove(QUERY_COUNT_DATABASE_URL[10:])
+os.environ.update({
+    "DATABASE_URL": QUERY_COUNT_DATABASE_URL,
+    # The only databases reset_db_and_tables() will drop
+    "THROWAWAY_DATABASE_URLS": f"{os.getenv('THROWAWAY_DATABASE_URLS', '')} {QUERY_COUNT_DATABASE_URL}".strip(),
+    "SEND_QUEUE_ENABLED": "false",
+    "MX_CHECK_ENABLED": "false",
+    "ENTITY_CACHE_TTL_SECONDS": "0", # Measure the queries, not cache hits
+})
+
+from sqlalchemy import event
+from sqlmodel import Session
+from fastapi.testclient import TestClient
+
+import main
+from database import reset_db_and_tables, async_engine, User, ClientProfile, ClientKeyword, Project, ProjectMember, Remark, ActivityLog, Company, OutboundEmail
+
+# Pages large enough to hold every seeded row, so the lists really grow between runs
+LIST_ENDPOINTS = [
+    "/clients?limit=500",
+    "/clients?keyword=seo&limit=500",
+    "/employees?limit=500",
+    "/interns?limit=500",
+    "/projects?limit=500",
+    "/projects?member_id=2&limit=500",
+    "/projects/1",
+    "/activities?limit=500",
+    "/clients/1/activities?limit=500",
+    "/clients/1/remarks?limit=500",
+    "/send-queue?status=All&limit=500",
+]
+
+
+@contextmanager
+def count_queries():
+    """Counts the statements the API's async engine sends while the block runs"""
+    counter = {'queries': 0}
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        counter['queries'] += 1
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", on_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", on_execute)
+
+
+def seed(rows, offset):
+    """Adds `rows` of every listed entity (ids continue from `offset`)"""
+    with Session(main.engine) as session:
+        for i in range(offset, offset + rows):
+            user = User(email=f"client{i}@example.com", password="x", name=f"Client {i}", role="Client")
+            staff = User(email=f"staff{i}@example.com", password="x", name=f"Staff {i}",
+                         role="Employee" if i % 2 else "Intern")
+            session.add(user)
+            session.add(staff)
+            session.flush()
+            profile = ClientProfile(userId=user.id, companyName=f"Company {i}", targetKeywords=["seo"])
+            session.add(profile)
+            session.flush()
+            session.add(ClientKeyword(clientId=profile.id, keyword="seo"))
+            project = Project(name=f"Project {i}")
+            session.add(project)
+            session.flush()
+            # Every staff member also joins project 1, so /projects/1 has a growing team
+            for project_id in {project.id, 1}:
+                session.add(ProjectMember(projectId=project_id, userId=staff.id, role=staff.role))
+            session.add(Remark(content=f"Remark {i}", clientId=1, projectId=1))
+            session.add(ActivityLog(clientId=1, action="Manual Activity", method="Email", content=f"Note {i}"))
+            session.add(Company(company_name=f"Company {i}", website_url=f"https://company{i}.example.com",
+                                primary_email=f"client{i}@example.com"))
+            session.add(OutboundEmail(idempotencyKey=f"seed-{i}", toEmail=f"client{i}@example.com",
+                                      subject="Hi", body="Hello", priority=i % 3))
+        session.commit()
+
+
+def measure(client):
+    counts = {}
+    for path in LIST_ENDPOINTS:
+        with count_queries() as counter:
+            response = client.get(path)
+        assert response.status_code == 200, f"{path}: {response.status_code} {response.text[:200]}"
+        counts[path] = counter['queries']
+    return counts
+
+
+def test_list_endpoints_issue_constant_queries():
+    reset_db_and_tables() # Seeds assume empty tables and ids from 1
+    with TestClient(main.app) as client:
+        seed(5, 0)
+        small = measure(client)
+        seed(45, 5)
+        large = measure(client)
+
+    for path in LIST_ENDPOINTS:
+        print(f"{path:<36} {small[path]:>3} queries @ 5 rows  {large[path]:>3} queries @ 50 rows")
+    grown = {path: (small[path], large[path]) for path in LIST_ENDPOINTS if large[path] != small[path]}
+    assert not grown, f"Query count grows with row count: {grown}"
+
+
+if __name__ == "__main__":
+    test_list_endpoints_issue_constant_queries()
+    print("OK: every list endpoint issues a constant number of queries")
@@ -0,0 +1,218 @@
+"""
+Query-plan check for the hot endpoints: seeds a large dataset, records every
+SQL statement each endpoint runs, EXPLAINs it and fails if any plan reads a
+whole table (SQLite "SCAN <table>", Postgres "Seq Scan") instead of an index.
+
+Uses its own database (QUERY_PLAN_DATABASE_URL, SQLite file by default), never
+the app database: .env does not override it, and the reset refuses any database
+not listed in THROWAWAY_DATABASE_URLS. Starts from empty tables, so it can run in
+one pytest session with the other database checks. Run with `python test_query_plans.py` or pytest.
+"""
+import os
+import re
+from datetime import datetime, timedelta
+from contextlib import contextmanager
+
+QUERY_PLAN_DATABASE_URL = os.getenv("QUERY_PLAN_DATABASE_URL", "sqlite:///query_plans.db")
+SEED_ROWS = int(os.getenv("QUERY_PLAN_SEED_ROWS", 2000))
+
+if QUERY_PLAN_DATABASE_URL.startswith("sqlite:///") and os.path.exists(QUERY_PLAN_DATABASE_URL[10:]):
+    os.remove(QUERY_PLAN_DATABASE_URL[10:])
+os.environ.update({
+    "DATABASE_URL": QUERY_PLAN_DATABASE_URL,
+    # The only databases reset_db_and_tables() will drop
+    "THROWAWAY_DATABASE_URLS": f"{os.getenv('THROWAWAY_DATABASE_URLS', '')} {QUERY_PLAN_DATABASE_URL}".strip(),
+    "SEND_QUEUE_ENABLED": "false",
+    "MX_CHECK_ENABLED": "false",
+    "ENTITY_CACHE_TTL_SECONDS": "0", # Measure the queries, not cache hits
+})
+
+from sqlalchemy import event, text, or_
+from sqlmodel import SQLModel, Session, select
+from fastapi.testclient import TestClient
+
+import main
+from database import (
+    reset_db_and_tables, engine, async_engine, User, ClientProfile, ClientKeyword, Project, ProjectMember, ProjectClient,
+    Remark, ActivityLog, Company, OutboundEmail
+)
+
+ENDPOINTS = [
+    "/clients",
+    "/clients?status=Hold",
+    "/clients?employee_id=2",
+    "/clients?project_id=3",
+    "/clients?keyword=kw7",
+    "/employees",
+    "/interns",
+    "/projects",
+    "/projects?member_id=2",
+    "/projects?client_id=3",
+    "/projects/3",
+    "/activities",
+    "/activities?sent=true",
+    "/clients/3/activities",
+    "/clients/3/remarks",
+    "/send-queue",
+    "/dashboard-stats?role=Admin&email=",
+    "/dashboard-stats?role=Client&email=client3@example.com",
+    "/search?q=remark",
+    "/search?q=company&types=client&client_id=3",
+]
+
+TABLES = set(SQLModel.metadata.tables)
+
+# (path, JSON body) of the POST endpoints that only read
+POSTS = [
+    ("/clients/keywords/lookup", {"keywords": ["seo", "kw7", "missing"]}),
+]
+
+# Lookups the write paths run (record_sent_email, save_lead_records)
+LOOKUPS = [
+    select(Company).where(Company.primary_email == "client3@example.com"),
+    select(Company).where(or_(Company.primary_email == "client3@example.com",
+                              Company.website_url == "https://company3.example.com")),
+    select(ClientProfile.id).join(User, User.id == ClientProfile.userId).where(User.email == "client3@example.com"),
+]
+
+# Whole-table reads that are the point of the query, with the reason
+ALLOWED_SCANS = {
+    ("/dashboard-stats?role=Admin&email=", "client_metrics_daily"): "admin totals sum every client's rollup (cached)",
+}
+
+
+@contextmanager
+def capture_statements():
+    """Records (statement, parameters) of everything the API's async engine runs while the block runs"""
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", on_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", on_execute)
+
+
+async def explain(statement, parameters):
+    """Tables the plan reads in full"""
+    async with async_engine.connect() as conn:
+        if async_engine.dialect.name == 'postgresql':
+            plan = (await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters)).scalar()
+            nodes, scans = [plan[0]['Plan']], []
+            while nodes:
+                node = nodes.pop()
+                if node['Node Type'] == 'Seq Scan':
+                    scans.append(node['Relation Name'])
+                nodes.extend(node.get('Plans', []))
+            return scans
+        details = [row[-1] for row in (await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)).all()]
+        # A scan that already yields rows in ORDER BY order stops at the LIMIT: that reads one page, not the table
+        if re.search(r"\bLIMIT\b", statement) and not any(d.startswith("USE TEMP B-TREE FOR ORDER BY") for d in details):
+            return []
+        # Only real tables count (SCAN anon_1 reads a subquery's result)
+        return [match.group(1) for d in details if (match := re.fullmatch(r"SCAN (\w+)", d)) and match.group(1) in TABLES]
+
+
+def seed(rows):
+    """`rows` clients, staff, companies and activities; a tenth as many projects"""
+    start = datetime.utcnow() - timedelta(days=365)
+    with Session(engine) as session:
+        staff = [User(email=f"staff{i}@example.com", password="x", name=f"Staff {i}",
+                      role=["Employee", "Intern", "Admin"][i % 3], createdAt=start + timedelta(minutes=i))
+                 for i in range(rows)]
+        users = [User(email=f"client{i}@example.com", password="x", name=f"Client {i}", role="Client",
+                      createdAt=start + timedelta(minutes=i)) for i in range(rows)]
+        projects = [Project(name=f"Project {i}", status=["Planning", "Active", "Completed"][i % 3],
+                            createdAt=start + timedelta(hours=i)) for i in range(rows // 10)]
+        session.add_all(staff + users + projects)
+        session.flush()
+
+        profiles = [ClientProfile(userId=user.id, companyName=f"Company {i}", status=["Active", "Pending", "Hold"][i % 3],
+                                  assignedEmployeeId=staff[i % 50].id, projectId=projects[i % len(projects)].id,
+                                  targetKeywords=["seo", f"kw{i % 200}"]) for i, user in enumerate(users)]
+        session.add_all(profiles)
+        session.flush()
+        session.add_all([ClientKeyword(clientId=profile.id, keyword=keyword, position=position)
+                         for profile in profiles for position, keyword in enumerate(profile.targetKeywords)])
+
+        session.add_all([ProjectMember(projectId=project.id, userId=member.id, role="Employee")
+                         for i, project in enumerate(projects) for member in staff[i % 50:i % 50 + 3]])
+        session.add_all([ProjectClient(projectId=project.id, clientId=profiles[i].id) for i, project in enumerate(projects)])
+        session.add_all([ActivityLog(clientId=profiles[i % 100].id, action="Manual Activity", method="Email",
+                                     content=f"Note {i}", createdAt=start + timedelta(minutes=i)) for i in range(rows)])
+        session.add_all([Remark(content=f"Remark {i}", clientId=profiles[i % 100].id, projectId=projects[i % 10].id,
+                                createdAt=start + timedelta(minutes=i)) for i in range(rows)])
+        session.add_all([Company(company_name=f"Company {i}", website_url=f"https://company{i}.example.com",
+                                 primary_email=f"client{i}@example.com", email_sent_status=i % 2 == 0,
+                                 created_at=start + timedelta(minutes=i)) for i in range(rows)])
+        session.add_all([OutboundEmail(idempotencyKey=f"seed-{i}", toEmail=f"client{i}@example.com", subject="Hi",
+                                       body="Hello", priority=i % 3, status=["Queued", "Sent", "Failed"][i % 3])
+                         for i in range(rows)])
+        session.commit()
+        session.exec(text("ANALYZE"))
+        session.commit()
+
+
+def plans(client):
+    """{label: [fully scanned tables]} for every endpoint (first and second page) and lookup"""
+    found = {}
+
+    def record(label, statements):
+        for statement, parameters in statements:
+            # On the app's event loop, so the async engine's pooled connections stay on one loop
+            for table in client.portal.call(explain, statement, parameters):
+                found.setdefault(label, set()).add(table)
+
+    for path in ENDPOINTS:
+        with capture_statements() as statements:
+            response = client.get(path)
+        assert response.status_code == 200, f"{path}: {response.status_code} {response.text[:200]}"
+        next_cursor = response.json().get("next_cursor") if isinstance(response.json(), dict) else None
+        if next_cursor:
+            with capture_statements() as more:
+                client.get(f"{path}{'&' if '?' in path else '?'}cursor={next_cursor}")
+            statements += more
+        record(path, statements)
+
+    for path, body in POSTS:
+        with capture_statements() as statements:
+            response = client.post(path, json=body)
+        assert response.status_code == 200, f"{path}: {response.status_code} {response.text[:200]}"
+        record(path, statements)
+
+    async def run_lookups():
+        from database import get_session
+        async for session in get_session():
+            for lookup in LOOKUPS:
+                await session.exec(lookup)
+
+    with capture_statements() as statements:
+        client.portal.call(run_lookups)
+    record("write-path lookups", statements)
+    return found
+
+
+def test_hot_queries_use_indexes():
+    reset_db_and_tables() # pytest may have run the other database checks on this engine first
+    main.dashboard_cache.invalidate()
+    seed(SEED_ROWS)
+    with TestClient(main.app) as client:
+        found = plans(client)
+
+    scans = {
+        label: sorted(table for table in tables if (label, table) not in ALLOWED_SCANS)
+        for label, tables in found.items()
+    }
+    scans = {label: tables for label, tables in scans.items() if tables}
+    for label in ENDPOINTS + [path for path, _ in POSTS] + ["write-path lookups"]:
+        print(f"{label:<58} {', '.join(scans.get(label, [])) or 'indexed'}")
+    assert not scans, f"Full table scans: {scans}"
+
+
+if __name__ == "__main__":
+    test_hot_queries_use_indexes()
+    print("OK: every hot query is served from an index")